@@ -0,0 +1,652 @@
+"""In-process interpreter for the Amazon States Language used by the approval workflows.
+
+Runs ``statemachine/approval_workflow.asl.json`` (rds-2 and stepfunctions-poc)
+without AWS: ``lambda:invoke`` tasks call Python handlers directly,
+``sqs:sendMessage.waitForTaskToken`` hands the message body to a Python
+consumer and parks the execution until ``send_task_success`` /
+``send_task_failure`` or its ``TimeoutSeconds`` elapses on a virtual clock.
+
+Supported: Task (``lambda:invoke``, plain Lambda ARNs, ``sqs:sendMessage`` with
+or without ``.waitForTaskToken``), Pass, Choice, Wait (``Seconds``), Succeed,
+Fail; InputPath, Parameters, ResultSelector, ResultPath, OutputPath, Catch,
+TimeoutSeconds; the intrinsics States.Format, States.JsonToString,
+States.StringToJson, States.Array and States.UUID. Anything else is rejected
+when the definition is loaded.
+
+    machine = LocalStateMachine.from_file(path, functions={...}, queues={...},
+                                          substitutions={"QueueUrl": "q"})
+    execution = machine.start({"title": "Midterm QP", "assessorEmail": "a@example.com"})
+    machine.send_task_success(token, json.dumps({"decision": "APPROVE"}))
+    machine.advance(172800)   # fire every timeout that is due
+
+Run as a script to measure executions per second through the rds-2 workflow:
+
+    python benchmarks/asl_local.py --executions 20000 --reject-share 0.2 --timeout-share 0.1
+    python benchmarks/asl_local.py --handlers   # real rds-2 handlers against benchmarks/stubs.py
+"""
+import argparse
+import functools
+import heapq
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+RDS2 = os.path.join(ROOT, "stepfunctions-poc-rds-2")
+DEFAULT_DEFINITION = os.path.join(RDS2, "statemachine", "approval_workflow.asl.json")
+
+LAMBDA_INVOKE = "arn:aws:states:::lambda:invoke"
+SQS_SEND = "arn:aws:states:::sqs:sendMessage"
+SQS_WAIT = "arn:aws:states:::sqs:sendMessage.waitForTaskToken"
+STATE_FIELDS = {
+    "Task": {"Resource", "Parameters", "ResultSelector", "TimeoutSeconds", "Catch"},
+    "Pass": {"Parameters", "Result"},
+    "Choice": {"Choices", "Default"},
+    "Wait": {"Seconds"},
+    "Succeed": set(),
+    "Fail": {"Error", "Cause"},
+}
+COMMON_FIELDS = {"Type", "Comment", "Next", "End", "InputPath", "ResultPath", "OutputPath"}
+UNCATCHABLE = {"States.Runtime"}
+
+
+class StatesError(Exception):
+    """A named Step Functions error; what Catch matches on and what a failed execution reports."""
+
+    def __init__(self, error, cause=""):
+        super().__init__(f"{error}: {cause}" if cause else error)
+        self.error, self.cause = error, cause
+
+
+class VirtualClock:
+    """Seconds since the machine was created; only moves when ``LocalStateMachine.advance`` is called."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+
+class LambdaContext:
+    """Enough of the Lambda context object for the handlers (``jsonlog.start`` reads the request id)."""
+
+    def __init__(self, function_name):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+
+    def get_remaining_time_in_millis(self):
+        return 900_000
+
+
+# -- paths ---------------------------------------------------------------------------------------
+
+_SEGMENT = re.compile(r"\.([^.\[]+)|\[(\d+)\]")
+_compiled = {}
+
+
+def _segments(path):
+    segments = _compiled.get(path)
+    if segments is None:
+        root = "$$" if path.startswith("$$") else "$"
+        rest = path[len(root):]
+        segments = [int(index) if index else name for name, index in _SEGMENT.findall(rest)]
+        if "".join(f".{s}" if isinstance(s, str) else f"[{s}]" for s in segments) != rest:
+            raise ValueError(f"unsupported path {path!r}")
+        _compiled[path] = segments
+    return segments
+
+
+def get_path(path, data, context=None):
+    value = context if path.startswith("$$") else data
+    for segment in _segments(path):
+        try:
+            value = value[segment]
+        except (KeyError, IndexError, TypeError):
+            raise StatesError("States.Runtime", f"path {path!r} not found in input") from None
+    return value
+
+
+def set_path(data, path, value):
+    """Return ``data`` with ``value`` stored at ``path``, copying only the dicts along the way."""
+    if path is None:
+        return data
+    segments = _segments(path)
+    if not segments:
+        return value
+    root = dict(data) if isinstance(data, dict) else {}
+    node = root
+    for segment in segments[:-1]:
+        child = node.get(segment)
+        node[segment] = node = dict(child) if isinstance(child, dict) else {}
+    node[segments[-1]] = value
+    return root
+
+
+# -- intrinsic functions -------------------------------------------------------------------------
+
+_FORMAT_TOKEN = re.compile(r"\\(.)|(\{\})|\{\{|\}\}")
+
+
+@functools.lru_cache(maxsize=None)
+def _format_parts(template):
+    """Literal chunks with None where an argument goes; ``\\{`` and doubled braces are literal braces."""
+    parts, last = [], 0
+    for m in _FORMAT_TOKEN.finditer(template):
+        parts.append(template[last:m.start()])
+        parts.append(None if m.group(2) else m.group(1) or m.group(0)[0])
+        last = m.end()
+    parts.append(template[last:])
+    return tuple(parts)
+
+
+def _format(template, *args):
+    parts = _format_parts(template)
+    if parts.count(None) != len(args):
+        raise StatesError("States.IntrinsicFailure", "States.Format placeholders and arguments do not match")
+    out, args = [], iter(args)
+    for part in parts:
+        if part is None:
+            arg = next(args)
+            part = arg if isinstance(arg, str) else json.dumps(arg)
+        out.append(part)
+    return "".join(out)
+
+
+INTRINSICS = {
+    "States.Format": _format,
+    "States.JsonToString": lambda value: json.dumps(value, separators=(",", ":")),
+    "States.StringToJson": lambda text: json.loads(text),
+    "States.Array": lambda *values: list(values),
+    "States.UUID": lambda: str(uuid.uuid4()),
+}
+_TOKEN = re.compile(r"\s*(?:(?P<call>States\.\w+)\(|(?P<path>\$\$?[^,)\s]*)|(?P<num>-?\d+(?:\.\d+)?)"
+                    r"|(?P<lit>null|true|false)|'(?P<str>(?:[^'\\]|\\.)*)'|(?P<close>\))|(?P<comma>,))")
+_UNESCAPE = re.compile(r"\\([^{}])")   # keep \{ \} for States.Format
+
+
+def _parse(expr, pos, name):
+    """Parse the arguments of ``name(`` starting at ``pos``; returns ((name, args), end)."""
+    if name not in INTRINSICS:
+        raise ValueError(f"unsupported intrinsic {name}")
+    args = []
+    while True:
+        m = _TOKEN.match(expr, pos)
+        if not m:
+            raise ValueError(f"cannot parse {expr!r} at {pos}")
+        pos = m.end()
+        if m.group("close"):
+            return (name, tuple(args)), pos
+        if m.group("call"):
+            node, pos = _parse(expr, pos, m.group("call"))
+            args.append(("call", node))
+        elif m.group("path"):
+            _segments(m.group("path"))
+            args.append(("path", m.group("path")))
+        elif m.group("num") or m.group("lit"):
+            args.append(("value", json.loads(m.group("num") or m.group("lit"))))
+        elif m.group("str") is not None:
+            args.append(("value", _UNESCAPE.sub(r"\1", m.group("str"))))
+
+
+@functools.lru_cache(maxsize=None)
+def _compile(expr):
+    name = expr[:expr.index("(")]
+    node, end = _parse(expr, len(name) + 1, name)
+    if expr[end:].strip():
+        raise ValueError(f"trailing text after {expr[:end]!r}")
+    return node
+
+
+def _call(node, data, context):
+    name, args = node
+    values = [get_path(v, data, context) if kind == "path" else _call(v, data, context) if kind == "call" else v
+              for kind, v in args]
+    try:
+        return INTRINSICS[name](*values)
+    except StatesError:
+        raise
+    except Exception as e:
+        raise StatesError("States.IntrinsicFailure", f"{name}: {e}") from None
+
+
+def evaluate(expr, data, context=None):
+    """Value of a ``"key.$"`` expression: a path or an intrinsic call."""
+    if expr.startswith("States."):
+        return _call(_compile(expr), data, context)
+    return get_path(expr, data, context)
+
+
+def render(template, data, context=None):
+    """Evaluate a Parameters / ResultSelector / MessageBody template."""
+    if isinstance(template, dict):
+        return {k[:-2] if k.endswith(".$") else k: evaluate(v, data, context) if k.endswith(".$") else render(v, data, context)
+                for k, v in template.items()}
+    if isinstance(template, list):
+        return [render(v, data, context) for v in template]
+    return template
+
+
+# -- Choice rules --------------------------------------------------------------------------------
+
+_COMPARISONS = {
+    "Equals": lambda a, b: a == b, "LessThan": lambda a, b: a < b, "GreaterThan": lambda a, b: a > b,
+    "LessThanEquals": lambda a, b: a <= b, "GreaterThanEquals": lambda a, b: a >= b,
+}
+_KINDS = ("String", "Numeric", "Boolean", "Timestamp")
+
+
+def _is(kind, value):
+    if kind == "Numeric":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, bool) if kind == "Boolean" else isinstance(value, str)
+
+
+def _rule(rule, data, context):
+    if "And" in rule:
+        return all(_rule(r, data, context) for r in rule["And"])
+    if "Or" in rule:
+        return any(_rule(r, data, context) for r in rule["Or"])
+    if "Not" in rule:
+        return not _rule(rule["Not"], data, context)
+    try:
+        value, present = get_path(rule["Variable"], data, context), True
+    except StatesError:
+        value, present = None, False
+    op, operand = next((k, v) for k, v in rule.items() if k not in ("Variable", "Next"))
+    if op == "IsPresent":
+        return present == operand
+    if not present:
+        raise StatesError("States.Runtime", f"Choice variable {rule['Variable']!r} not found in input")
+    if op == "IsNull":
+        return (value is None) == operand
+    if op[2:] in _KINDS and op.startswith("Is"):
+        return _is(op[2:], value) == operand
+    if op == "StringMatches":
+        return isinstance(value, str) and re.fullmatch(re.escape(operand).replace(r"\*", ".*"), value) is not None
+    if op.endswith("Path"):
+        op, operand = op[:-4], get_path(operand, data, context)
+    kind = next((k for k in _KINDS if op.startswith(k) and op[len(k):] in _COMPARISONS), None)
+    if kind is None:
+        raise ValueError(f"unsupported Choice operator {op}")
+    return _is(kind, value) and _COMPARISONS[op[len(kind):]](value, operand)
+
+
+# -- executions ----------------------------------------------------------------------------------
+
+class Execution:
+    """One run of the machine. ``status`` is RUNNING until it reaches Succeed/Fail/End or an uncaught error."""
+
+    def __init__(self, machine, name, execution_input):
+        self.machine, self.name, self.input = machine, name, execution_input
+        self.arn = f"{machine.arn.replace(':stateMachine:', ':execution:')}:{name}"
+        self.status, self.output, self.error, self.cause = "RUNNING", None, None, None
+        self.start_time, self.stop_time = machine.clock.now, None
+        self.history = []               # names of the states entered, in order
+        self.waiting = None             # (state name, state input, token) while parked
+        self._delivering = False        # True while the queue consumer runs inside a wait task
+        self._early = None              # outcome reported by that consumer before it returned
+
+    def context(self, state_name, token=None):
+        return {"Execution": {"Id": self.arn, "Name": self.name, "Input": self.input, "StartTime": self.start_time},
+                "StateMachine": {"Id": self.machine.arn, "Name": self.machine.name},
+                "State": {"Name": state_name, "EnteredTime": self.machine.clock.now},
+                "Task": {"Token": token}}
+
+    def _finish(self, status, output=None, error=None, cause=None):
+        self.status, self.output, self.error, self.cause = status, output, error, cause
+        self.stop_time = self.machine.clock.now
+
+    def run(self, name, data):
+        while name is not None:
+            state = self.machine.states[name]
+            self.history.append(name)
+            try:
+                name, data = self._step(name, state, data)
+            except StatesError as e:
+                name, data = self._caught(state, data, e)
+
+    def resume(self, result=None, error=None):
+        """Continue from the parked task state with its result or error."""
+        state_name, data, _ = self.waiting
+        self.waiting = None
+        state = self.machine.states[state_name]
+        try:
+            if error is not None:
+                raise error
+            name, data = self._after_task(state, data, result)
+        except StatesError as e:
+            name, data = self._caught(state, data, e)
+        self.run(name, data)
+
+    def _caught(self, state, data, error):
+        if error.error not in UNCATCHABLE:
+            for catcher in state.get("Catch", ()):
+                names = catcher["ErrorEquals"]
+                if error.error in names or "States.ALL" in names or (
+                        "States.TaskFailed" in names and error.error != "States.Timeout"):
+                    info = {"Error": error.error, "Cause": error.cause}
+                    return catcher["Next"], set_path(data, catcher.get("ResultPath", "$"), info)
+        self._finish("FAILED", error=error.error, cause=error.cause)
+        return None, None
+
+    def _next(self, state, output):
+        if state.get("End") or "Next" not in state:
+            self._finish("SUCCEEDED", output)
+            return None, None
+        return state["Next"], output
+
+    @staticmethod
+    def _select(path, data):
+        return {} if path is None else data if path == "$" else get_path(path, data)
+
+    def _output(self, state, data, result):
+        return self._select(state.get("OutputPath", "$"), set_path(data, state.get("ResultPath", "$"), result))
+
+    def resume_wait(self):
+        state_name, data, _ = self.waiting
+        self.waiting = None
+        state = self.machine.states[state_name]
+        self.run(*self._next(state, self._select(state.get("OutputPath", "$"), data)))
+
+    def _step(self, name, state, data):
+        kind = state["Type"]
+        effective = self._select(state.get("InputPath", "$"), data)
+        if kind == "Task":
+            return self._task(name, state, data, effective)
+        if kind == "Pass":
+            result = state["Result"] if "Result" in state else (
+                render(state["Parameters"], effective, self.context(name)) if "Parameters" in state else effective)
+            return self._next(state, self._output(state, data, result))
+        if kind == "Choice":
+            for rule in state["Choices"]:
+                if _rule(rule, effective, self.context(name)):
+                    return rule["Next"], self._select(state.get("OutputPath", "$"), effective)
+            if "Default" not in state:
+                raise StatesError("States.NoChoiceMatched", f"no Choice rule matched in {name}")
+            return state["Default"], self._select(state.get("OutputPath", "$"), effective)
+        if kind == "Wait":
+            self.waiting = (name, data, None)
+            self.machine._schedule(self.machine.clock.now + state["Seconds"], self, None)
+            return None, None
+        if kind == "Succeed":
+            self._finish("SUCCEEDED", self._select(state.get("OutputPath", "$"), effective))
+            return None, None
+        if kind == "Fail":
+            self._finish("FAILED", error=state.get("Error"), cause=state.get("Cause"))
+            return None, None
+        raise ValueError(f"unsupported state type {kind}")
+
+    def _task(self, name, state, data, effective):
+        resource = state["Resource"]
+        token = self.machine._token(self) if resource == SQS_WAIT else None
+        try:
+            params = render(state["Parameters"], effective, self.context(name, token)) if "Parameters" in state else effective
+        except StatesError:
+            self.machine._waiting.pop(token, None)
+            raise
+        if resource == SQS_WAIT:
+            self.waiting = (name, data, token)
+            if "TimeoutSeconds" in state:
+                self.machine._schedule(self.machine.clock.now + state["TimeoutSeconds"], self, token)
+            self._delivering = True
+            try:
+                self.machine._deliver(params)
+            except Exception:
+                self.waiting, self._early = None, None
+                self.machine._waiting.pop(token, None)
+                raise
+            finally:
+                self._delivering = False
+            if self._early is None:
+                return None, None   # parked until send_task_* or the timeout
+            (result, error), self._early = self._early, None
+            self.waiting = None
+            if error is not None:
+                raise error
+            return self._after_task(state, data, result)
+        if resource == SQS_SEND:
+            self.machine._deliver(params)
+            return self._after_task(state, data, {"MessageId": str(uuid.uuid4())})
+        if resource == LAMBDA_INVOKE:
+            payload = self.machine._invoke(params["FunctionName"], params.get("Payload", {}))
+            return self._after_task(state, data, {"ExecutedVersion": "$LATEST", "Payload": payload, "StatusCode": 200})
+        return self._after_task(state, data, self.machine._invoke(resource, params))
+
+    def _after_task(self, state, data, result):
+        if "ResultSelector" in state:
+            result = render(state["ResultSelector"], result)
+        return self._next(state, self._output(state, data, result))
+
+
+class LocalStateMachine:
+    """Parsed definition plus the handlers it calls, the virtual clock and every parked execution."""
+
+    def __init__(self, definition, functions=None, queues=None, name="approval-workflow", clock=None):
+        self.definition, self.name = definition, name
+        self.arn = f"arn:aws:states:local:000000000000:stateMachine:{name}"
+        self.states, self.start_at = definition["States"], definition["StartAt"]
+        self.functions, self.queues = dict(functions or {}), dict(queues or {})
+        self.clock = clock or VirtualClock()
+        self.executions = {}
+        self._waiting = {}              # task token -> execution
+        self._timers = []               # heap of (deadline, seq, execution, token)
+        self._seq = itertools.count()
+        self._validate()
+
+    @classmethod
+    def from_file(cls, path, substitutions=None, **kwargs):
+        """Load an ``.asl.json``, replacing ``${Name}`` placeholders the way DefinitionSubstitutions does."""
+        with open(path) as f:
+            text = f.read()
+        subs = substitutions or {}
+        text = re.sub(r"\$\{(\w+)\}", lambda m: str(subs.get(m.group(1), m.group(0))), text)
+        return cls(json.loads(text), **kwargs)
+
+    def _validate(self):
+        problems = []
+        if self.start_at not in self.states:
+            problems.append(f"StartAt {self.start_at!r} is not a state")
+        for name, state in self.states.items():
+            kind = state.get("Type")
+            if kind not in STATE_FIELDS:
+                problems.append(f"{name}: unsupported Type {kind!r}")
+                continue
+            extra = set(state) - COMMON_FIELDS - STATE_FIELDS[kind]
+            if extra:
+                problems.append(f"{name}: unsupported fields {sorted(extra)}")
+            targets = [state.get("Next"), state.get("Default")] + [c["Next"] for c in state.get("Catch", ())] + [
+                c.get("Next") for c in state.get("Choices", ())]
+            problems += [f"{name}: Next {t!r} is not a state" for t in targets if t and t not in self.states]
+            resource = state.get("Resource", "")
+            if kind == "Task" and resource not in (LAMBDA_INVOKE, SQS_SEND, SQS_WAIT) and not resource.startswith("arn:aws:lambda:"):
+                problems.append(f"{name}: unsupported Resource {resource!r}")
+        if problems:
+            raise ValueError("definition is outside the supported subset:\n  " + "\n  ".join(problems))
+
+    # -- called by executions
+
+    def _token(self, execution):
+        token = f"{execution.name}.{next(self._seq)}"
+        self._waiting[token] = execution
+        return token
+
+    def _schedule(self, deadline, execution, token):
+        heapq.heappush(self._timers, (deadline, next(self._seq), execution, token))
+
+    def _deliver(self, params):
+        url, body = params.get("QueueUrl"), params.get("MessageBody")
+        consumer = self.queues.get(url)
+        if consumer is None:
+            raise StatesError("SQS.QueueDoesNotExistException", f"no consumer for queue {url!r}")
+        consumer(body if isinstance(body, str) else json.dumps(body))
+
+    def _invoke(self, function_name, payload):
+        handler = self.functions.get(function_name)
+        if handler is None:
+            raise StatesError("Lambda.ResourceNotFoundException", f"function {function_name!r} is not registered")
+        event = json.loads(json.dumps(payload))   # what actually crosses the wire
+        try:
+            result = handler(event, LambdaContext(function_name))
+        except Exception as e:
+            cause = json.dumps({"errorMessage": str(e), "errorType": type(e).__name__})
+            raise StatesError(type(e).__name__, cause) from None
+        try:
+            return json.loads(json.dumps(result))
+        except (TypeError, ValueError) as e:
+            raise StatesError("Lambda.SerializationException", str(e)) from None
+
+    # -- public API
+
+    def start(self, execution_input=None, name=None):
+        """StartExecution; returns the Execution, which is already finished unless it parked on a wait."""
+        name = name or str(uuid.uuid4())
+        if name in self.executions:
+            raise StatesError("ExecutionAlreadyExists", name)
+        execution = Execution(self, name, execution_input if execution_input is not None else {})
+        self.executions[name] = execution
+        execution.run(self.start_at, json.loads(json.dumps(execution.input)))
+        return execution
+
+    def _complete(self, token, result=None, error=None):
+        execution = self._waiting.pop(token, None)
+        if execution is None:
+            raise StatesError("TaskDoesNotExist", "task token is unknown, timed out or already used")
+        if execution._delivering:
+            execution._early = (result, error)   # the consumer answered synchronously; _task picks it up
+            return
+        execution.resume(result, error)
+
+    def send_task_success(self, token, output):
+        self._complete(token, result=json.loads(output) if isinstance(output, str) else output)
+
+    def send_task_failure(self, token, error=None, cause=None):
+        self._complete(token, error=StatesError(error or "", cause or ""))
+
+    def advance(self, seconds):
+        """Move the clock forward, firing due task timeouts and Wait states in deadline order."""
+        target = self.clock.now + seconds
+        while self._timers and self._timers[0][0] <= target:
+            deadline, _, execution, token = heapq.heappop(self._timers)
+            self.clock.now = max(self.clock.now, deadline)
+            if token is None:
+                if execution.waiting and execution.waiting[2] is None:
+                    execution.resume_wait()
+            elif self._waiting.get(token) is execution and execution.waiting and execution.waiting[2] == token:
+                del self._waiting[token]
+                execution.resume(error=StatesError("States.Timeout", f"{execution.waiting[0]} timed out"))
+        self.clock.now = target
+
+    def run_until_idle(self):
+        """Advance straight to each pending deadline until nothing is left waiting on the clock."""
+        while self._timers:
+            self.advance(max(0.0, self._timers[0][0] - self.clock.now))
+
+
+# -- benchmark -----------------------------------------------------------------------------------
+
+def _stand_ins():
+    """Minimal handlers honouring the rds-2 contract, so the numbers measure the interpreter itself."""
+    def create(event, _ctx):
+        if not event.get("title") or not event.get("assessorEmail"):
+            raise ValueError("title and assessorEmail are required")
+        task_id = event.get("taskId") or str(uuid.uuid4())
+        return {"statusCode": 200, "taskId": task_id, "questionId": task_id,
+                "assessorEmail": event["assessorEmail"], "title": event["title"]}
+
+    def finalize(event, _ctx):
+        status = {"APPROVE": "APPROVED", "REJECT": "REJECTED"}.get(event.get("decision"), event.get("decision"))
+        return {"status": "updated", "taskId": event.get("taskId"), "statusSet": status}
+
+    return create, finalize, lambda body: None
+
+
+def _real_handlers():
+    """The rds-2 handlers themselves, with PostgreSQL and AWS replaced by benchmarks/stubs.py."""
+    import importlib.util
+    sys.path.insert(0, BENCH_DIR)
+    sys.path.insert(0, os.path.join(RDS2, "src", "psycopg2-layer", "python"))
+    import stubs
+    stubs.install()
+
+    def load(function):
+        spec = importlib.util.spec_from_file_location(f"{function}_app", os.path.join(RDS2, "src", function, "app.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.lambda_handler
+
+    consume = load("callback_consumer")
+    records = itertools.count()
+    return load("create_request"), load("finalize"), lambda body: consume(
+        {"Records": [{"messageId": f"m-{next(records)}", "body": body}]}, LambdaContext("callback_consumer"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("definition", nargs="?", default=DEFAULT_DEFINITION)
+    parser.add_argument("--executions", type=int, default=10_000)
+    parser.add_argument("--reject-share", type=float, default=0.2)
+    parser.add_argument("--timeout-share", type=float, default=0.1, help="tasks nobody decides; they hit TimeoutSeconds")
+    parser.add_argument("--handlers", action="store_true", help="run the real rds-2 handlers against benchmarks/stubs.py")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output-dir", default="bench-out")
+    args = parser.parse_args(argv)
+
+    create, finalize, consume = _real_handlers() if args.handlers else _stand_ins()
+    tokens = []
+
+    def queue(body):
+        message = json.loads(body)
+        message = json.loads(message) if isinstance(message, str) else message   # States.JsonToString double-encodes
+        tokens.append(message.get("taskToken"))
+        consume(body)
+
+    machine = LocalStateMachine.from_file(
+        args.definition, substitutions={"CreateRequestArn": "create", "FinalizeArn": "finalize", "QueueUrl": "approvals"},
+        functions={"create": create, "finalize": finalize}, queues={"approvals": queue})
+    rng = random.Random(args.seed)
+
+    started = time.perf_counter()
+    for i in range(args.executions):
+        machine.start({"title": f"Paper {i}", "content": "Set A", "assessorEmail": f"assessor{i % 50}@example.com"},
+                      name=f"approval-{i}")
+    decided = time.perf_counter()
+    for token in tokens:
+        roll = rng.random()
+        if roll < args.timeout_share:
+            continue
+        decision = "REJECT" if roll < args.timeout_share + args.reject_share else "APPROVE"
+        payload = json.dumps({"decision": decision, "comments": "bench"})
+        if decision == "APPROVE":
+            machine.send_task_success(token, payload)
+        else:
+            machine.send_task_failure(token, "Rejected", payload)
+    machine.run_until_idle()
+    elapsed = time.perf_counter() - started
+
+    outcomes = {}
+    for execution in machine.executions.values():
+        key = execution.status if execution.status != "SUCCEEDED" else (
+            f"SUCCEEDED/{(execution.output or {}).get('statusSet', '?')}")
+        outcomes[key] = outcomes.get(key, 0) + 1
+    states = sum(len(e.history) for e in machine.executions.values())
+    report = {"definition": os.path.relpath(args.definition, ROOT), "handlers": "real" if args.handlers else "stand-in",
+              "executions": args.executions, "states": states, "seconds": round(elapsed, 3),
+              "executions_per_second": round(args.executions / elapsed, 1), "states_per_second": round(states / elapsed, 1),
+              "start_phase_seconds": round(decided - started, 3), "virtual_seconds": machine.clock.now, "outcomes": outcomes}
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, "asl_local.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    stuck = [e.name for e in machine.executions.values() if e.status == "RUNNING"]
+    if stuck:
+        print(f"{len(stuck)} executions never finished, e.g. {stuck[:3]}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Cold-start benchmark for every Lambda handler in the repo.
+
+Each handler is measured in fresh interpreters (``python -X importtime``) so
+module caches never leak between runs. For every handler the report holds:
+
+* import time of the handler module, with a per-module breakdown,
+* latency of the first invocation (lazy clients, pool, secret cache),
+* steady-state invocation latency over ``--invocations`` warm calls.
+
+AWS and PostgreSQL are replaced by the local stubs in ``stubs.py``. The JSON
+report is stable enough to diff between commits; ``--baseline`` compares
+against an earlier report and exits non-zero on regressions.
+
+    python benchmarks/cold_start.py --output-dir bench-out
+    python benchmarks/cold_start.py --baseline bench-out/cold_start.json --threshold 25
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+RDS2 = os.path.join(ROOT, "stepfunctions-poc-rds-2", "src")
+RDS2_LAYER = os.path.join(RDS2, "psycopg2-layer", "python")
+SAMTEST = os.path.join(ROOT, "samtest", "sam-app")
+
+_SQS_BODY = json.dumps({"taskId": "task-1", "assessorEmail": "assessor@example.com", "title": "Midterm QP",
+                        "taskToken": "A" * 400})
+_SQS_EVENT = {"Records": [{"messageId": "m-1", "body": _SQS_BODY}]}
+_CREATE_EVENT = {"body": json.dumps({"title": "Midterm QP", "content": "Set A, Physics",
+                                     "assessorEmail": "assessor@example.com"})}
+_DECISION_EVENT = {"pathParameters": {"taskId": "task-1"}, "body": json.dumps({"decision": "APPROVE", "comments": "ok"})}
+_FINALIZE_EVENT = {"taskId": "task-1", "decision": "APPROVE", "comments": "ok"}
+
+# name -> (code dir, extra sys.path entries, module, handler, event)
+HANDLERS = {
+    "orders_api.createorder": (os.path.join(ROOT, "orders-api", "orders_api"), [], "createorder", "lambda_handler",
+                               {"body": json.dumps({"id": 1, "item": "book", "qty": 2, "price": 12.5})}),
+    "orders_api.readorder": (os.path.join(ROOT, "orders-api", "orders_api"), [], "readorder", "lambda_handler",
+                             {"pathParameters": {"id": "1"}}),
+    "rds2.assessor_inbox": (os.path.join(RDS2, "assessor_inbox"), [RDS2_LAYER], "app", "lambda_handler",
+                            {"pathParameters": {"email": "assessor@example.com"}, "queryStringParameters": None}),
+    "rds2.bulk_create": (os.path.join(RDS2, "bulk_create"), [RDS2_LAYER], "app", "lambda_handler",
+                         {"body": json.dumps({"requests": [{"title": "Midterm QP", "assessorEmail": "assessor@example.com"}] * 20})}),
+    "rds2.callback_consumer": (os.path.join(RDS2, "callback_consumer"), [RDS2_LAYER], "app", "lambda_handler", _SQS_EVENT),
+    "rds2.create_request": (os.path.join(RDS2, "create_request"), [RDS2_LAYER], "app", "lambda_handler", _CREATE_EVENT),
+    "rds2.finalize": (os.path.join(RDS2, "finalize"), [RDS2_LAYER], "app", "lambda_handler", _FINALIZE_EVENT),
+    "rds2.resume_workflow": (os.path.join(RDS2, "resume_workflow"), [RDS2_LAYER], "app", "lambda_handler", _DECISION_EVENT),
+    "rds2.task_stats": (os.path.join(RDS2, "task_stats"), [RDS2_LAYER], "app", "lambda_handler",
+                        {"queryStringParameters": {"assessor": "assessor@example.com"}}),
+    "rds2.reconcile_counts": (os.path.join(RDS2, "reconcile_counts"), [RDS2_LAYER], "app", "lambda_handler",
+                              {"lookbackDays": 7}),
+    "rds2.archive_tasks": (os.path.join(RDS2, "archive_tasks"), [RDS2_LAYER], "app", "lambda_handler",
+                           {"batchSize": 100}),
+    "rds2.partition_manager": (os.path.join(RDS2, "partition_manager"), [RDS2_LAYER], "app", "lambda_handler", {}),
+    "rds2.start_execution": (os.path.join(RDS2, "start_execution"), [RDS2_LAYER], "app", "handler", _CREATE_EVENT),
+    "samtest.callback_consumer": (os.path.join(SAMTEST, "callback_consumer"), [], "app", "lambda_handler", _SQS_EVENT),
+    "samtest.finalize": (os.path.join(SAMTEST, "finalize"), [], "app", "lambda_handler", _FINALIZE_EVENT),
+    "samtest.hello_world": (os.path.join(SAMTEST, "hello_world"), [], "app", "lambda_handler", _CREATE_EVENT),
+    "samtest.resume_workflow": (os.path.join(SAMTEST, "resume_workflow"), [], "app", "lambda_handler", _DECISION_EVENT),
+    "sns_lambda.patient_checkout": (os.path.join(ROOT, "sns-lambda", "patient_checkout"), [], "patientchckout",
+                                    "lambda_handler", {"body": "{}"}),
+}
+
+# Runs inside the fresh interpreter. Import markers on stderr bound the
+# -X importtime lines that belong to the handler module itself.
+_DRIVER = r"""
+import json, os, sys, time
+spec = json.loads(sys.argv[1])
+sys.path[:0] = spec["paths"]
+
+class Context:
+    function_name = spec["name"]
+    aws_request_id = "bench"
+    memory_limit_in_mb = 256
+    def get_remaining_time_in_millis(self): return 15000
+
+sys.stderr.write("BENCH-IMPORT-START\n"); sys.stderr.flush()
+t0 = time.perf_counter()
+module = __import__(spec["module"])
+import_ms = (time.perf_counter() - t0) * 1000
+sys.stderr.write("BENCH-IMPORT-END\n"); sys.stderr.flush()
+
+import stubs
+stubs.install()
+handler = getattr(module, spec["handler"])
+devnull = open(os.devnull, "w")
+real_stdout, sys.stdout = sys.stdout, devnull
+
+def invoke():
+    t = time.perf_counter()
+    result = handler(json.loads(spec["event"]), Context())
+    return (time.perf_counter() - t) * 1000, result
+
+first_ms, first_result = invoke()
+steady = [invoke()[0] for _ in range(spec["invocations"])]
+sys.stdout = real_stdout
+with open(spec["out"], "w") as f:
+    json.dump({"import_ms": import_ms, "first_invoke_ms": first_ms, "steady_ms": steady,
+               "first_result": repr(first_result)[:300]}, f)
+"""
+
+
+def _parse_importtime(stderr: str, top: int):
+    rows, inside = [], False
+    for line in stderr.splitlines():
+        if line == "BENCH-IMPORT-START":
+            inside = True
+        elif line == "BENCH-IMPORT-END":
+            break
+        elif inside and line.startswith("import time:") and "|" in line:
+            parts = [p.strip() for p in line[len("import time:"):].split("|")]
+            if parts[0].isdigit():
+                rows.append({"module": parts[2].strip(), "self_us": int(parts[0]), "cumulative_us": int(parts[1])})
+    rows.sort(key=lambda r: r["cumulative_us"], reverse=True)
+    return rows[:top], len(rows)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run_once(name, invocations, top):
+    code_dir, extra, module, handler, event = HANDLERS[name]
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+        out = tmp.name
+    spec = {"name": name, "paths": [code_dir] + extra + [BENCH_DIR], "module": module, "handler": handler,
+            "event": json.dumps(event), "invocations": invocations, "out": out}
+    from stubs import FAKE_ENV
+    env = dict(os.environ, **FAKE_ENV, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _DRIVER, json.dumps(spec)],
+                          capture_output=True, text=True, env=env, cwd=code_dir)
+    try:
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"}
+        with open(out) as f:
+            result = json.load(f)
+    finally:
+        os.unlink(out)
+    result["imports"], result["modules_imported"] = _parse_importtime(proc.stderr, top)
+    return result
+
+
+def run(names, repeat, invocations, top):
+    report = {"python": sys.version.split()[0], "repeat": repeat, "invocations": invocations, "handlers": {}}
+    for name in names:
+        runs = [run_once(name, invocations, top) for _ in range(repeat)]
+        errors = [r["error"] for r in runs if "error" in r]
+        if errors:
+            report["handlers"][name] = {"error": errors[0]}
+            continue
+        steady = [ms for r in runs for ms in r["steady_ms"]]
+        median_run = sorted(runs, key=lambda r: r["import_ms"])[len(runs) // 2]
+        report["handlers"][name] = {
+            "import_ms": round(statistics.median(r["import_ms"] for r in runs), 3),
+            "first_invoke_ms": round(statistics.median(r["first_invoke_ms"] for r in runs), 3),
+            "steady_p50_ms": round(_percentile(steady, 50), 3),
+            "steady_p95_ms": round(_percentile(steady, 95), 3),
+            "modules_imported": median_run["modules_imported"],
+            "top_imports": median_run["imports"],
+        }
+    return report
+
+
+def to_markdown(report):
+    lines = [f"# Cold-start report (Python {report['python']}, {report['repeat']} fresh interpreters, "
+             f"{report['invocations']} warm invocations)", "",
+             "| handler | import ms | first invoke ms | steady p50 ms | steady p95 ms | modules |",
+             "|---|---:|---:|---:|---:|---:|"]
+    for name, r in report["handlers"].items():
+        if "error" in r:
+            lines.append(f"| {name} | error: {r['error']} | | | | |")
+        else:
+            lines.append(f"| {name} | {r['import_ms']:.1f} | {r['first_invoke_ms']:.1f} | {r['steady_p50_ms']:.3f} "
+                         f"| {r['steady_p95_ms']:.3f} | {r['modules_imported']} |")
+    for name, r in report["handlers"].items():
+        if r.get("top_imports"):
+            lines += ["", f"## {name}: slowest imports", "", "| module | cumulative ms | self ms |", "|---|---:|---:|"]
+            lines += [f"| {i['module']} | {i['cumulative_us'] / 1000:.1f} | {i['self_us'] / 1000:.1f} |"
+                      for i in r["top_imports"]]
+    return "\n".join(lines) + "\n"
+
+
+METRICS = ("import_ms", "first_invoke_ms", "steady_p50_ms")
+
+
+def compare(baseline, current, threshold_pct, min_ms=1.0):
+    """Return (handler, metric, old, new) for every metric that got worse by more than threshold_pct."""
+    regressions = []
+    for name, new in current["handlers"].items():
+        old = baseline.get("handlers", {}).get(name)
+        if not old or "error" in old or "error" in new:
+            continue
+        for metric in METRICS:
+            if new[metric] - old[metric] > max(min_ms, old[metric] * threshold_pct / 100.0):
+                regressions.append((name, metric, old[metric], new[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("handlers", nargs="*", help=f"subset of: {', '.join(HANDLERS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per handler")
+    parser.add_argument("--invocations", type=int, default=50, help="warm invocations per interpreter")
+    parser.add_argument("--top", type=int, default=15, help="modules listed in the import breakdown")
+    parser.add_argument("--output-dir", default=".", help="where cold_start.json/.md are written")
+    parser.add_argument("--baseline", help="earlier cold_start.json to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    unknown = [h for h in args.handlers if h not in HANDLERS]
+    if unknown:
+        parser.error(f"unknown handler(s): {', '.join(unknown)}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    sys.path.insert(0, BENCH_DIR)
+    report = run(args.handlers or list(HANDLERS), args.repeat, args.invocations, args.top)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, "cold_start.json"), "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    markdown = to_markdown(report)
+    with open(os.path.join(args.output_dir, "cold_start.md"), "w") as f:
+        f.write(markdown)
+    print(markdown)
+
+    if baseline is not None:
+        regressions = compare(baseline, report, args.threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old:.3f} -> {new:.3f} ms")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Microbenchmark: orders API item (de)serialization paths.
+
+Compares, on synthetic nested orders of growing size:
+
+* read:  boto3 ``TypeDeserializer`` + ``json.dumps(default=decimal_to_str)``
+         (the previous resource-based readorder path) vs ``ddb_json.item_to_json``
+* write: boto3 ``TypeSerializer`` vs ``ddb_json.to_item``
+
+    python benchmarks/ddb_serialization.py --lines 10 100 1000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "orders-api", "orders_api"))
+
+import ddb_json  # noqa: E402
+
+
+def decimal_to_str(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def make_order(lines, seed=7):
+    rnd = random.Random(seed)
+    return {
+        "id": 123456,
+        "customer": {"name": "Ada Lovelace", "email": "ada@example.com",
+                     "address": {"street": "1 Analytical Way", "city": "London", "zip": "N1 9GU"}},
+        "status": "NEW",
+        "paid": True,
+        "total": Decimal("%.2f" % rnd.uniform(10, 10000)),
+        "lines": [{"sku": f"SKU-{i:06d}", "qty": rnd.randint(1, 20), "price": Decimal("%.2f" % rnd.uniform(1, 500)),
+                   "attrs": {"color": rnd.choice(["red", "green", "blue"]), "weight": Decimal("%.3f" % rnd.random())},
+                   "notes": None}
+                  for i in range(lines)],
+    }
+
+
+def bench(fn, number):
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    return best / number * 1e6   # microseconds per call
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=[10, 100, 1000], help="order line counts")
+    parser.add_argument("--number", type=int, default=0, help="calls per timing (default: auto)")
+    args = parser.parse_args(argv)
+
+    try:
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+    except ImportError:
+        TypeDeserializer = TypeSerializer = None
+        print("boto3 not installed: only the ddb_json path is measured\n")
+
+    print("| lines | read: resource+decimal_to_str us | read: item_to_json us | speedup "
+          "| write: TypeSerializer us | write: to_item us | speedup |")
+    print("|---:|---:|---:|---:|---:|---:|---:|")
+    for lines in args.lines:
+        order = make_order(lines)
+        item = ddb_json.to_item(order)
+        number = args.number or max(1, 20000 // (lines + 10))
+        assert json.loads(ddb_json.item_to_json(item), parse_float=Decimal) == order
+
+        fast_read = bench(lambda: ddb_json.item_to_json(item), number)
+        fast_write = bench(lambda: ddb_json.to_item(order), number)
+        if TypeDeserializer is not None:
+            deserialize, serialize = TypeDeserializer().deserialize, TypeSerializer().serialize
+            old_read = bench(lambda: json.dumps({k: deserialize(v) for k, v in item.items()}, default=decimal_to_str),
+                             number)
+            old_write = bench(lambda: {k: serialize(v) for k, v in order.items()}, number)
+            print(f"| {lines} | {old_read:.1f} | {fast_read:.1f} | {old_read / fast_read:.1f}x "
+                  f"| {old_write:.1f} | {fast_write:.1f} | {old_write / fast_write:.1f}x |")
+        else:
+            print(f"| {lines} | - | {fast_read:.1f} | - | - | {fast_write:.1f} | - |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""EXPLAIN (ANALYZE, BUFFERS) benchmark for the approval workflow's SQL.
+
+Loads ``--rows`` synthetic approval tasks into a scratch schema of a local
+PostgreSQL, then times every statement the stepfunctions-poc-rds-2 handlers
+issue, plus the access patterns the indexes are meant for, twice:
+
+* before: the original index set (``task_token`` + ``question_id`` btrees)
+* after:  every script in ``db/migrations/`` applied, in order
+
+Writes run inside a transaction that is rolled back, so every repetition
+sees the same data. Needs ``psycopg2`` and a database you may create a
+schema in; nothing outside ``--schema`` is touched.
+
+    python benchmarks/explain_queries.py --dsn "host=127.0.0.1 dbname=appdb user=appuser" --rows 2000000
+"""
+import argparse
+import datetime as dt
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_DIR = os.path.join(ROOT, "stepfunctions-poc-rds-2", "db")
+SCHEMA_SQL = os.path.join(DB_DIR, "schema.sql")
+MIGRATIONS = sorted(glob.glob(os.path.join(DB_DIR, "migrations", "*.sql")))
+
+BEFORE_INDEXES = [
+    "CREATE INDEX idx_approval_tasks_token ON approval_tasks(task_token)",
+    "CREATE INDEX idx_approval_tasks_qid ON approval_tasks(question_id)",
+]
+LOAD_CHUNK = 500_000
+
+
+def _statements(path):
+    """Split a SQL file into statements. Comments are dropped; ';' only ends a statement outside $$ bodies."""
+    text = "\n".join(line.split("--", 1)[0] for line in open(path))
+    statements, current = [], []
+    for i, part in enumerate(text.split("$$")):
+        if i % 2:   # inside a dollar-quoted body
+            current.append("$$" + part + "$$")
+            continue
+        pieces = part.split(";")
+        current.append(pieces[0])
+        for piece in pieces[1:]:
+            statements.append("".join(current).strip())
+            current = [piece]
+    statements.append("".join(current).strip())
+    return [s for s in statements if s]
+
+
+def _now():
+    return dt.datetime.utcnow()
+
+
+def setup(conn, schema, rows, pending_fraction, assessors, hot_share=0.0):
+    """Create the tables in ``schema`` and load ``rows`` tasks; ``hot_share`` of them go to hot@example.com."""
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"SET search_path TO {schema}")
+        for stmt in _statements(SCHEMA_SQL):
+            if stmt.upper().startswith("CREATE TABLE"):
+                cur.execute(stmt)
+        cur.execute("SELECT setseed(0.42)")
+        started = time.monotonic()
+        for lo in range(1, rows + 1, LOAD_CHUNK):
+            hi = min(rows, lo + LOAD_CHUNK - 1)
+            cur.execute("""
+                INSERT INTO questions (question_id, title, content, created_at)
+                SELECT uuid_in(md5('q' || i)::cstring)::text, 'Question ' || i, 'Synthetic content',
+                       now() - (i %% 525600) * interval '1 minute'
+                FROM generate_series(%s, %s) AS i
+            """, (lo, hi))
+            cur.execute("""
+                INSERT INTO approval_tasks (task_id, question_id, assessor_email, status, task_token,
+                                            created_at, updated_at)
+                SELECT uuid_in(md5('t' || i)::cstring)::text, uuid_in(md5('q' || i)::cstring)::text,
+                       CASE WHEN hot THEN 'hot@example.com' ELSE 'assessor' || (i %% %s) || '@example.com' END,
+                       CASE WHEN pending THEN 'PENDING'
+                            ELSE (ARRAY['APPROVED','REJECTED','TIMED_OUT','FAILED'])[1 + i %% 4] END,
+                       CASE WHEN pending THEN repeat(md5(i::text), 24) END,   -- ~770 chars, like a real token
+                       created, created
+                FROM (SELECT i, random() < %s AS pending, random() < %s AS hot,
+                             now() - (i %% 525600) * interval '1 minute' AS created
+                      FROM generate_series(%s, %s) AS i) s
+            """, (assessors, pending_fraction, hot_share, lo, hi))
+            print(f"  loaded {hi:,} rows ({time.monotonic() - started:.0f}s)", file=sys.stderr)
+
+
+def apply_migrations(conn):
+    """Run every migration in order; CONCURRENTLY needs each statement in its own autocommit transaction."""
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for path in MIGRATIONS:
+            for stmt in _statements(path):
+                cur.execute(stmt)
+
+
+def sample_params(cur, assessors):
+    cur.execute("SELECT task_id, task_token FROM approval_tasks WHERE status='PENDING' AND task_token IS NOT NULL "
+                "ORDER BY task_id LIMIT 60")
+    pending = cur.fetchall()
+    if len(pending) < 60:
+        raise SystemExit("not enough pending rows; raise --rows or --pending-fraction")
+    return {"task_id": pending[0][0], "token": pending[0][1], "bulk_ids": [r[0] for r in pending[:50]],
+            "callback": pending[50:60], "assessor": f"assessor{assessors // 2}@example.com",
+            "inbox_after": dt.datetime(1970, 1, 1)}
+
+
+def workload(p):
+    """(name, kind, sql, params): kind is 'handler' for statements the code issues, 'pattern' for index targets."""
+    qid = str(uuid.uuid4())
+    return [
+        ("create_request.insert_question", "handler",
+         "INSERT INTO questions (question_id,title,content,created_at) VALUES (%s,%s,%s,%s)",
+         (qid, "Bench", "Synthetic", _now())),
+        ("create_request.insert_task", "handler",
+         "INSERT INTO approval_tasks (task_id,question_id,assessor_email,status,created_at,updated_at) "
+         "VALUES (%s,%s,%s,%s,%s,%s)",
+         (str(uuid.uuid4()), p["task_id_question"], p["assessor"], "PENDING", _now(), _now())),
+        ("callback_consumer.store_tokens", "handler", None, None),   # VALUES list is mogrified per run, see run_one
+        ("resume_workflow.claim", "handler", """
+            UPDATE approval_tasks AS t SET task_token=NULL, updated_at=%s
+            FROM (SELECT task_id, task_token FROM approval_tasks
+                  WHERE task_id=%s AND status='PENDING' AND task_token IS NOT NULL FOR UPDATE) AS old
+            WHERE t.task_id=old.task_id
+            RETURNING old.task_token""", (_now(), p["task_id"])),
+        ("resume_workflow.restore", "handler",
+         "UPDATE approval_tasks SET task_token=%s, updated_at=%s "
+         "WHERE task_id=%s AND status='PENDING' AND task_token IS NULL", (p["token"], _now(), p["task_id"])),
+        ("resume_workflow.claim_many", "handler", """
+            UPDATE approval_tasks AS t SET task_token=NULL, updated_at=%s
+            FROM (SELECT task_id, task_token FROM approval_tasks
+                  WHERE task_id = ANY(%s) AND status='PENDING' AND task_token IS NOT NULL
+                  ORDER BY task_id FOR UPDATE) AS old
+            WHERE t.task_id=old.task_id
+            RETURNING old.task_id, old.task_token""", (_now(), p["bulk_ids"])),
+        ("finalize.update", "handler",
+         "UPDATE approval_tasks SET status=%s, comments=%s, updated_at=%s, task_token=NULL WHERE task_id=%s",
+         ("APPROVED", "ok", _now(), p["task_id"])),
+        ("pattern.assessor_inbox", "pattern",
+         "SELECT t.task_id, t.question_id, q.title, t.status, t.comments, t.created_at, t.updated_at "
+         "FROM approval_tasks t JOIN questions q ON q.question_id = t.question_id "
+         "WHERE t.assessor_email=%s AND t.status='PENDING' AND (t.created_at, t.task_id) > (%s, %s) "
+         "ORDER BY t.created_at, t.task_id LIMIT 26", (p["assessor"], p["inbox_after"], "")),
+        ("pattern.oldest_pending", "pattern",
+         "SELECT task_id, created_at FROM approval_tasks WHERE status='PENDING' "
+         "ORDER BY created_at, task_id LIMIT 500", None),
+        ("pattern.archive_candidates", "pattern",
+         "SELECT task_id FROM approval_tasks WHERE status <> 'PENDING' AND updated_at < now() - interval '90 days' "
+         "ORDER BY updated_at LIMIT 500 FOR UPDATE SKIP LOCKED", None),
+    ]
+
+
+def _indexes_used(plan, found=None):
+    found = [] if found is None else found
+    if "Index Name" in plan:
+        found.append(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        _indexes_used(child, found)
+    return found
+
+
+def run_one(conn, name, sql, params, p, repeat):
+    timings, last = [], None
+    for _ in range(repeat):
+        with conn.cursor() as cur:
+            if name == "callback_consumer.store_tokens":
+                values = b",".join(cur.mogrify("(%s,%s,%s::timestamp)", (tid, tok, _now()))
+                                   for tid, tok in p["callback"]).decode()
+                sql = ("UPDATE approval_tasks AS t SET task_token=v.token, updated_at=v.ts "
+                       f"FROM (VALUES {values}) AS v(task_id, token, ts) "
+                       "WHERE t.task_id=v.task_id RETURNING t.task_id")
+                params = None
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+            last = cur.fetchone()[0][0]
+        conn.rollback()
+        timings.append(last["Execution Time"])
+    plan = last["Plan"]
+    return {
+        "execution_ms": round(statistics.median(timings), 3),
+        "planning_ms": round(last["Planning Time"], 3),
+        "shared_hit": plan.get("Shared Hit Blocks", 0),
+        "shared_read": plan.get("Shared Read Blocks", 0),
+        "shared_dirtied": plan.get("Shared Dirtied Blocks", 0),
+        "node": plan["Node Type"],
+        "indexes": sorted(set(_indexes_used(plan))),
+    }
+
+
+def measure(conn, schema, p, repeat):
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE approval_tasks")
+        cur.execute("ANALYZE questions")
+        cur.execute("SELECT indexrelname, pg_relation_size(indexrelid) FROM pg_stat_user_indexes "
+                    "WHERE schemaname=%s AND relname='approval_tasks' ORDER BY 1", (schema,))
+        sizes = dict(cur.fetchall())
+    conn.commit()
+    results = {}
+    for name, kind, sql, params in workload(p):
+        results[name] = dict(run_one(conn, name, sql, params, p, repeat), kind=kind)
+        print(f"  {name}: {results[name]['execution_ms']} ms", file=sys.stderr)
+    return {"statements": results, "index_bytes": sizes}
+
+
+def markdown(report):
+    before, after = report["before"]["statements"], report["after"]["statements"]
+    out = [f"# EXPLAIN benchmark ({report['config']['rows']:,} approval tasks)", "",
+           "| statement | kind | before ms | after ms | before buffers | after buffers | after indexes |",
+           "|---|---|---:|---:|---:|---:|---|"]
+    for name, b in before.items():
+        a = after[name]
+        out.append(f"| {name} | {b['kind']} | {b['execution_ms']} | {a['execution_ms']} "
+                   f"| {b['shared_hit'] + b['shared_read']} | {a['shared_hit'] + a['shared_read']} "
+                   f"| {', '.join(a['indexes']) or a['node']} |")
+    out += ["", "| index | before MB | after MB |", "|---|---:|---:|"]
+    names = sorted(set(report["before"]["index_bytes"]) | set(report["after"]["index_bytes"]))
+    for name in names:
+        mb = [report[phase]["index_bytes"].get(name) for phase in ("before", "after")]
+        out.append("| " + name + " | " + " | ".join("-" if v is None else f"{v / 2**20:.1f}" for v in mb) + " |")
+    return "\n".join(out) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_PG_DSN", "host=127.0.0.1 dbname=postgres"))
+    parser.add_argument("--schema", default="bench_approvals", help="scratch schema, dropped and recreated")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="approval tasks to load")
+    parser.add_argument("--pending-fraction", type=float, default=0.05)
+    parser.add_argument("--assessors", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per statement; the median is reported")
+    parser.add_argument("--output-dir", default="bench-out")
+    parser.add_argument("--keep", action="store_true", help="leave the scratch schema in place")
+    args = parser.parse_args(argv)
+
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+    print(f"loading {args.rows:,} rows into {args.schema}", file=sys.stderr)
+    setup(conn, args.schema, args.rows, args.pending_fraction, args.assessors)
+    with conn.cursor() as cur:
+        for stmt in BEFORE_INDEXES:
+            cur.execute(stmt)
+        p = sample_params(cur, args.assessors)
+        cur.execute("SELECT question_id FROM approval_tasks WHERE task_id=%s", (p["task_id"],))
+        p["task_id_question"] = cur.fetchone()[0]
+
+    report = {"config": vars(args)}
+    conn.autocommit = False
+    print("before:", file=sys.stderr)
+    report["before"] = measure(conn, args.schema, p, args.repeat)
+
+    apply_migrations(conn)
+    conn.autocommit = False
+    print("after:", file=sys.stderr)
+    report["after"] = measure(conn, args.schema, p, args.repeat)
+
+    if not args.keep:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {args.schema} CASCADE")
+    conn.close()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, "explain_queries.json"), "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    md = markdown(report)
+    with open(os.path.join(args.output_dir, "explain_queries.md"), "w") as f:
+        f.write(md)
+    print(md)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""CPU and allocation micro-benchmark for every handler's request/response work.
+
+I/O is mocked by ``stubs.py``, so what is left per invocation is the
+handler's own processing: parsing API Gateway and SQS bodies, building
+emails, serialising responses. Each handler runs in its own interpreter
+(``app.py`` module names collide across functions) under three payloads:
+
+* small:         the minimum a valid request carries
+* typical:       sizes seen in normal use
+* pathological:  large ``content``/comments, deeply nested orders, full batches
+
+For every (handler, payload) the report holds median and p95 CPU time per
+invocation (``time.process_time``, so worker threads count) and, from a
+separate ``tracemalloc`` pass, peak and retained allocation per invocation.
+The timed invocations run in ``--repeats`` rounds, with a fixed pure-Python
+calibration loop before the first and after every round, in the same
+interpreter. ``cpu_units`` is the fastest round's median over the fastest
+calibration, and is what the baseline comparison uses: a baseline recorded on
+one machine stays meaningful on another, and a burst of load on a shared
+runner slows a round or a calibration without reading as a regression.
+
+    python benchmarks/handler_cpu.py                      # compare with baselines/handler_cpu.json
+    python benchmarks/handler_cpu.py --update-baseline    # after an intended change
+    python benchmarks/handler_cpu.py rds2.callback_consumer --threshold 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from cold_start import HANDLERS  # noqa: E402
+
+BASELINE = os.path.join(BENCH_DIR, "baselines", "handler_cpu.json")
+TOKEN = "A" * 700
+
+
+def _api(body):
+    return {"routeKey": "POST /", "headers": {"content-type": "application/json"}, "body": json.dumps(body)}
+
+
+def _request(content_chars):
+    return {"title": "Midterm QP", "content": ("Set A, Physics ∑ " * (content_chars // 16 + 1))[:content_chars],
+            "assessorEmail": "assessor@example.com"}
+
+
+def _sqs(records, title_chars=20, double_encoded=True):
+    def body(i):
+        payload = json.dumps({"taskId": f"task-{i}", "assessorEmail": f"a{i}@example.com",
+                              "title": ("Q" * title_chars), "taskToken": TOKEN})
+        return json.dumps(payload) if double_encoded else payload   # States.JsonToString double-encodes
+    return {"Records": [{"messageId": f"m-{i}", "body": body(i)} for i in range(records)]}
+
+
+def _decision(comment_chars):
+    return {"pathParameters": {"taskId": "task-1"},
+            "body": json.dumps({"decision": "APPROVE", "comments": "c" * comment_chars})}
+
+
+def _nested(depth):
+    node = {"leaf": True}
+    for i in range(depth):
+        node = {"level": i, "child": node, "tags": ["a", "b"]}
+    return node
+
+
+def _order(lines, depth=2):
+    return {"id": 1, "customer": {"name": "Ada", "email": "ada@example.com"}, "status": "NEW",
+            "lines": [{"sku": f"SKU-{i:06d}", "qty": i % 7 + 1, "price": 12.5, "attrs": _nested(depth)}
+                      for i in range(lines)]}
+
+
+_CREATE = {"small": {"body": json.dumps({"title": "Q", "assessorEmail": "a@example.com"})},
+           "typical": _api(_request(2_000)), "pathological": _api(_request(1_000_000))}
+_CALLBACK = {"small": _sqs(1), "typical": _sqs(10), "pathological": _sqs(50, title_chars=2_000)}
+_RESUME = {"small": _decision(0), "typical": _decision(500), "pathological": _decision(256_000)}
+_FINALIZE = {"small": {"taskId": "task-1", "decision": "APPROVE"},
+             "typical": {"taskId": "task-1", "decision": "REJECT", "comments": "r" * 500},
+             "pathological": {"taskId": "task-1", "decision": "REJECT", "comments": "r" * 256_000}}
+
+# handler name (as in cold_start.HANDLERS) -> {payload name: event}
+PAYLOADS = {
+    "orders_api.createorder": {"small": _api({"id": 1, "item": "book", "qty": 2, "price": 12.5}),
+                               "typical": _api(_order(20)), "pathological": _api(_order(2_000, depth=30))},
+    "orders_api.readorder": {"small": {"pathParameters": {"id": "1"}}},
+    "rds2.assessor_inbox": {"small": {"pathParameters": {"email": "assessor@example.com"}, "queryStringParameters": None},
+                            "typical": {"pathParameters": {"email": "assessor@example.com"},
+                                        "queryStringParameters": {"status": "PENDING", "limit": "100"}}},
+    "rds2.bulk_create": {"small": _api({"requests": [_request(100)]}),
+                         "typical": _api({"requests": [_request(2_000)] * 50}),
+                         "pathological": _api({"requests": [_request(20_000)] * 1_000})},
+    "rds2.callback_consumer": _CALLBACK,
+    "rds2.create_request": _CREATE,
+    "rds2.finalize": _FINALIZE,
+    "rds2.resume_workflow": dict(_RESUME, pathological_bulk={
+        "routeKey": "POST /requests/decisions",
+        "body": json.dumps({"decisions": [{"taskId": f"task-{i}", "decision": "APPROVE", "comments": "c" * 1_000}
+                                          for i in range(200)]})}),
+    "rds2.task_stats": {"small": {"queryStringParameters": {"assessor": "assessor@example.com"}}},
+    "rds2.reconcile_counts": {"small": {"lookbackDays": 7}},
+    "rds2.archive_tasks": {"small": {"batchSize": 100}},
+    "rds2.partition_manager": {"small": {}},
+    "rds2.start_execution": _CREATE,
+    "samtest.callback_consumer": _CALLBACK,
+    "samtest.finalize": _FINALIZE,
+    "samtest.hello_world": _CREATE,
+    "samtest.resume_workflow": {k: dict(v, queryStringParameters={"decision": "approve"}) for k, v in _RESUME.items()},
+    "sns_lambda.patient_checkout": {"small": {"body": "{}"}, "typical": {"body": json.dumps(_order(20))},
+                                    "pathological": {"body": json.dumps(_order(2_000, depth=30))}},
+}
+
+# Runs inside a fresh interpreter per handler; the spec arrives in a file
+# because pathological events are larger than one argv string may be.
+_DRIVER = r"""
+import json, os, statistics, sys, time, tracemalloc
+with open(sys.argv[1]) as f:
+    spec = json.load(f)
+sys.path[:0] = spec["paths"]
+module = __import__(spec["module"])
+import stubs
+stubs.install()
+handler = getattr(module, spec["handler"])
+real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+
+def calibrate(rounds=3):
+    # Median microseconds of a fixed json + dict + string workload: the unit cpu_units are stored in.
+    doc = {"items": [{"id": i, "name": f"item-{i}", "tags": ["x", "y"], "price": i * 1.5} for i in range(200)]}
+    samples = []
+    for _ in range(rounds):
+        t = time.process_time_ns()
+        for _ in range(20):
+            text = json.dumps(doc)
+            data = json.loads(text)
+            "".join(f"{item['name']}:{item['price']}\n" for item in data["items"])
+        samples.append((time.process_time_ns() - t) / 1000 / 20)
+    return statistics.median(samples)
+
+class Context:
+    function_name = spec["name"]
+    aws_request_id = "bench"
+    memory_limit_in_mb = 256
+    def get_remaining_time_in_millis(self): return 15000
+
+results = {}
+for name, event in spec["payloads"].items():
+    # Fewer invocations for multi-megabyte events; each call gets a fresh copy decoded outside the timed region.
+    count = max(10, min(spec["invocations"], spec["invocations"] * 65536 // len(event)))
+    per_round = max(3, count // spec["repeats"])
+    for _ in range(spec["warmup"]):
+        handler(json.loads(event), Context())
+    cpu, medians, units = [], [], [calibrate()]
+    for _ in range(spec["repeats"]):
+        timed = []
+        for _ in range(per_round):
+            e = json.loads(event)
+            t = time.process_time_ns()
+            handler(e, Context())
+            timed.append((time.process_time_ns() - t) / 1000)
+        units.append(calibrate())
+        medians.append(statistics.median(timed))
+        cpu.extend(timed)
+    # Best of the rounds on both sides: load on a shared runner only ever makes either one slower.
+    cpu_us_p50, unit = min(medians), min(units)
+    peak, retained = [], []
+    tracemalloc.start()
+    for _ in range(spec["alloc_invocations"]):
+        e = json.loads(event)
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        handler(e, Context())
+        current, top = tracemalloc.get_traced_memory()
+        peak.append(top - before)
+        retained.append(current - before)
+    tracemalloc.stop()
+    cpu.sort()
+    results[name] = {"cpu_units": cpu_us_p50 / unit, "cpu_us_p50": cpu_us_p50, "calibration_us": unit,
+                     "cpu_us_p95": cpu[min(len(cpu) - 1, int(len(cpu) * 0.95))],
+                     "peak_kb": statistics.median(peak) / 1024, "retained_kb": statistics.median(retained) / 1024,
+                     "event_kb": len(event) / 1024}
+sys.stdout = real_stdout
+with open(spec["out"], "w") as f:
+    json.dump(results, f)
+"""
+
+
+def run_handler(name, warmup, invocations, repeats, alloc_invocations):
+    code_dir, extra, module, handler, _ = HANDLERS[name]
+    payloads = {k: json.dumps(v) for k, v in PAYLOADS[name].items()}
+    with tempfile.TemporaryDirectory() as tmp:
+        spec_path, out = os.path.join(tmp, "spec.json"), os.path.join(tmp, "out.json")
+        with open(spec_path, "w") as f:
+            json.dump({"name": name, "paths": [code_dir] + extra + [BENCH_DIR], "module": module, "handler": handler,
+                       "payloads": payloads, "warmup": warmup, "invocations": invocations,
+                       "repeats": repeats, "alloc_invocations": alloc_invocations, "out": out}, f)
+        from stubs import FAKE_ENV
+        env = dict(os.environ, **FAKE_ENV, PYTHONDONTWRITEBYTECODE="1", LOG_LEVEL="INFO")
+        proc = subprocess.run([sys.executable, "-c", _DRIVER, spec_path], capture_output=True, text=True,
+                              env=env, cwd=code_dir)
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"}
+        with open(out) as f:
+            return json.load(f)
+
+
+def run(names, warmup, invocations, repeats, alloc_invocations):
+    report = {"python": sys.version.split()[0], "invocations": invocations, "repeats": repeats, "handlers": {}}
+    for name in names:
+        result = run_handler(name, warmup, invocations, repeats, alloc_invocations)
+        if "error" not in result:
+            for r in result.values():
+                for key in ("cpu_us_p50", "cpu_us_p95", "calibration_us", "peak_kb", "retained_kb", "event_kb",
+                            "cpu_units"):
+                    r[key] = round(r[key], 3 if key != "cpu_units" else 5)
+        report["handlers"][name] = result
+    return report
+
+
+def to_markdown(report):
+    lines = [f"# Handler CPU report (Python {report['python']}, {report['invocations']} invocations "
+             f"in {report['repeats']} rounds)", "",
+             "| handler | payload | event KB | CPU p50 us | CPU p95 us | calibration us | units | peak KB | retained KB |",
+             "|---|---|---:|---:|---:|---:|---:|---:|---:|"]
+    for name, result in report["handlers"].items():
+        if "error" in result:
+            lines.append(f"| {name} | error: {result['error']} | | | | | | | |")
+            continue
+        for payload, r in result.items():
+            lines.append(f"| {name} | {payload} | {r['event_kb']:.1f} | {r['cpu_us_p50']:.1f} | {r['cpu_us_p95']:.1f} "
+                         f"| {r['calibration_us']:.1f} | {r['cpu_units']:.3f} | {r['peak_kb']:.1f} "
+                         f"| {r['retained_kb']:.1f} |")
+    return "\n".join(lines) + "\n"
+
+
+# metric -> absolute change below which a relative regression is ignored (noise floor). Handlers
+# under ~0.2 units swing by up to ~0.1 between runs on a shared runner even with best-of-N.
+METRICS = {"cpu_units": 0.15, "peak_kb": 4.0}
+
+
+def compare(baseline, current, threshold_pct):
+    """Return (handler, payload, metric, old, new) for every metric that got worse by more than threshold_pct."""
+    regressions = []
+    for name, result in current["handlers"].items():
+        old_result = baseline.get("handlers", {}).get(name)
+        if not old_result or "error" in old_result or "error" in result:
+            continue
+        for payload, new in result.items():
+            old = old_result.get(payload)
+            if not old:
+                continue
+            for metric, floor in METRICS.items():
+                if new[metric] - old[metric] > max(floor, old[metric] * threshold_pct / 100.0):
+                    regressions.append((name, payload, metric, old[metric], new[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("handlers", nargs="*", help=f"subset of: {', '.join(PAYLOADS)}")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--invocations", type=int, default=200, help="timed invocations per payload")
+    parser.add_argument("--repeats", type=int, default=5, help="rounds the timed invocations are split into")
+    parser.add_argument("--alloc-invocations", type=int, default=20, help="tracemalloc invocations per payload")
+    parser.add_argument("--output-dir", default="bench-out")
+    parser.add_argument("--baseline", default=BASELINE, help="report to compare against")
+    parser.add_argument("--no-baseline-ok", action="store_true", help="exit 0 instead of 1 when the baseline is missing")
+    parser.add_argument("--threshold", type=float, default=25.0, help="regression threshold in percent")
+    parser.add_argument("--update-baseline", action="store_true", help=f"write this run to {os.path.relpath(BASELINE)}")
+    args = parser.parse_args(argv)
+
+    unknown = [h for h in args.handlers if h not in PAYLOADS]
+    if unknown:
+        parser.error(f"unknown handler(s): {', '.join(unknown)}")
+    report = run(args.handlers or list(PAYLOADS), args.warmup, args.invocations, args.repeats,
+                 args.alloc_invocations)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, "handler_cpu.json"), "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    markdown = to_markdown(report)
+    with open(os.path.join(args.output_dir, "handler_cpu.md"), "w") as f:
+        f.write(markdown)
+    print(markdown)
+
+    failed = [name for name, result in report["handlers"].items() if "error" in result]
+    if args.update_baseline:
+        if failed:
+            print(f"not updating the baseline: {', '.join(failed)} failed to run", file=sys.stderr)
+            return 1
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                previous = json.load(f).get("handlers", {})
+        report["handlers"] = dict(previous, **report["handlers"])
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to record one", file=sys.stderr)
+        return 0 if args.no_baseline_ok else 1
+    with open(args.baseline) as f:
+        regressions = compare(json.load(f), report, args.threshold)
+    for name, payload, metric, old, new in regressions:
+        print(f"REGRESSION {name} [{payload}] {metric}: {old:.3f} -> {new:.3f}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
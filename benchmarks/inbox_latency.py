@@ -0,0 +1,113 @@
+"""Latency test for the assessor inbox (GET /assessors/{email}/tasks) at scale.
+
+Loads ``--rows`` tasks (default 1M) with ``--hot-share`` of them owned by one
+assessor, applies the migrations, then walks that assessor's whole PENDING
+inbox with the handler's own keyset query (``assessor_inbox.app.fetch_page``)
+and times every page. The same depths are also fetched with OFFSET for
+comparison. Exits 1 if the keyset p95 exceeds ``--max-p95-ms``.
+
+    python benchmarks/inbox_latency.py --dsn "host=127.0.0.1 dbname=appdb user=appuser" --rows 2000000
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+RDS2 = os.path.join(ROOT, "stepfunctions-poc-rds-2", "src")
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(RDS2, "psycopg2-layer", "python"))
+
+import explain_queries  # noqa: E402
+
+HOT = "hot@example.com"
+
+
+def _load_inbox():
+    spec = importlib.util.spec_from_file_location("assessor_inbox_app", os.path.join(RDS2, "assessor_inbox", "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _ms(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {"n": len(samples), "p50": round(statistics.median(samples), 3),
+            "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3), "max": round(samples[-1], 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_PG_DSN", "host=127.0.0.1 dbname=postgres"))
+    parser.add_argument("--schema", default="bench_inbox")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--hot-share", type=float, default=0.2, help="fraction of tasks owned by the walked assessor")
+    parser.add_argument("--pending-fraction", type=float, default=0.05)
+    parser.add_argument("--limit", type=int, default=25, help="page size")
+    parser.add_argument("--reuse", action="store_true", help="keep an already loaded --schema instead of reloading")
+    parser.add_argument("--max-p95-ms", type=float, default=20.0)
+    parser.add_argument("--output-dir", default="bench-out")
+    args = parser.parse_args(argv)
+
+    inbox = _load_inbox()
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+    if args.reuse:
+        with conn.cursor() as cur:
+            cur.execute(f"SET search_path TO {args.schema}")
+    else:
+        explain_queries.setup(conn, args.schema, args.rows, args.pending_fraction, 1000, args.hot_share)
+        explain_queries.apply_migrations(conn)
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE approval_tasks")
+        cur.execute("ANALYZE questions")
+
+    keyset, by_depth, cursor, page = [], {}, None, 0
+    with conn.cursor() as cur:
+        while True:
+            elapsed, (tasks, cursor) = _ms(lambda: inbox.fetch_page(cur, HOT, "PENDING", args.limit, cursor))
+            keyset.append(elapsed)
+            by_depth[page] = elapsed
+            page += 1
+            if cursor is None:
+                break
+        depths = sorted({0, page // 10, page // 2, page - 1})
+        offset = {}
+        for depth in depths:
+            sql = inbox.PAGE_SQL.replace("LIMIT %s", "LIMIT %s OFFSET %s")
+            runs = [_ms(lambda: (cur.execute(sql, (HOT, "PENDING", inbox._EPOCH, "", inbox._EPOCH, args.limit, depth * args.limit)),
+                                 cur.fetchall()))[0] for _ in range(5)]
+            offset[depth] = statistics.median(runs)
+    conn.close()
+
+    report = {"config": vars(args), "pages": page, "keyset": _summary(keyset),
+              "by_depth": {d: {"keyset_ms": round(by_depth[d], 3), "offset_ms": round(offset[d], 3)} for d in depths}}
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, "inbox_latency.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    k = report["keyset"]
+    print(f"{page} pages of {args.limit}: keyset p50 {k['p50']} ms, p95 {k['p95']} ms, max {k['max']} ms")
+    print("| page | keyset ms | OFFSET ms |\n|---:|---:|---:|")
+    for d, row in report["by_depth"].items():
+        print(f"| {d} | {row['keyset_ms']} | {row['offset_ms']} |")
+    if k["p95"] > args.max_p95_ms:
+        print(f"FAIL: keyset p95 {k['p95']} ms > {args.max_p95_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
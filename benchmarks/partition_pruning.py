@@ -0,0 +1,192 @@
+"""Handler queries on the unpartitioned and the monthly-partitioned layout.
+
+Loads the same ``--rows`` synthetic tasks (a year of ``created_at``) into two
+scratch schemas of a local PostgreSQL and applies ``db/migrations/`` to both.
+The second is then converted in place by the ``partition_manager`` function's
+own online migration (``migrate`` in ``--chunk`` row chunks, then ``swap``),
+which is timed too. Every statement below is the handler's own SQL constant,
+run under ``EXPLAIN (ANALYZE, BUFFERS)`` in a transaction that is rolled back.
+For each layout the report gives the median execution time, buffers, and how
+many partitions of each table the plan touched versus how many exist.
+
+    python benchmarks/partition_pruning.py --dsn "host=127.0.0.1 dbname=appdb user=appuser" --rows 2000000
+"""
+import argparse
+import datetime as dt
+import importlib.util
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+import psycopg2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+RDS2 = os.path.join(ROOT, "stepfunctions-poc-rds-2", "src")
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(RDS2, "psycopg2-layer", "python"))
+
+import explain_queries  # noqa: E402
+
+PARTITION = re.compile(r"^(approval_tasks|questions)_y\d{4}m\d{2}$")
+LAYOUTS = ("unpartitioned", "partitioned")
+
+
+def _load(function):
+    spec = importlib.util.spec_from_file_location(f"{function}_app", os.path.join(RDS2, function, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def workload(handlers, p):
+    """(name, sql, params): what each handler runs per request or per batch."""
+    inbox, archive, reconcile = handlers["assessor_inbox"], handlers["archive_tasks"], handlers["reconcile_counts"]
+    first = inbox._EPOCH - dt.timedelta(days=1)
+    today = dt.datetime.utcnow().date()
+    return [
+        ("assessor_inbox.first_page", inbox.PAGE_SQL, (p["assessor"], "PENDING", first, "", first, 26)),
+        ("assessor_inbox.last_week", inbox.PAGE_SQL, (p["assessor"], "APPROVED", p["week_ago"], "", p["week_ago"], 26)),
+        ("create_request.precreated", "SELECT question_id FROM approval_tasks WHERE task_id=%s", (p["task_id"],)),
+        ("finalize.update",
+         "UPDATE approval_tasks SET status=%s, comments=%s, updated_at=%s, task_token=NULL WHERE task_id=%s",
+         ("APPROVED", "ok", dt.datetime.utcnow(), p["task_id"])),
+        ("resume_workflow.claim", """
+            UPDATE approval_tasks AS t SET task_token=NULL, updated_at=%s
+            FROM (SELECT task_id, task_token FROM approval_tasks
+                  WHERE task_id=%s AND status='PENDING' AND task_token IS NOT NULL FOR UPDATE) AS old
+            WHERE t.task_id=old.task_id
+            RETURNING old.task_token""", (dt.datetime.utcnow(), p["task_id"])),
+        ("reconcile_counts.week", reconcile.RECONCILE_SQL, {"lo": today - dt.timedelta(days=7), "hi": today}),
+        ("archive_tasks.batch", archive.MOVE_TASKS_SQL,
+         {"cutoff": dt.datetime.utcnow() - dt.timedelta(days=90), "limit": 500}),
+    ]
+
+
+def _walk(plan, found):
+    name = plan.get("Relation Name")
+    if name:
+        found["relations"].add(name)
+    found["removed"] += plan.get("Subplans Removed", 0)
+    for child in plan.get("Plans", []):
+        _walk(child, found)
+    return found
+
+
+def run_one(conn, sql, params, repeat):
+    timings, last = [], None
+    for _ in range(repeat):
+        with conn.cursor() as cur:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+            last = cur.fetchone()[0][0]
+        conn.rollback()
+        timings.append(last["Execution Time"])
+    plan = last["Plan"]
+    found = _walk(plan, {"relations": set(), "removed": 0})
+    return {
+        "execution_ms": round(statistics.median(timings), 3),
+        "planning_ms": round(last["Planning Time"], 3),
+        "buffers": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+        "task_partitions": sum(1 for r in found["relations"] if PARTITION.match(r) and r.startswith("approval_tasks")),
+        "question_partitions": sum(1 for r in found["relations"] if PARTITION.match(r) and r.startswith("questions")),
+        "subplans_removed": found["removed"],
+    }
+
+
+def measure(conn, handlers, p, repeat):
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE approval_tasks")
+        cur.execute("ANALYZE questions")
+        cur.execute("SELECT count(*) FROM pg_inherits WHERE inhparent = to_regclass('approval_tasks')")
+        partitions = cur.fetchone()[0]
+    conn.commit()
+    results = {}
+    for name, sql, params in workload(handlers, p):
+        results[name] = run_one(conn, sql, params, repeat)
+        print(f"  {name}: {results[name]['execution_ms']} ms, "
+              f"{results[name]['task_partitions']}/{partitions} task partitions", file=sys.stderr)
+    return {"partitions": partitions, "statements": results}
+
+
+def convert(conn, manager, chunk):
+    """Run the online migration to completion and swap; returns its timings."""
+    started = time.monotonic()
+    conn.autocommit = False
+    manager.migrate(conn, dt.datetime.utcnow().date(), chunk, lambda: True)
+    copied = time.monotonic()
+    manager.swap(conn)
+    swapped = time.monotonic()
+    return {"copy_s": round(copied - started, 2), "swap_ms": round((swapped - copied) * 1000, 1)}
+
+
+def markdown(report):
+    un, pa = report["unpartitioned"], report["partitioned"]
+    m = report["migration"]
+    out = [f"# Partition pruning ({report['config']['rows']:,} approval tasks, {pa['partitions']} monthly partitions)", "",
+           f"Online migration: copy {m['copy_s']} s in {report['config']['chunk']:,}-row chunks, "
+           f"swap {m['swap_ms']} ms.", "",
+           "| statement | unpartitioned ms | partitioned ms | unpartitioned buffers | partitioned buffers "
+           "| task partitions scanned | question partitions scanned |",
+           "|---|---:|---:|---:|---:|---:|---:|"]
+    for name, u in un["statements"].items():
+        p = pa["statements"][name]
+        out.append(f"| {name} | {u['execution_ms']} | {p['execution_ms']} | {u['buffers']} | {p['buffers']} "
+                   f"| {p['task_partitions']}/{pa['partitions']} | {p['question_partitions']}/{pa['partitions']} |")
+    return "\n".join(out) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_PG_DSN", "host=127.0.0.1 dbname=postgres"))
+    parser.add_argument("--schema", default="bench_partitions", help="prefix of the two scratch schemas")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="approval tasks to load")
+    parser.add_argument("--pending-fraction", type=float, default=0.05)
+    parser.add_argument("--assessors", type=int, default=1000)
+    parser.add_argument("--chunk", type=int, default=5000, help="rows per migration chunk")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per statement; the median is reported")
+    parser.add_argument("--output-dir", default="bench-out")
+    parser.add_argument("--keep", action="store_true", help="leave the scratch schemas in place")
+    args = parser.parse_args(argv)
+
+    handlers = {name: _load(name) for name in ("assessor_inbox", "archive_tasks", "reconcile_counts", "partition_manager")}
+    conn = psycopg2.connect(args.dsn)
+    report = {"config": vars(args)}
+    p = None
+    for layout in LAYOUTS:
+        schema = f"{args.schema}_{layout}"
+        conn.autocommit = True
+        print(f"loading {args.rows:,} rows into {schema}", file=sys.stderr)
+        explain_queries.setup(conn, schema, args.rows, args.pending_fraction, args.assessors)
+        explain_queries.apply_migrations(conn)
+        if p is None:
+            with conn.cursor() as cur:
+                p = explain_queries.sample_params(cur, args.assessors)
+            p["week_ago"] = dt.datetime.utcnow() - dt.timedelta(days=7)
+        if layout == "partitioned":
+            print("migrating to partitions", file=sys.stderr)
+            report["migration"] = convert(conn, handlers["partition_manager"], args.chunk)
+        conn.autocommit = False
+        print(f"{layout}:", file=sys.stderr)
+        report[layout] = measure(conn, handlers, p, args.repeat)
+
+    if not args.keep:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for layout in LAYOUTS:
+                cur.execute(f"DROP SCHEMA {args.schema}_{layout} CASCADE")
+    conn.close()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, "partition_pruning.json"), "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    md = markdown(report)
+    with open(os.path.join(args.output_dir, "partition_pruning.md"), "w") as f:
+        f.write(md)
+    print(md)
+
+
+if __name__ == "__main__":
+    main()
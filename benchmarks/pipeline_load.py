@@ -0,0 +1,363 @@
+"""End-to-end load test of the rds-2 approval pipeline against a real PostgreSQL.
+
+Every stage runs the real handler code: ``create_request`` (first state of
+the workflow) -> SQS -> ``callback_consumer`` (stores the token, notifies the
+assessor) -> ``resume_workflow`` (the assessor's decision) -> ``finalize``.
+Step Functions is the in-process interpreter from ``asl_local.py`` running
+the deployed definition; SQS is an in-memory queue read in batches by
+consumer threads; SNS and Secrets Manager are the fakes from ``stubs.py``.
+Only PostgreSQL is real: ``db/schema.sql`` is loaded into ``--schema``.
+
+Tasks arrive at ``--rate`` per second (0 = as fast as possible) and each
+stage gets ``--concurrency`` worker threads. The report gives throughput,
+p50/p95/p99 per stage and per SQL statement, and how many DB connections
+were opened, so pool, batching and caching changes can be compared.
+
+    python benchmarks/pipeline_load.py --dsn "host=127.0.0.1 dbname=appdb user=appuser" --tasks 5000 --rate 200
+"""
+import argparse
+import collections
+import importlib.util
+import itertools
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+RDS2 = os.path.join(ROOT, "stepfunctions-poc-rds-2")
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(RDS2, "src", "psycopg2-layer", "python"))
+
+import psycopg2  # noqa: E402
+import psycopg2.extensions  # noqa: E402
+from botocore.exceptions import ClientError  # noqa: E402
+
+import asl_local  # noqa: E402
+import explain_queries  # noqa: E402
+import stubs  # noqa: E402
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ROWS = re.compile(r"(\([^()]*\)(?:::\w+)?)(?:\s*,\s*\([^()]*\)(?:::\w+)?)+")
+_TASK_ID = re.compile(r"Task ID: (\S+)")
+REAL_CONNECT = psycopg2.connect   # stubs.install() replaces psycopg2.connect with its fake
+
+
+class Recorder:
+    """Thread-safe latency samples (ms) by group and name, plus plain counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = collections.defaultdict(lambda: collections.defaultdict(list))
+        self.counters = collections.Counter()
+
+    def add(self, group, name, ms):
+        with self._lock:
+            self.samples[group][name].append(ms)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def timed(self, group, name, fn):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(group, name, (time.perf_counter() - started) * 1000)
+        return wrapper
+
+
+def summary(samples):
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(len(samples) * q))], 3)
+    return {"n": len(samples), "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99),
+            "max": round(samples[-1], 3), "total_ms": round(sum(samples), 1)}
+
+
+def statement_key(sql, params):
+    """One key per statement shape: parameterised SQL as written, or execute_values output with rows folded."""
+    text = sql.decode() if isinstance(sql, bytes) else sql
+    if params is None:
+        text = _ROWS.sub(r"\1, ...", _LITERAL.sub("?", text))
+    return " ".join(text.split())
+
+
+def instrument_psycopg2(recorder, dsn, schema):
+    """Route every handler connection to ``dsn``/``schema`` and time each statement."""
+    class TimedCursor(psycopg2.extensions.cursor):
+        def execute(self, sql, params=None):
+            started = time.perf_counter()
+            try:
+                return super().execute(sql, params)
+            finally:
+                recorder.add("sql", statement_key(sql, params), (time.perf_counter() - started) * 1000)
+
+    class TimedConnection(psycopg2.extensions.connection):
+        def cursor(self, *args, **kwargs):
+            kwargs.setdefault("cursor_factory", TimedCursor)
+            return super().cursor(*args, **kwargs)
+
+    def connect(*_args, **_kwargs):
+        recorder.count("db_connections_opened")
+        started = time.perf_counter()
+        conn = REAL_CONNECT(dsn, connection_factory=TimedConnection, options=f"-c search_path={schema}")
+        recorder.add("stage", "db_connect", (time.perf_counter() - started) * 1000)
+        return conn
+
+    psycopg2.connect = connect
+
+
+def load_schema(dsn, schema):
+    conn = REAL_CONNECT(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"SET search_path TO {schema}")
+        for stmt in explain_queries._statements(explain_queries.SCHEMA_SQL):
+            cur.execute(stmt)
+    conn.close()
+
+
+def load_handler(function):
+    spec = importlib.util.spec_from_file_location(f"{function}_app", os.path.join(RDS2, "src", function, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.lambda_handler
+
+
+class Pipeline:
+    def __init__(self, args, recorder):
+        self.args, self.rec = args, recorder
+        self.rng = random.Random(args.seed)
+        self.sqs = queue.Queue()          # (body, enqueued_at)
+        self.inbox = queue.Queue()        # (task_id, notified_at) for the assessors
+        self.sfn = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="sfn")
+        self.arrivals = {}                # task_id -> arrival time
+        self.done = threading.Semaphore(0)
+        self.stopping = threading.Event()
+        self._local = threading.local()
+        self._messages = itertools.count()
+
+        timed = lambda name, fn: recorder.timed("stage", name, fn)
+        self.create = timed("create_request", load_handler("create_request"))
+        self.finalize = timed("finalize", load_handler("finalize"))
+        self.consume = timed("callback_consumer_batch", load_handler("callback_consumer"))
+        self.resume = timed("resume_workflow", load_handler("resume_workflow"))
+        self.machine = asl_local.LocalStateMachine.from_file(
+            os.path.join(RDS2, "statemachine", "approval_workflow.asl.json"),
+            substitutions={"CreateRequestArn": "create_request", "FinalizeArn": "finalize", "QueueUrl": "approvals"},
+            functions={"create_request": self._create, "finalize": self._finalize},
+            queues={"approvals": lambda body: self.sqs.put((body, time.perf_counter()))})
+        self._aws_response = stubs._aws_response
+        stubs._aws_response = self._aws
+
+    # -- Step Functions and SNS stand-ins
+
+    def _create(self, event, context):
+        result = self.create(event, context)
+        self.arrivals[result["taskId"]] = self._local.arrival
+        self._local.task_id = result["taskId"]
+        return result
+
+    def _finalize(self, event, context):
+        result = self.finalize(event, context)
+        arrival = self.arrivals.pop(event.get("taskId"), None)
+        if arrival is not None:
+            self.rec.add("stage", "end_to_end", (time.perf_counter() - arrival) * 1000)
+            self.rec.count(f"finalized_{result.get('statusSet')}")
+            self.done.release()
+        return result
+
+    def _aws(self, operation, params):
+        if operation in ("SendTaskSuccess", "SendTaskFailure"):
+            token = params["taskToken"]
+            if token not in self.machine._waiting:
+                raise ClientError({"Error": {"Code": "TaskDoesNotExist", "Message": "unknown token"}}, operation)
+            submitted = time.perf_counter()
+
+            def resume():
+                self.rec.add("stage", "sfn_resume_wait", (time.perf_counter() - submitted) * 1000)
+                if operation == "SendTaskSuccess":
+                    self.machine.send_task_success(token, params["output"])
+                else:
+                    self.machine.send_task_failure(token, params.get("error"), params.get("cause"))
+            self.sfn.submit(self._guard, resume)
+            return {}
+        if operation in ("PublishBatch", "Publish"):
+            entries = params.get("PublishBatchRequestEntries") or [params]
+            for entry in entries:
+                found = _TASK_ID.search(entry.get("Message", ""))
+                if found:
+                    self.inbox.put((found.group(1), time.perf_counter()))
+        return self._aws_response(operation, params)
+
+    def _guard(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:   # keep the worker alive; the task shows up as unfinished
+            self.rec.count(f"error_{type(e).__name__}")
+
+    # -- workers
+
+    def _start(self, i, arrival):
+        self.rec.add("stage", "start_wait", (time.perf_counter() - arrival) * 1000)
+        self._local.arrival, self._local.task_id = arrival, None
+        execution = self.machine.start({"title": f"Paper {i}", "content": "Set A, Physics",
+                                        "assessorEmail": f"assessor{i % self.args.assessors}@example.com"},
+                                       name=f"approval-{i}")
+        if execution.status == "FAILED":
+            self.rec.count(f"execution_failed_{execution.error}")
+        if self._local.task_id is None or execution.status == "FAILED":
+            self.done.release()   # never reaches a finalize we can attribute; do not wait for it
+
+    def _consumer(self):
+        window = self.args.batch_window_ms / 1000
+        while not self.stopping.is_set():
+            try:
+                batch = [self.sqs.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            deadline = time.perf_counter() + window
+            while len(batch) < self.args.batch_size:
+                try:
+                    batch.append(self.sqs.get(timeout=max(0.0, deadline - time.perf_counter())))
+                except queue.Empty:
+                    break
+            now = time.perf_counter()
+            records = []
+            for body, enqueued in batch:
+                self.rec.add("stage", "queue_wait", (now - enqueued) * 1000)
+                records.append({"messageId": f"m-{next(self._messages)}", "body": body})
+            self.rec.add("batch", "callback_consumer_batch_size", len(batch))
+            try:
+                result = self.consume({"Records": records}, asl_local.LambdaContext("callback_consumer"))
+            except Exception as e:
+                self.rec.count(f"error_{type(e).__name__}")
+                result = {"batchItemFailures": [{"itemIdentifier": r["messageId"]} for r in records]}
+            failed = {f["itemIdentifier"] for f in (result or {}).get("batchItemFailures", [])}
+            for record in records:
+                if record["messageId"] in failed:
+                    self.rec.count("sqs_redeliveries")
+                    self.sqs.put((record["body"], time.perf_counter()))
+
+    def _assessor(self):
+        while not self.stopping.is_set():
+            try:
+                task_id, notified = self.inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if self.args.think_ms:
+                time.sleep(self.args.think_ms / 1000)
+            self.rec.add("stage", "notify_to_decision", (time.perf_counter() - notified) * 1000)
+            decision = "REJECT" if self.rng.random() < self.args.reject_share else "APPROVE"
+            event = {"routeKey": "POST /requests/{taskId}/decision", "pathParameters": {"taskId": task_id},
+                     "body": json.dumps({"decision": decision, "comments": "load test"})}
+            try:
+                result = self.resume(event, asl_local.LambdaContext("resume_workflow"))
+                self.rec.count(f"resume_http_{result['statusCode']}")
+            except Exception as e:
+                self.rec.count(f"error_{type(e).__name__}")
+
+    def run(self):
+        threads = [threading.Thread(target=self._consumer, daemon=True) for _ in range(self.args.concurrency)]
+        threads += [threading.Thread(target=self._assessor, daemon=True) for _ in range(self.args.concurrency)]
+        for t in threads:
+            t.start()
+        started = time.perf_counter()
+        interval = 1.0 / self.args.rate if self.args.rate else 0.0
+        for i in range(self.args.tasks):
+            due = started + i * interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.sfn.submit(self._guard, self._start, i, max(due, started))
+        deadline = time.perf_counter() + self.args.timeout
+        finished = 0
+        while finished < self.args.tasks and self.done.acquire(timeout=max(0.0, deadline - time.perf_counter())):
+            finished += 1
+        elapsed = time.perf_counter() - started
+        self.stopping.set()
+        self.sfn.shutdown(wait=False, cancel_futures=True)
+        return finished, elapsed
+
+
+def markdown(report):
+    out = [f"# Approval pipeline load test ({report['finished']:,}/{report['config']['tasks']:,} tasks)", "",
+           f"{report['throughput_per_second']} tasks/s over {report['seconds']} s, "
+           f"{report['counters'].get('db_connections_opened', 0)} DB connections opened", "",
+           "| stage | n | p50 ms | p95 ms | p99 ms | max ms |", "|---|---:|---:|---:|---:|---:|"]
+    for name, s in report["stages"].items():
+        out.append(f"| {name} | {s['n']} | {s['p50']} | {s['p95']} | {s['p99']} | {s['max']} |")
+    out += ["", "| SQL | n | p50 ms | p95 ms | p99 ms | total ms |", "|---|---:|---:|---:|---:|---:|"]
+    for sql, s in report["sql"].items():
+        short = sql if len(sql) <= 110 else sql[:107] + "..."
+        out.append(f"| `{short.replace('|', '/')}` | {s['n']} | {s['p50']} | {s['p95']} | {s['p99']} | {s['total_ms']} |")
+    out += ["", "| counter | value |", "|---|---:|"]
+    out += [f"| {k} | {v} |" for k, v in sorted(report["counters"].items())]
+    return "\n".join(out) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_PG_DSN", "host=127.0.0.1 dbname=postgres"))
+    parser.add_argument("--schema", default="bench_pipeline")
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=100.0, help="arrivals per second; 0 submits all at once")
+    parser.add_argument("--concurrency", type=int, default=8, help="worker threads per stage")
+    parser.add_argument("--pool-size", type=int, default=None, help="DB_POOL_MAX_SIZE for the shared handler pool")
+    parser.add_argument("--batch-size", type=int, default=50, help="SQS BatchSize for callback_consumer")
+    parser.add_argument("--batch-window-ms", type=float, default=20.0, help="MaximumBatchingWindow, scaled down")
+    parser.add_argument("--assessors", type=int, default=200, help="distinct assessor emails")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="assessor delay before deciding")
+    parser.add_argument("--reject-share", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds to wait for every task to finish")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output-dir", default="bench-out")
+    args = parser.parse_args(argv)
+
+    stubs.install()
+    if args.pool_size:
+        os.environ["DB_POOL_MAX_SIZE"] = str(args.pool_size)
+    load_schema(args.dsn, args.schema)
+    recorder = Recorder()
+    instrument_psycopg2(recorder, args.dsn, args.schema)
+    pipeline = Pipeline(args, recorder)
+    finished, elapsed = pipeline.run()
+
+    from common import db_helper
+    report = {
+        "config": vars(args),
+        "finished": finished,
+        "seconds": round(elapsed, 3),
+        "throughput_per_second": round(finished / elapsed, 1) if elapsed else 0.0,
+        "stages": {k: summary(v) for k, v in sorted(recorder.samples["stage"].items())},
+        "sql": dict(sorted(((k, summary(v)) for k, v in recorder.samples["sql"].items()),
+                           key=lambda kv: -kv[1]["total_ms"])),
+        "batch_sizes": {k: {q: v for q, v in summary(sizes).items() if q != "total_ms"}
+                        for k, sizes in recorder.samples["batch"].items()},
+        "counters": dict(recorder.counters),
+        "pool": db_helper.pool_stats(),
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, "pipeline_load.json"), "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    with open(os.path.join(args.output_dir, "pipeline_load.md"), "w") as f:
+        f.write(markdown(report))
+    print(markdown(report))
+    if finished < args.tasks:
+        print(f"{args.tasks - finished} tasks did not finish within {args.timeout}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
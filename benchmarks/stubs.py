@@ -0,0 +1,164 @@
+"""Local stand-ins for PostgreSQL and AWS APIs used by the benchmark tools.
+
+``install()`` patches ``psycopg2.connect`` and botocore's ``_make_api_call`` so
+handlers run their real code paths (client construction, pooling, request
+building, serialization) without touching the network.
+"""
+import datetime as dt
+import json
+import os
+
+TOKEN = "A" * 400   # long and valid base64, like a real task token
+
+FAKE_ENV = {
+    "AWS_REGION": "us-east-1",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_EC2_METADATA_DISABLED": "true",
+    "DB_SECRET_ARN": "arn:aws:secretsmanager:us-east-1:123456789012:secret:bench",
+    "DB_HOST": "localhost",
+    "DB_NAME": "appdb",
+    "SNS_TOPIC_ARN": "arn:aws:sns:us-east-1:123456789012:bench",
+    "STATE_MACHINE_ARN": "arn:aws:states:us-east-1:123456789012:stateMachine:bench",
+    "ORDER_TABLE": "orders-bench",
+}
+
+_T0 = dt.datetime(2025, 1, 1, 9, 0, 0)
+# Result shapes for queries whose rows are more than one token column: (SQL fragment, rows).
+CANNED = [
+    ("FROM APPROVAL_TASKS T JOIN QUESTIONS", [("task-1", "question-1", "Midterm QP", "PENDING", None, _T0, _T0)]),
+    ("FROM APPROVAL_TASK_COUNTS WHERE DAY BETWEEN", [(_T0.date(), "PENDING", 3), (_T0.date(), "APPROVED", 5)]),
+    ("WITH ACTUAL AS", [(0, 0)]),
+    ("WITH PICKED AS", [(0, None)]),
+    ("FROM PG_PARTITIONED_TABLE", [(False,)]),
+]
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self._rows = []
+        self._values = []
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, template, args):
+        self._values.append(args)
+        return b"(" + b",".join(b"%r" % (a,) for a in args) + b")"
+
+    def execute(self, sql, params=None):
+        self.connection.statements += 1
+        text = (sql.decode() if isinstance(sql, bytes) else sql).lstrip().upper()
+        canned = next((rows for fragment, rows in CANNED if fragment in " ".join(text.split())), None)
+        if canned is not None:
+            self._rows = list(canned)
+        elif "RETURNING OLD.TASK_ID, OLD.TASK_TOKEN" in text:
+            # Bulk claim: every requested task is pending and has a token.
+            self._rows = [(task_id, TOKEN) for task_id in params[1]]
+        elif self._values and "RETURNING" in text:
+            # Echo the first column of every VALUES row, as if each one matched.
+            self._rows = [(v[0],) for v in self._values]
+        elif text.startswith("SELECT") or "RETURNING" in text:
+            self._rows = [(TOKEN,)]
+        else:
+            self._rows = []
+        self._values = []
+        self.rowcount = max(1, len(self._rows))
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    encoding = "UTF8"
+
+    def __init__(self, **kwargs):
+        self.closed = 0
+        self.autocommit = False
+        self.statements = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return 0
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+def _aws_response(operation, params):
+    if operation == "GetSecretValue":
+        return {"SecretString": json.dumps({"username": "bench", "password": "bench"})}
+    if operation == "PublishBatch":
+        return {"Successful": [{"Id": e["Id"], "MessageId": e["Id"]} for e in params["PublishBatchRequestEntries"]],
+                "Failed": []}
+    if operation == "Publish":
+        return {"MessageId": "bench"}
+    if operation == "StartExecution":
+        return {"executionArn": params["stateMachineArn"].replace(":stateMachine:", ":execution:") + ":" + params.get("name", "x"),
+                "startDate": dt.datetime(2024, 1, 1)}
+    if operation == "GetItem":
+        return {"Item": dict(params["Key"], status={"S": "NEW"}, total={"N": "12.50"})}
+    if operation == "BatchGetItem":
+        return {"Responses": {t: [dict(k, status={"S": "NEW"}) for k in v["Keys"]] for t, v in params["RequestItems"].items()},
+                "UnprocessedKeys": {}}
+    if operation == "BatchWriteItem":
+        return {"UnprocessedItems": {}}
+    if operation in ("Query", "Scan"):
+        return {"Items": [], "Count": 0, "ScannedCount": 0}
+    return {}
+
+
+def _fake_api_call(self, operation, params):
+    # Fire the parameter/response events so boto3 resources (DynamoDB type
+    # (de)serialization) behave exactly as they would against the real service.
+    service_id = self.meta.service_model.service_id.hyphenize()
+    model = self.meta.service_model.operation_model(operation)
+    context = {}
+    self.meta.events.emit(f"before-parameter-build.{service_id}.{operation}", params=params, model=model, context=context)
+    parsed = _aws_response(operation, params)
+    self.meta.events.emit(f"after-call.{service_id}.{operation}", http_response=None, parsed=parsed, model=model,
+                          context=context)
+    return parsed
+
+
+def install():
+    """Patch psycopg2 and botocore in this interpreter. Safe to call when either is missing."""
+    for key, value in FAKE_ENV.items():
+        os.environ.setdefault(key, value)
+    try:
+        import psycopg2
+        psycopg2.connect = lambda *a, **kw: FakeConnection(**kw)
+    except ImportError:
+        pass
+    try:
+        from botocore.client import BaseClient
+        BaseClient._make_api_call = _fake_api_call
+    except ImportError:
+        pass
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+WRITE_CHUNK = 25   # BatchWriteItem hard limit
+CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+MAX_ATTEMPTS = int(os.environ.get("BATCH_MAX_ATTEMPTS", "8"))
+KEY = "id"
+RETRYABLE = {"ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded",
+             "InternalServerError", "ServiceUnavailable"}
+
+
+def _backoff(attempt):
+    time.sleep(min(5.0, 0.05 * (2 ** attempt)) * random.uniform(0.5, 1.0))
+
+
+def _key(item):
+    return json.dumps(item[KEY], sort_keys=True)
+
+
+def _chunks(seq, size):
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+
+def _write_chunk(client, table_name, chunk, on_throttle=None):
+    """Write up to 25 (index, item) pairs; returns {index: error_code} for items that never landed."""
+    pending = chunk
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            resp = client.batch_write_item(
+                RequestItems={table_name: [{"PutRequest": {"Item": item}} for _, item in pending]})
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code", "Unknown")
+            if code not in RETRYABLE or attempt == MAX_ATTEMPTS - 1:
+                return {i: code for i, _ in pending}
+            if on_throttle: on_throttle()
+            _backoff(attempt)
+            continue
+        unprocessed = resp.get("UnprocessedItems", {}).get(table_name, [])
+        if not unprocessed:
+            return {}
+        if on_throttle: on_throttle()
+        left = {_key(r["PutRequest"]["Item"]) for r in unprocessed}
+        pending = [(i, item) for i, item in pending if _key(item) in left]
+        _backoff(attempt)
+    return {i: "UnprocessedItems" for i, _ in pending}
+
+
+def batch_write_items(client, table_name, items, concurrency=CONCURRENCY, on_throttle=None):
+    """Put DynamoDB-typed items with BatchWriteItem, 25 per call, chunks in parallel.
+
+    ``items`` must already be in AttributeValue form and have unique keys.
+    Returns {index: error_code} for every item that could not be written.
+    """
+    chunks = _chunks(list(enumerate(items)), WRITE_CHUNK)
+    failed = {}
+    if len(chunks) <= 1 or concurrency <= 1:
+        for chunk in chunks:
+            failed.update(_write_chunk(client, table_name, chunk, on_throttle))
+        return failed
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as pool:
+        for part in pool.map(lambda c: _write_chunk(client, table_name, c, on_throttle), chunks):
+            failed.update(part)
+    return failed
+
+
+def _put_if_absent(client, table_name, item):
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            client.put_item(TableName=table_name, Item=item, ConditionExpression="attribute_not_exists(#k)",
+                            ExpressionAttributeNames={"#k": KEY})
+            return None
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code", "Unknown")
+            if code not in RETRYABLE or attempt == MAX_ATTEMPTS - 1:
+                return code
+            _backoff(attempt)
+    return None
+
+
+def put_items_if_absent(client, table_name, items, concurrency=CONCURRENCY):
+    """Create-only counterpart of ``batch_write_items``: one conditional PutItem per item, in parallel.
+
+    BatchWriteItem cannot carry conditions, so this costs one call per item.
+    Items whose key already exists fail with ``ConditionalCheckFailedException``.
+    """
+    if not items:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(items)))) as pool:
+        codes = pool.map(lambda item: _put_if_absent(client, table_name, item), items)
+        return {i: code for i, code in enumerate(codes) if code}
+
+
+READ_CHUNK = 100   # BatchGetItem hard limit
+
+
+def _get_chunk(client, table_name, keys):
+    """Fetch up to 100 keys; returns (items, {key: error_code}) for keys that could not be read."""
+    found = []
+    pending = keys
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            resp = client.batch_get_item(RequestItems={table_name: {"Keys": pending}})
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code", "Unknown")
+            if code not in RETRYABLE or attempt == MAX_ATTEMPTS - 1:
+                return found, {_key(k): code for k in pending}
+            _backoff(attempt)
+            continue
+        found.extend(resp.get("Responses", {}).get(table_name, []))
+        pending = resp.get("UnprocessedKeys", {}).get(table_name, {}).get("Keys", [])
+        if not pending:
+            return found, {}
+        _backoff(attempt)
+    return found, {_key(k): "UnprocessedKeys" for k in pending}
+
+
+def batch_get_items(client, table_name, keys, concurrency=CONCURRENCY):
+    """Read DynamoDB-typed keys with BatchGetItem, 100 per call, chunks in parallel.
+
+    ``keys`` must be unique. Returns ({key: item}, {key: error_code}) where
+    both are indexed by ``_key`` of the key; absent keys simply do not appear.
+    """
+    chunks = _chunks(list(keys), READ_CHUNK)
+    items, failed = {}, {}
+    if len(chunks) <= 1 or concurrency <= 1:
+        parts = [_get_chunk(client, table_name, c) for c in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as pool:
+            parts = list(pool.map(lambda c: _get_chunk(client, table_name, c), chunks))
+    for found, errors in parts:
+        items.update((_key(item), item) for item in found)
+        failed.update(errors)
+    return items, failed
@@ -1,28 +1,123 @@
 import json
-import boto3
 import os
 
+from decimal import Decimal
+
 from botocore.exceptions import ClientError
 
+from aws_clients import get_client
+from batch_ops import batch_write_items, put_items_if_absent
+from ddb_json import to_item
+import idempotency
+import jsonlog
+
+log = jsonlog.get_logger("createorder")
+
+MAX_BATCH_ORDERS = int(os.environ.get("MAX_BATCH_ORDERS", "5000"))
+# Never overwrite an existing order. Per request, "If-None-Match: *" asks for the same.
+CREATE_ONLY = os.environ.get("ORDER_CREATE_ONLY", "false").lower() == "true"
+
 
 # import requests
 
 
+def _validate(order):
+    if not isinstance(order, dict):
+        return "order must be a JSON object"
+    order_id = order.get("id")
+    if isinstance(order_id, bool) or not isinstance(order_id, (int, Decimal)):
+        return "id must be an integer"
+    if isinstance(order_id, Decimal) and (not order_id.is_finite() or order_id != int(order_id)):
+        return "id must be an integer"
+    return None
+
+
+def _create_only(event):
+    return CREATE_ONLY or (idempotency.header(event, "if-none-match") or "").strip() == "*"
+
+
+def create_orders(orders, create_only=False):
+    """Validate and write many orders; returns one result per input order, in order."""
+    results, to_write, seen = [], [], set()
+    for order in orders:
+        order_id = order.get("id") if isinstance(order, dict) else None
+        error = _validate(order)
+        if error is None:
+            try:
+                item = to_item(order)
+            except (TypeError, ArithmeticError) as e:
+                error = str(e)
+        if error is None and int(order_id) in seen:
+            error = "duplicate id in request"
+        if error:
+            results.append({"id": order_id, "status": "failed", "error": error})
+            continue
+        seen.add(int(order_id))
+        results.append({"id": int(order_id), "status": "created"})
+        to_write.append((len(results) - 1, item))
+
+    table_name = os.environ.get('ORDER_TABLE')
+    write = put_items_if_absent if create_only else batch_write_items
+    failed = write(get_client("dynamodb"), table_name, [item for _, item in to_write])
+    for pos, code in failed.items():
+        result = results[to_write[pos][0]]
+        result["status"] = "exists" if code == "ConditionalCheckFailedException" else "failed"
+        result["error"] = code
+    return results
+
+
+def _batch_response(orders, create_only=False):
+    if len(orders) > MAX_BATCH_ORDERS:
+        return {"statusCode": 413,
+                "body": json.dumps({"message": f"at most {MAX_BATCH_ORDERS} orders per request"})}
+    results = create_orders(orders, create_only)
+    failed = sum(1 for r in results if r["status"] != "created")
+    return {
+        "statusCode": 200 if not failed else 207,
+        "body": json.dumps({
+            "message": "Orders processed",
+            "created": len(results) - failed,
+            "failed": failed,
+            "results": results,
+        }, default=str),  # a rejected id is echoed back as sent, which may be a Decimal
+    }
+
+
 def lambda_handler(event, context):
+    jsonlog.start(context)
+    return idempotency.run(event, _create)
+
+
+def _create(event):
     msg = ""
     status_code: 500
+    create_only = _create_only(event)
     try:
-        db = boto3.resource("dynamodb")
-        order = json.loads(event["body"])
+        # NaN and Infinity parse as Decimals too, so to_item can reject them by name.
+        order = json.loads(event["body"], parse_float=Decimal, parse_constant=Decimal)
+        # A JSON array (or {"orders": [...]}) is a bulk request.
+        if isinstance(order, dict) and isinstance(order.get("orders"), list):
+            order = order["orders"]
+        if isinstance(order, list):
+            return _batch_response(order, create_only)
+        try:
+            item = to_item(order)
+        except (TypeError, ArithmeticError) as e:
+            return {"statusCode": 400, "body": json.dumps({"message": str(e)})}
         table_name = os.environ.get('ORDER_TABLE')
-        table = db.Table(table_name)
-        response = table.put_item(TableName=table_name, Item=order)
-        print(response)
+        condition = {"ConditionExpression": "attribute_not_exists(id)"} if create_only else {}
+        get_client("dynamodb").put_item(TableName=table_name, Item=item, **condition)
+        log.debug("order written", orderId=order.get("id"))
         msg = "Order created successfully"
         status_code = 200
     except ClientError as e:
-        status_code = 500
-        print(e)
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            msg = "Order already exists"
+            status_code = 409
+            log.info("order already exists", orderId=order.get("id"))
+        else:
+            status_code = 500
+            log.error("create failed", exc=e)
     return {
         "statusCode": status_code,
         "body": json.dumps({
@@ -0,0 +1,72 @@
+"""Direct conversion between DynamoDB AttributeValue maps and JSON.
+
+The boto3 resource layer turns every attribute into Python objects
+(``Decimal`` for numbers) and ``json.dumps`` then needs a callback per
+number. Here low-level client items go straight to JSON text in one pass:
+``N`` values are copied verbatim, so numbers stay numeric and exact.
+"""
+import base64
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii as _quote
+
+
+def _b64(value):
+    return _quote(base64.b64encode(value if isinstance(value, (bytes, bytearray)) else bytes(value)).decode())
+
+
+def _value(av):
+    (kind, value), = av.items()
+    return _ENCODERS[kind](value)
+
+
+def _map(value):
+    return "{" + ",".join(_quote(k) + ":" + _value(v) for k, v in value.items()) + "}"
+
+
+_ENCODERS = {
+    "S": _quote,
+    "N": str,
+    "BOOL": lambda v: "true" if v else "false",
+    "NULL": lambda v: "null",
+    "M": _map,
+    "L": lambda v: "[" + ",".join(_value(x) for x in v) + "]",
+    "SS": lambda v: "[" + ",".join(_quote(x) for x in v) + "]",
+    "NS": lambda v: "[" + ",".join(v) + "]",
+    "B": _b64,
+    "BS": lambda v: "[" + ",".join(_b64(x) for x in v) + "]",
+}
+
+
+def item_to_json(item: dict) -> str:
+    """Serialize a low-level DynamoDB item (``{"attr": {"N": "1"}, ...}``) to JSON text."""
+    return _map(item)
+
+
+def _number(value):
+    if isinstance(value, Decimal) and not value.is_finite():
+        raise TypeError(f"DynamoDB numbers must be finite, got {value}")
+    return {"N": str(value)}
+
+
+def _to_av(value):
+    encode = _TO_AV.get(type(value))
+    if encode is None:
+        raise TypeError(f"Unsupported type {type(value).__name__} for DynamoDB")
+    return encode(value)
+
+
+_TO_AV = {
+    str: lambda v: {"S": v},
+    bool: lambda v: {"BOOL": v},
+    int: _number,
+    Decimal: _number,
+    type(None): lambda v: {"NULL": True},
+    dict: lambda v: {"M": {k: _to_av(x) for k, x in v.items()}},
+    list: lambda v: {"L": [_to_av(x) for x in v]},
+    bytes: lambda v: {"B": v},
+}
+
+
+def to_item(obj: dict) -> dict:
+    """Convert a JSON object parsed with ``parse_float=Decimal`` into a low-level DynamoDB item."""
+    return {k: _to_av(v) for k, v in obj.items()}
@@ -0,0 +1,50 @@
+"""Export the whole OrdersTable as NDJSON using a parallel segmented Scan.
+
+    python orders_api/export_orders.py --table ORDER_TABLE --segments 8 --rcu-per-second 200 > orders.ndjson
+
+Items are written as they arrive, so memory use does not grow with the
+table. Point ``--endpoint-url`` at DynamoDB Local for testing.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aws_clients import get_client  # noqa: E402
+from listing import export_ndjson, DEFAULT_PAGE_SIZE, SCAN_SEGMENTS, SCAN_RCU_PER_SECOND  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export OrdersTable as NDJSON")
+    parser.add_argument("--table", default=os.environ.get("ORDER_TABLE"), help="table name (default: $ORDER_TABLE)")
+    parser.add_argument("--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("--segments", type=int, default=SCAN_SEGMENTS, help="parallel Scan segments")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="items per Scan call")
+    parser.add_argument("--rcu-per-second", type=float, default=SCAN_RCU_PER_SECOND, help="read budget, 0 = unlimited")
+    parser.add_argument("--endpoint-url", help="e.g. http://localhost:8000 for DynamoDB Local")
+    args = parser.parse_args(argv)
+    if not args.table:
+        parser.error("--table or ORDER_TABLE is required")
+
+    if args.endpoint_url:
+        import boto3
+        client = boto3.client("dynamodb", endpoint_url=args.endpoint_url)
+    else:
+        client = get_client("dynamodb")
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    started = time.monotonic()
+    try:
+        count = export_ndjson(client, args.table, out, segments=args.segments, page_size=args.page_size,
+                              rcu_per_second=args.rcu_per_second)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.monotonic() - started
+    print(f"exported {count} orders in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f}/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import hashlib
+
+from botocore.exceptions import ClientError
+
+from aws_clients import get_client
+
+# Result records for requests carrying an Idempotency-Key. Off unless IDEMPOTENCY_TABLE is set.
+TABLE = os.environ.get("IDEMPOTENCY_TABLE")
+TTL = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IN_PROGRESS_TTL = int(os.environ.get("IDEMPOTENCY_IN_PROGRESS_SECONDS", "60"))
+MAX_KEY_LENGTH = 255
+
+IN_PROGRESS, COMPLETED = "IN_PROGRESS", "COMPLETED"
+
+
+def header(event, name):
+    headers = event.get("headers") or {}
+    return next((v for k, v in headers.items() if k.lower() == name), None)
+
+
+def _error(status_code, message):
+    return {"statusCode": status_code, "body": json.dumps({"message": message})}
+
+
+def _claim(client, key, fingerprint, now):
+    """Conditionally create the IN_PROGRESS record; returns the existing record if someone got there first."""
+    try:
+        client.put_item(
+            TableName=TABLE,
+            Item={"key": {"S": key}, "status": {"S": IN_PROGRESS}, "fingerprint": {"S": fingerprint},
+                  "expires_at": {"N": str(now + TTL)}, "in_progress_until": {"N": str(now + IN_PROGRESS_TTL)}},
+            # Free when absent, past its TTL (TTL deletion lags by hours), or abandoned mid-flight.
+            ConditionExpression="attribute_not_exists(#k) OR expires_at < :now "
+                                "OR (#s = :in_progress AND in_progress_until < :now)",
+            ExpressionAttributeNames={"#k": "key", "#s": "status"},
+            ExpressionAttributeValues={":now": {"N": str(now)}, ":in_progress": {"S": IN_PROGRESS}},
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+        return None
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+        return e.response.get("Item", {})
+
+
+def _complete(client, key, response):
+    client.update_item(
+        TableName=TABLE,
+        Key={"key": {"S": key}},
+        UpdateExpression="SET #s = :completed, status_code = :code, body = :body",
+        ExpressionAttributeNames={"#s": "status"},
+        ExpressionAttributeValues={":completed": {"S": COMPLETED}, ":code": {"N": str(response["statusCode"])},
+                                   ":body": {"S": response.get("body", "")}},
+    )
+
+
+def _release(client, key):
+    client.delete_item(TableName=TABLE, Key={"key": {"S": key}})
+
+
+def run(event, handler):
+    """Run ``handler(event)`` at most once per Idempotency-Key.
+
+    The first request claims the key with a conditional write and stores the
+    status code and body once it finishes; replays with the same key and
+    body get that stored response back without running the handler again.
+    5xx results and exceptions release the key so the client can retry.
+    """
+    key = header(event, "idempotency-key")
+    if not TABLE or key is None:
+        return handler(event)
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return _error(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    client = get_client("dynamodb")
+    fingerprint = hashlib.sha256((event.get("body") or "").encode()).hexdigest()
+    existing = _claim(client, key, fingerprint, int(time.time()))
+    if existing is not None:
+        if existing.get("fingerprint", {}).get("S") != fingerprint:
+            return _error(422, "Idempotency-Key was already used with a different request body")
+        if existing.get("status", {}).get("S") != COMPLETED:
+            return _error(409, "A request with this Idempotency-Key is still in progress")
+        return {"statusCode": int(existing["status_code"]["N"]), "body": existing["body"]["S"],
+                "headers": {"Idempotent-Replayed": "true"}}
+
+    try:
+        response = handler(event)
+    except BaseException:
+        _release(client, key)
+        raise
+    if response["statusCode"] >= 500:
+        _release(client, key)
+    else:
+        _complete(client, key, response)
+    return response
@@ -0,0 +1,266 @@
+"""Resumable bulk import of orders from CSV or NDJSON into OrdersTable.
+
+    python orders_api/import_orders.py orders.ndjson --table ORDER_TABLE --workers 16 --wcu-per-second 1000
+    python orders_api/import_orders.py orders.csv --numeric total,qty --endpoint-url http://localhost:8000
+
+The input is streamed line by line (CSV rows must not contain embedded
+newlines) and written with parallel BatchWriteItem calls of 25 items. A
+checkpoint file next to the input records the byte offset below which
+every row has been written; rerunning the same command resumes from it.
+Rows that cannot be parsed or written are appended to ``--rejects``.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aws_clients import get_client  # noqa: E402
+from batch_ops import WRITE_CHUNK, _write_chunk  # noqa: E402
+from ddb_json import to_item  # noqa: E402
+from rate_limit import CapacityLimiter  # noqa: E402
+
+
+class RowError(ValueError):
+    pass
+
+
+def _ndjson_row(line):
+    try:
+        row = json.loads(line, parse_float=Decimal, parse_constant=Decimal)
+    except ValueError as e:
+        raise RowError(f"invalid JSON: {e}") from e
+    if not isinstance(row, dict):
+        raise RowError("row must be a JSON object")
+    return row
+
+
+def _csv_parser(header, numeric):
+    def parse(line):
+        values = next(csv.reader([line.decode("utf-8")]))
+        if len(values) != len(header):
+            raise RowError(f"expected {len(header)} columns, got {len(values)}")
+        row = {}
+        for name, value in zip(header, values):
+            if value == "":
+                continue
+            if name in numeric:
+                try:
+                    value = Decimal(value)
+                except ArithmeticError as e:
+                    raise RowError(f"{name} is not a number") from e
+                if not value.is_finite():
+                    raise RowError(f"{name} is not a finite number")
+            row[name] = value
+        return row
+    return parse
+
+
+def to_order_item(row):
+    """Validate a parsed row and return its DynamoDB item; the id must be an integer."""
+    try:
+        order_id = int(row["id"])
+    except (KeyError, TypeError, ValueError, ArithmeticError):
+        raise RowError("id must be an integer")
+    if isinstance(row["id"], bool) or Decimal(str(row["id"])) != order_id:
+        raise RowError("id must be an integer")
+    row["id"] = order_id
+    try:
+        return to_item(row)
+    except (TypeError, ArithmeticError) as e:
+        raise RowError(str(e)) from e
+
+
+def _wcu(item):
+    # One write unit per started KB of item; the JSON length is a close, cheap estimate.
+    return max(1, -(-len(json.dumps(item, separators=(",", ":"))) // 1024))
+
+
+class Checkpoint:
+    """Tracks batches that finish out of order; ``offset`` only covers contiguous completed batches."""
+
+    def __init__(self, path, offset=0, rows=0):
+        self.path = path
+        self.offset = offset
+        self.rows = rows
+        self._next = 0           # next batch sequence number that the watermark is waiting for
+        self._done = {}          # seq -> (end_offset, rows)
+        self._lock = threading.Lock()
+
+    def complete(self, seq, end_offset, rows):
+        with self._lock:
+            self._done[seq] = (end_offset, rows)
+            while self._next in self._done:
+                self.offset, done_rows = self._done.pop(self._next)
+                self.rows += done_rows
+                self._next += 1
+
+    def save(self):
+        with self._lock:
+            state = {"offset": self.offset, "rows": self.rows}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path) as f:
+            state = json.load(f)
+        return cls(path, state["offset"], state["rows"])
+
+
+class Importer:
+    def __init__(self, client, table_name, workers=8, wcu_per_second=0.0, rejects=None, progress_interval=5.0,
+                 log=sys.stderr):
+        self.client = client
+        self.table_name = table_name
+        self.workers = workers
+        self.limiter = CapacityLimiter(wcu_per_second, burst=max(wcu_per_second, 25.0))
+        self.rejects = rejects
+        self.progress_interval = progress_interval
+        self.log = log
+        self.stats = {"written": 0, "rejected": 0, "throttle_events": 0}
+        self._lock = threading.Lock()
+
+    def _throttled(self):
+        with self._lock:
+            self.stats["throttle_events"] += 1
+
+    def _reject(self, line, reason):
+        with self._lock:
+            self.stats["rejected"] += 1
+            if self.rejects:
+                self.rejects.write(json.dumps({"error": reason, "line": line.decode("utf-8", "replace").rstrip("\n")}))
+                self.rejects.write("\n")
+
+    def _write(self, batch):
+        """batch: list of (line, item). Throttles on estimated WCU, then writes with retries."""
+        self.limiter.wait()
+        self.limiter.consume(sum(_wcu(item) for _, item in batch))
+        failed = _write_chunk(self.client, self.table_name, list(enumerate(item for _, item in batch)),
+                              on_throttle=self._throttled)
+        for i, code in failed.items():
+            self._reject(batch[i][0], code)
+        with self._lock:
+            self.stats["written"] += len(batch) - len(failed)
+
+    def run(self, path, fmt, checkpoint, numeric=()):
+        started = last_report = last_save = time.monotonic()
+        seq = 0
+        with open(path, "rb") as f, ThreadPoolExecutor(max_workers=self.workers) as pool:
+            if fmt == "csv":
+                header = next(csv.reader([f.readline().decode("utf-8-sig")]))
+                parse = _csv_parser(header, set(numeric))
+                if checkpoint.offset < f.tell():
+                    checkpoint.offset = f.tell()
+            else:
+                parse = _ndjson_row
+            f.seek(checkpoint.offset)
+            inflight = set()
+            batch, ids = [], set()
+
+            def submit(batch, end_offset):
+                nonlocal seq
+                while len(inflight) >= self.workers * 2:
+                    done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        inflight.discard(fut)
+                        fut.result()
+                fut = pool.submit(self._write, batch)
+                fut.add_done_callback(lambda fut, s=seq, o=end_offset, n=len(batch):
+                                      fut.exception() is None and checkpoint.complete(s, o, n))
+                inflight.add(fut)
+                seq += 1
+
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    item = to_order_item(parse(line))
+                except RowError as e:
+                    self._reject(line, str(e))
+                    continue
+                key = item["id"]["N"]
+                if key in ids:
+                    # BatchWriteItem rejects duplicate keys in one call; flush and start a new batch.
+                    submit(batch, f.tell() - len(line))
+                    batch, ids = [], set()
+                batch.append((line, item))
+                ids.add(key)
+                if len(batch) == WRITE_CHUNK:
+                    submit(batch, f.tell())
+                    batch, ids = [], set()
+
+                now = time.monotonic()
+                if now - last_save >= 1.0:
+                    checkpoint.save()
+                    last_save = now
+                if self.progress_interval and now - last_report >= self.progress_interval:
+                    self.report(started)
+                    last_report = now
+            if batch:
+                submit(batch, f.tell())
+            for fut in inflight:
+                fut.result()
+        checkpoint.save()
+        self.report(started)
+        return self.stats
+
+    def report(self, started):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        s = self.stats
+        print(f"written={s['written']} rejected={s['rejected']} rows/s={s['written'] / elapsed:.0f} "
+              f"throttle_events={s['throttle_events']} throttle_wait={self.limiter.waited_seconds:.1f}s",
+              file=self.log, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import orders from CSV or NDJSON into OrdersTable")
+    parser.add_argument("input", help="CSV (with header) or NDJSON file")
+    parser.add_argument("--table", default=os.environ.get("ORDER_TABLE"), help="table name (default: $ORDER_TABLE)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    parser.add_argument("--numeric", default="", help="comma-separated CSV columns to store as numbers")
+    parser.add_argument("--workers", type=int, default=8, help="parallel BatchWriteItem workers")
+    parser.add_argument("--wcu-per-second", type=float, default=0.0, help="write budget, 0 = unlimited")
+    parser.add_argument("--checkpoint", help="default: <input>.checkpoint")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--rejects", help="default: <input>.rejects.ndjson")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between progress lines")
+    parser.add_argument("--endpoint-url", help="e.g. http://localhost:8000 for DynamoDB Local")
+    args = parser.parse_args(argv)
+    if not args.table:
+        parser.error("--table or ORDER_TABLE is required")
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "ndjson")
+    checkpoint_path = args.checkpoint or args.input + ".checkpoint"
+    checkpoint = Checkpoint(checkpoint_path) if args.restart else Checkpoint.load(checkpoint_path)
+    if checkpoint.offset:
+        print(f"resuming at byte {checkpoint.offset} ({checkpoint.rows} rows already written)", file=sys.stderr)
+
+    if args.endpoint_url:
+        import boto3
+        client = boto3.client("dynamodb", endpoint_url=args.endpoint_url)
+    else:
+        client = get_client("dynamodb")
+    numeric = [c.strip() for c in args.numeric.split(",") if c.strip()]
+    with open(args.rejects or args.input + ".rejects.ndjson", "a") as rejects:
+        importer = Importer(client, args.table, workers=args.workers, wcu_per_second=args.wcu_per_second,
+                            rejects=rejects, progress_interval=args.progress_interval)
+        stats = importer.run(args.input, fmt, checkpoint, numeric)
+    return 0 if not stats["rejected"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
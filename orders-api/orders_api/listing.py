@@ -0,0 +1,106 @@
+import os
+import json
+import base64
+import queue
+import threading
+
+from ddb_json import item_to_json
+from rate_limit import CapacityLimiter
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("LIST_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.environ.get("LIST_MAX_PAGE_SIZE", "1000"))
+SCAN_SEGMENTS = int(os.environ.get("SCAN_SEGMENTS", "4"))
+SCAN_RCU_PER_SECOND = float(os.environ.get("SCAN_RCU_PER_SECOND", "0"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(last_evaluated_key: dict) -> str:
+    """Opaque, URL-safe token for a LastEvaluatedKey: {"id": {"N": "42"}} -> base64url of [["id","N","42"]]."""
+    flat = [[name, *next(iter(av.items()))] for name, av in sorted(last_evaluated_key.items())]
+    raw = json.dumps(flat, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return {name: {kind: value} for name, kind, value in json.loads(raw)}
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("invalid cursor") from e
+
+
+def list_page(client, table_name, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """One page of orders; returns (order JSON texts, next cursor or None)."""
+    params = {"TableName": table_name, "Limit": max(1, min(limit, MAX_PAGE_SIZE))}
+    if cursor:
+        params["ExclusiveStartKey"] = decode_cursor(cursor)
+    resp = client.scan(**params)
+    lek = resp.get("LastEvaluatedKey")
+    return [item_to_json(item) for item in resp.get("Items", [])], (encode_cursor(lek) if lek else None)
+
+
+def parallel_scan(client, table_name, segments=SCAN_SEGMENTS, page_size=DEFAULT_PAGE_SIZE,
+                  rcu_per_second=SCAN_RCU_PER_SECOND, max_buffered_pages=None):
+    """Yield every item of the table, scanning ``segments`` segments on worker threads.
+
+    Pages flow through a bounded queue, so at most ``max_buffered_pages``
+    pages (default 2 per segment) are held in memory whatever the table
+    size. Consumed read capacity is throttled to ``rcu_per_second``.
+    """
+    limiter = CapacityLimiter(rcu_per_second)
+    pages = queue.Queue(maxsize=max_buffered_pages or 2 * segments)
+    stop = threading.Event()
+    done = object()
+
+    def worker(segment):
+        params = {"TableName": table_name, "Segment": segment, "TotalSegments": segments,
+                  "Limit": page_size, "ReturnConsumedCapacity": "TOTAL"}
+        try:
+            while not stop.is_set():
+                limiter.wait()
+                resp = client.scan(**params)
+                limiter.consume(resp.get("ConsumedCapacity", {}).get("CapacityUnits", 0))
+                if resp.get("Items"):
+                    pages.put(resp["Items"])
+                if "LastEvaluatedKey" not in resp:
+                    break
+                params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        except BaseException as e:
+            pages.put(e)
+        finally:
+            pages.put(done)
+
+    threads = [threading.Thread(target=worker, args=(s,), daemon=True) for s in range(segments)]
+    for t in threads:
+        t.start()
+    running = segments
+    try:
+        while running:
+            page = pages.get()
+            if page is done:
+                running -= 1
+            elif isinstance(page, BaseException):
+                raise page
+            else:
+                yield from page
+    finally:
+        stop.set()
+        # Unblock workers stuck on a full queue so they can see the stop flag.
+        while any(t.is_alive() for t in threads):
+            try:
+                pages.get(timeout=0.05)
+            except queue.Empty:
+                pass
+
+
+def export_ndjson(client, table_name, out, **scan_options):
+    """Write the whole table to ``out`` as NDJSON; returns the number of orders written."""
+    count = 0
+    for item in parallel_scan(client, table_name, **scan_options):
+        out.write(item_to_json(item))
+        out.write("\n")
+        count += 1
+    return count
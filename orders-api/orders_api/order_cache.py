@@ -0,0 +1,71 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# Read-through cache of orders kept inside the Lambda container. Off unless ORDER_CACHE_ENABLED=true.
+# Writes go through CreateOrderFunction, a separate function whose containers never share this
+# memory, so nothing invalidates an entry: a reader can see a changed order for up to TTL seconds
+# and a newly created one as missing for up to NEGATIVE_TTL seconds.
+ENABLED = os.environ.get("ORDER_CACHE_ENABLED", "false").lower() == "true"
+TTL = float(os.environ.get("ORDER_CACHE_TTL_SECONDS", "30"))
+NEGATIVE_TTL = float(os.environ.get("ORDER_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+MAX_ENTRIES = int(os.environ.get("ORDER_CACHE_MAX_ENTRIES", "1000"))
+
+MISSING = object()   # cached "no such order"
+
+
+class OrderCache:
+    """LRU cache with per-entry expiry. Misses can be cached as MISSING with a shorter TTL."""
+
+    def __init__(self, ttl=TTL, negative_ttl=NEGATIVE_TTL, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # order_id -> (value, expires_at)
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, order_id):
+        """Return the cached order, MISSING for a cached miss, or None when not cached."""
+        with self._lock:
+            entry = self._entries.get(order_id)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[order_id]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(order_id)
+            self.stats["negative_hits" if value is MISSING else "hits"] += 1
+            return value
+
+    def put(self, order_id, value):
+        ttl = self.negative_ttl if value is MISSING else self.ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[order_id] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(order_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = OrderCache()
+
+
+def bypass(event) -> bool:
+    """True when caching is off or the caller sent ``Cache-Control: no-cache``."""
+    if not ENABLED:
+        return True
+    headers = event.get("headers") or {}
+    value = next((v for k, v in headers.items() if k.lower() == "cache-control"), "") or ""
+    return "no-cache" in value.lower()
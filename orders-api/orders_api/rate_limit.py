@@ -0,0 +1,43 @@
+import time
+import threading
+
+
+class CapacityLimiter:
+    """Token bucket shared by worker threads to stay under a capacity-units-per-second budget.
+
+    Callers ``wait()`` before a request and ``consume(units)`` with what the
+    response reports it used; the bucket may go into debt, which later
+    callers pay off by waiting. A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate_per_second: float, burst: float = None):
+        self.rate = rate_per_second
+        self.burst = burst if burst is not None else max(rate_per_second, 1.0)
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens > 0:
+                    return
+                delay = -self._tokens / self.rate + 0.001
+                self.waited_seconds += delay
+            time.sleep(delay)
+
+    def consume(self, units: float):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens -= units
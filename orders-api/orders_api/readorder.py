@@ -1,44 +1,148 @@
 import json
-import boto3
 import os
 
-from decimal import Decimal
+from aws_clients import get_client
+from batch_ops import batch_get_items
+from ddb_json import item_to_json
+from listing import list_page, InvalidCursor, DEFAULT_PAGE_SIZE
+import order_cache
+import jsonlog
+
+log = jsonlog.get_logger("readorder")
+
+MAX_MULTI_GET_IDS = int(os.environ.get("MAX_MULTI_GET_IDS", "1000"))
 
 
 # import requests
 
-def decimal_to_str(obj):
-    if isinstance(obj, Decimal):
-        return str(obj)
-    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+def _requested_ids(event):
+    """Ids from ?ids=1,2,3 or a POST body {"ids": [...]}; None when the request is not a multi-get."""
+    qs = event.get("queryStringParameters") or {}
+    if qs.get("ids"):
+        return [part.strip() for part in qs["ids"].split(",") if part.strip()]
+    body = event.get("body")
+    if body:
+        payload = json.loads(body) if isinstance(body, str) else body
+        if isinstance(payload, dict) and isinstance(payload.get("ids"), list):
+            return payload["ids"]
+    return None
+
+
+def read_orders(ids, use_cache=False):
+    """Fetch many orders at once; returns (order JSON texts in request order, missing ids, failed ids)."""
+    unique = list(dict.fromkeys(ids))
+    cached = {}
+    if use_cache:
+        for order_id in unique:
+            value = order_cache.cache.get(order_id)
+            if value is not None:
+                cached[order_id] = value
+    fetch = [i for i in unique if i not in cached]
+    keys = [{"id": {"N": str(i)}} for i in fetch]
+    table_name = os.environ.get('ORDER_TABLE')
+    items, failed = batch_get_items(get_client("dynamodb"), table_name, keys) if keys else ({}, {})
+    for order_id, key in zip(fetch, keys):
+        k = json.dumps(key["id"], sort_keys=True)
+        if k in items:
+            cached[order_id] = item_to_json(items[k])
+        elif k not in failed:
+            cached[order_id] = order_cache.MISSING
+        else:
+            continue
+        if order_cache.ENABLED:
+            order_cache.cache.put(order_id, cached[order_id])
+    orders, missing, errors = [], [], []
+    for order_id in unique:
+        value = cached.get(order_id)
+        if value is None:
+            errors.append(order_id)
+        elif value is order_cache.MISSING:
+            missing.append(order_id)
+        else:
+            orders.append(value)
+    return orders, missing, errors
+
+
+def _multi_get_response(raw_ids, use_cache=False):
+    try:
+        ids = [int(i) for i in raw_ids]
+    except (TypeError, ValueError):
+        return {"statusCode": 400, "body": json.dumps({"message": "ids must be integers"})}
+    if len(ids) > MAX_MULTI_GET_IDS:
+        return {"statusCode": 413, "body": json.dumps({"message": f"at most {MAX_MULTI_GET_IDS} ids per request"})}
+    orders, missing, failed = read_orders(ids, use_cache)
+    return {
+        "statusCode": 200,
+        "headers": {
+            "Content-Type": "application/json"
+        },
+        "body": '{"orders":[' + ",".join(orders) + '],"missing":' + json.dumps(missing)
+                + ',"failed":' + json.dumps(failed) + "}",
+    }
+
+
+def _list_response(qs):
+    try:
+        limit = int(qs.get("limit") or DEFAULT_PAGE_SIZE)
+        orders, cursor = list_page(get_client("dynamodb"), os.environ.get('ORDER_TABLE'), limit, qs.get("cursor"))
+    except (ValueError, InvalidCursor) as e:
+        return {"statusCode": 400, "body": json.dumps({"message": str(e) or "invalid request"})}
+    return {
+        "statusCode": 200,
+        "headers": {
+            "Content-Type": "application/json"
+        },
+        "body": '{"orders":[' + ",".join(orders) + '],"cursor":' + json.dumps(cursor) + "}",
+    }
+
 
 def lambda_handler(event, context):
+    jsonlog.start(context)
     msg = ""
     status_code: 500
     try:
-        db = boto3.resource("dynamodb")
+        if not (event.get("pathParameters") or {}).get("id"):
+            try:
+                ids = _requested_ids(event)
+            except ValueError:
+                return {"statusCode": 400, "body": json.dumps({"message": "body must be valid JSON"})}
+            if ids is not None:
+                return _multi_get_response(ids, not order_cache.bypass(event))
+            return _list_response(event.get("queryStringParameters") or {})
         order_id = int(event["pathParameters"]["id"])
-        table_name = os.environ.get('ORDER_TABLE')
-        table = db.Table(table_name)
-        response = table.get_item(Key={"id": order_id})
-        print(f"Response: {response}")
-        item = response["Item"]
-        print(f"Item: {item}")
-        print(f"Item type: {type(item)}")
-        item_id = item["id"]
+        use_cache = not order_cache.bypass(event)
+        item = order_cache.cache.get(order_id) if use_cache else None
+        cache_status = "HIT" if item is not None else ("MISS" if use_cache else "BYPASS")
+        if item is None:
+            table_name = os.environ.get('ORDER_TABLE')
+            response = get_client("dynamodb").get_item(TableName=table_name, Key={"id": {"N": str(order_id)}})
+            log.debug("order fetched", orderId=order_id, found="Item" in response)
+            item = item_to_json(response["Item"]) if "Item" in response else order_cache.MISSING
+            if order_cache.ENABLED:
+                order_cache.cache.put(order_id, item)
+        if item is order_cache.MISSING:
+            return {
+                "statusCode": 404,
+                "headers": {
+                    "Content-Type": "application/json",
+                    "X-Cache": cache_status
+                },
+                "body": json.dumps({"message": "Order not found"})
+            }
         msg = item
         status_code = 200
-        itemjson = json.dumps(item, default=decimal_to_str)
+        itemjson = item
         return {
             "statusCode": status_code,
             "headers": {
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
+                "X-Cache": cache_status
             },
             "body": itemjson
         }
     except BaseException as e:
         status_code = 500
-        print(e)
+        log.error("read failed", exc=e)
         return {
             "statusCode": status_code,
             "body": "Error occurd"
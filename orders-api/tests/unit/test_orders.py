@@ -0,0 +1,314 @@
+import json
+import os
+import sys
+import unittest.mock as mock
+
+import pytest
+
+# Handlers import their siblings as top-level modules, the way Lambda loads them.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'orders_api'))
+
+import batch_ops
+import createorder
+import readorder
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(batch_ops, "_backoff", lambda attempt: None)
+    monkeypatch.setenv("ORDER_TABLE", "orders")
+
+
+class FakeDynamo:
+    """Records BatchWriteItem calls; each id in ``unprocessed`` is left behind once."""
+
+    def __init__(self, unprocessed=()):
+        self.unprocessed = set(unprocessed)
+        self.calls = []
+
+    def batch_write_item(self, RequestItems):
+        (table, requests), = RequestItems.items()
+        self.calls.append([r["PutRequest"]["Item"]["id"]["N"] for r in requests])
+        left = [r for r in requests if r["PutRequest"]["Item"]["id"]["N"] in self.unprocessed]
+        self.unprocessed -= {r["PutRequest"]["Item"]["id"]["N"] for r in left}
+        return {"UnprocessedItems": {table: left} if left else {}}
+
+
+def test_batch_write_chunks_and_retries_unprocessed():
+    client = FakeDynamo(unprocessed={"3", "30"})
+    items = [{"id": {"N": str(i)}} for i in range(60)]
+
+    failed = batch_ops.batch_write_items(client, "orders", items, concurrency=1)
+
+    assert failed == {}
+    assert [len(c) for c in client.calls] == [25, 1, 25, 1, 10]
+    assert client.calls[1] == ["3"] and client.calls[3] == ["30"]
+
+
+def test_bulk_create_reports_per_item_results():
+    client = FakeDynamo()
+    body = json.dumps([{"id": 1, "total": 9.99}, {"id": 1}, {"sku": "x"}, {"id": 2}])
+    with mock.patch.object(createorder, "get_client", return_value=client):
+        ret = createorder.lambda_handler({"body": body}, None)
+
+    data = json.loads(ret["body"])
+    assert ret["statusCode"] == 207
+    assert [r["status"] for r in data["results"]] == ["created", "failed", "failed", "created"]
+    assert data["results"][1]["error"] == "duplicate id in request"
+    assert client.calls == [["1", "2"]]
+
+
+def test_bulk_create_fails_only_orders_with_non_finite_numbers():
+    client = FakeDynamo()
+    body = '[{"id": 1, "total": NaN}, {"id": 2, "total": 1.5}, {"id": Infinity}, {"id": 3, "qty": [-Infinity]}]'
+    with mock.patch.object(createorder, "get_client", return_value=client):
+        ret = createorder.lambda_handler({"body": body}, None)
+        single = createorder.lambda_handler({"body": '{"id": 4, "total": NaN}'}, None)
+
+    data = json.loads(ret["body"])
+    assert ret["statusCode"] == 207
+    assert [r["status"] for r in data["results"]] == ["failed", "created", "failed", "failed"]
+    assert "finite" in data["results"][0]["error"]
+    assert client.calls == [["2"]]
+    assert single["statusCode"] == 400
+
+
+def test_multi_get_preserves_order_and_reports_missing():
+    class Reader:
+        calls = 0
+
+        def batch_get_item(self, RequestItems):
+            (table, req), = RequestItems.items()
+            Reader.calls += 1
+            keys = [k for k in req["Keys"] if k["id"]["N"] != "404"]
+            # First call leaves the last key unprocessed.
+            done, rest = (keys[:-1], keys[-1:]) if Reader.calls == 1 else (keys, [])
+            return {"Responses": {table: [dict(k, total={"N": "1.5"}) for k in done]},
+                    "UnprocessedKeys": {table: {"Keys": rest}} if rest else {}}
+
+    event = {"queryStringParameters": {"ids": "3,404,1,3,2"}}
+    with mock.patch.object(readorder, "get_client", return_value=Reader()):
+        ret = readorder.lambda_handler(event, None)
+
+    data = json.loads(ret["body"])
+    assert ret["statusCode"] == 200
+    assert [o["id"] for o in data["orders"]] == [3, 1, 2]
+    assert data["orders"][0]["total"] == 1.5
+    assert data["missing"] == [404]
+    assert data["failed"] == []
+    assert Reader.calls == 2
+
+
+@pytest.mark.parametrize("body", ['{"ids": [1,', json.dumps({"ids": ["x"]})])
+def test_multi_get_rejects_malformed_bodies_with_400(body):
+    with mock.patch.object(readorder, "get_client") as get_client:
+        ret = readorder.lambda_handler({"routeKey": "POST /orders/batch-get", "body": body}, None)
+
+    assert ret["statusCode"] == 400
+    get_client.assert_not_called()
+
+
+def test_read_cache_hits_bypasses_and_expires(monkeypatch):
+    import order_cache
+    monkeypatch.setattr(order_cache, "ENABLED", True)
+    monkeypatch.setattr(order_cache, "cache", order_cache.OrderCache(ttl=60, negative_ttl=60, max_entries=10))
+    now = [1000.0]
+    monkeypatch.setattr(order_cache.time, "monotonic", lambda: now[0])
+    client = mock.MagicMock()
+    client.get_item.return_value = {"Item": {"id": {"N": "7"}}}
+    event = {"pathParameters": {"id": "7"}}
+
+    with mock.patch.object(readorder, "get_client", return_value=client):
+        first = readorder.lambda_handler(event, None)
+        second = readorder.lambda_handler(event, None)
+        bypassed = readorder.lambda_handler(dict(event, headers={"cache-control": "no-cache"}), None)
+        now[0] += 60    # no invalidation reaches another function's container; only the TTL ends staleness
+        expired = readorder.lambda_handler(event, None)
+
+    assert [r["headers"]["X-Cache"] for r in (first, second, bypassed, expired)] == ["MISS", "HIT", "BYPASS", "MISS"]
+    assert client.get_item.call_count == 3
+    assert json.loads(second["body"]) == {"id": 7}
+    assert order_cache.cache.stats["hits"] == 1
+
+
+def test_ddb_json_round_trip_keeps_numbers_exact():
+    from decimal import Decimal
+    import ddb_json
+
+    order = json.loads('{"id": 1, "total": 12.50, "big": 12345678901234567890.123, "ok": true, '
+                       '"note": "caf\\u00e9 \\"x\\"", "lines": [{"qty": 2, "sku": null}], "tags": []}',
+                       parse_float=Decimal)
+    item = ddb_json.to_item(order)
+
+    assert item["total"] == {"N": "12.50"}
+    assert item["lines"]["L"][0]["M"]["sku"] == {"NULL": True}
+    assert json.loads(ddb_json.item_to_json(item), parse_float=Decimal) == order
+    assert json.loads(ddb_json.item_to_json({"s": {"SS": ["a"]}, "n": {"NS": ["1", "2.5"]}})) == {"s": ["a"], "n": [1, 2.5]}
+
+
+def test_listing_pages_with_opaque_cursor():
+    import listing
+
+    client = mock.MagicMock()
+    client.scan.side_effect = [
+        {"Items": [{"id": {"N": "1"}}], "LastEvaluatedKey": {"id": {"N": "1"}}},
+        {"Items": [{"id": {"N": "2"}}]},
+    ]
+    with mock.patch.object(readorder, "get_client", return_value=client):
+        first = json.loads(readorder.lambda_handler({"queryStringParameters": {"limit": "1"}}, None)["body"])
+        second = json.loads(readorder.lambda_handler({"queryStringParameters": {"cursor": first["cursor"]}}, None)["body"])
+        bad = readorder.lambda_handler({"queryStringParameters": {"cursor": "!!"}}, None)
+
+    assert first["orders"] == [{"id": 1}] and second == {"orders": [{"id": 2}], "cursor": None}
+    assert client.scan.call_args.kwargs["ExclusiveStartKey"] == {"id": {"N": "1"}}
+    assert listing.decode_cursor(listing.encode_cursor({"id": {"N": "9"}})) == {"id": {"N": "9"}}
+    assert bad["statusCode"] == 400
+
+
+def test_parallel_scan_export_covers_every_segment():
+    import io
+    import listing
+
+    class Segmented:
+        def scan(self, TableName, Segment, TotalSegments, Limit, ReturnConsumedCapacity, ExclusiveStartKey=None):
+            start = int(ExclusiveStartKey["id"]["N"]) + 1 if ExclusiveStartKey else 0
+            ids = [i for i in range(start, 100) if i % TotalSegments == Segment][:Limit]
+            resp = {"Items": [{"id": {"N": str(i)}} for i in ids], "ConsumedCapacity": {"CapacityUnits": 0.5}}
+            if ids and ids[-1] + TotalSegments < 100:
+                resp["LastEvaluatedKey"] = {"id": {"N": str(ids[-1])}}
+            return resp
+
+    out = io.StringIO()
+    count = listing.export_ndjson(Segmented(), "orders", out, segments=4, page_size=7)
+
+    assert count == 100
+    assert sorted(json.loads(line)["id"] for line in out.getvalue().splitlines()) == list(range(100))
+
+
+def test_import_resumes_from_checkpoint_and_rejects_bad_rows(tmp_path):
+    import import_orders
+
+    src = tmp_path / "orders.csv"
+    src.write_text("id,total,note\n" + "".join(f"{i},{i}.50,n{i}\n" for i in range(60)) + "x,1,bad\n")
+    checkpoint = import_orders.Checkpoint(str(tmp_path / "cp"))
+    client = FakeDynamo(unprocessed={"7"})
+    importer = import_orders.Importer(client, "orders", workers=2, progress_interval=0, log=open(os.devnull, "w"))
+
+    stats = importer.run(str(src), "csv", checkpoint, numeric=["total"])
+
+    assert stats["written"] == 60 and stats["rejected"] == 1
+    assert sorted(int(i) for call in client.calls for i in call) == sorted(list(range(60)) + [7])
+    assert json.loads((tmp_path / "cp").read_text()) == {"offset": src.stat().st_size, "rows": 60}
+
+    resumed = import_orders.Importer(FakeDynamo(), "orders", log=open(os.devnull, "w"))
+    assert resumed.run(str(src), "csv", import_orders.Checkpoint.load(str(tmp_path / "cp")))["written"] == 0
+
+
+def test_import_rejects_non_finite_numbers(tmp_path):
+    import import_orders
+
+    ndjson = tmp_path / "orders.ndjson"
+    ndjson.write_text('{"id": 1, "total": NaN}\n{"id": 2, "total": 2.5}\n{"id": 3, "tags": [Infinity]}\n')
+    csv_src = tmp_path / "orders.csv"
+    csv_src.write_text("id,total\n4,NaN\n5,1.25\n6,-inf\n")
+    client = FakeDynamo()
+
+    for src, fmt in ((ndjson, "ndjson"), (csv_src, "csv")):
+        importer = import_orders.Importer(client, "orders", progress_interval=0, log=open(os.devnull, "w"))
+        stats = importer.run(str(src), fmt, import_orders.Checkpoint(str(tmp_path / f"{fmt}.cp")), numeric=["total"])
+        assert stats["written"] == 1 and stats["rejected"] == 2
+
+    assert client.calls == [["2"], ["5"]]
+
+
+def test_idempotency_key_replays_stored_response(monkeypatch):
+    import idempotency
+    from botocore.exceptions import ClientError
+    monkeypatch.setattr(idempotency, "TABLE", "idem")
+    records, orders = {}, mock.MagicMock()
+
+    class Idem:
+        def put_item(self, TableName, Item, ConditionExpression=None, **kw):
+            if TableName != "idem":
+                return orders.put_item(TableName=TableName, Item=Item, ConditionExpression=ConditionExpression)
+            key = Item["key"]["S"]
+            if key in records:
+                raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}, "Item": records[key]}, "PutItem")
+            records[key] = Item
+
+        def update_item(self, TableName, Key, ExpressionAttributeValues, **kw):
+            v = ExpressionAttributeValues
+            records[Key["key"]["S"]].update(status=v[":completed"], status_code=v[":code"], body=v[":body"])
+
+    event = {"body": json.dumps({"id": 5}), "headers": {"Idempotency-Key": "abc", "If-None-Match": "*"}}
+    with mock.patch.object(createorder, "get_client", return_value=Idem()), \
+            mock.patch.object(idempotency, "get_client", return_value=Idem()):
+        first = createorder.lambda_handler(event, None)
+        replay = createorder.lambda_handler(event, None)
+        other = createorder.lambda_handler(dict(event, body=json.dumps({"id": 6})), None)
+
+    assert first["statusCode"] == replay["statusCode"] == 200
+    assert replay["body"] == first["body"] and replay["headers"]["Idempotent-Replayed"] == "true"
+    assert other["statusCode"] == 422
+    orders.put_item.assert_called_once()
+    assert orders.put_item.call_args.kwargs["ConditionExpression"] == "attribute_not_exists(id)"
+
+
+def test_create_only_reports_existing_orders():
+    from botocore.exceptions import ClientError
+
+    def put_item(Item, **kw):
+        if Item["id"]["N"] == "2":
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+        return {}
+
+    client = mock.MagicMock()
+    client.put_item.side_effect = put_item
+    headers = {"if-none-match": "*"}
+    with mock.patch.object(createorder, "get_client", return_value=client):
+        single = createorder.lambda_handler({"body": json.dumps({"id": 2}), "headers": headers}, None)
+        bulk = createorder.lambda_handler({"body": json.dumps([{"id": 1}, {"id": 2}]), "headers": headers}, None)
+
+    assert single["statusCode"] == 409
+    assert bulk["statusCode"] == 207
+    assert [r["status"] for r in json.loads(bulk["body"])["results"]] == ["created", "exists"]
+
+
+def test_jsonlog_gates_levels_redacts_and_samples(monkeypatch, capsys):
+    import jsonlog
+    monkeypatch.setattr(jsonlog, "LEVEL", jsonlog.LEVELS["INFO"])
+    log = jsonlog.get_logger("test")
+
+    class Loud:
+        def __str__(self):
+            raise AssertionError("formatted although DEBUG is off")
+
+    jsonlog.start(mock.Mock(aws_request_id="req-1"))
+    log.debug("payload %s", Loud())
+    log.info("resumed %s", "task-1", body={"taskToken": "abc", "items": [{"password": "x", "id": 1}]})
+    monkeypatch.setattr(jsonlog, "DEBUG_SAMPLE_RATE", 1.0)
+    jsonlog.start(None)
+    log.debug("sampled")
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["message"] for r in lines] == ["resumed task-1", "sampled"]
+    assert lines[0]["requestId"] == "req-1" and "requestId" not in lines[1]
+    assert lines[0]["body"] == {"taskToken": "***", "items": [{"password": "***", "id": 1}]}
+
+
+def test_jsonlog_records_exceptions_at_every_level(monkeypatch, capsys):
+    import jsonlog
+    monkeypatch.setattr(jsonlog, "LEVEL", jsonlog.LEVELS["DEBUG"])
+    log = jsonlog.get_logger("test")
+    try:
+        raise ValueError("bad row")
+    except ValueError as e:
+        for emit in (log.debug, log.info, log.warning, log.error):
+            emit("failed", exc=e, orderId=1)
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["level"] for r in lines] == ["DEBUG", "INFO", "WARNING", "ERROR"]
+    for r in lines:
+        assert (r["errorType"], r["errorMessage"], r["orderId"]) == ("ValueError", "bad row", 1)
+        frame, = r["stackTrace"]
+        assert "exc" not in r and frame.startswith(__file__) and frame.endswith(" in test_jsonlog_records_exceptions_at_every_level")
@@ -1,15 +1,19 @@
 import json, os, datetime as dt
-from db_helper import get_db_connection
+from db_helper import db_connection
+import jsonlog
+
+log = jsonlog.get_logger("callback_consumer")
 
 APP_BASE_URL = os.getenv("APP_BASE_URL", "https://example.com")
 def _now(): return dt.datetime.utcnow()
 
 def lambda_handler(event, context):
+    jsonlog.start(context)
     failures = []
     for rec in event.get("Records", []):
         try:
             body = rec["body"]
-            print(f"Callback_Consumer:: Received message: {body}")
+            log.debug("received message", messageId=rec.get("messageId"), bytes=len(body))
             try: payload = json.loads(body)
             except json.JSONDecodeError: payload = json.loads(json.loads(body))
 
@@ -18,19 +22,19 @@ def lambda_handler(event, context):
             title = payload.get("title","")
             token = payload["taskToken"]
 
-            conn = get_db_connection()
-            with conn, conn.cursor() as cur:
-                cur.execute("UPDATE approval_tasks SET task_token=%s, updated_at=%s WHERE task_id=%s",
-                            (token,_now(),task_id))
-            conn.close()
+            with db_connection() as conn:
+                with conn, conn.cursor() as cur:
+                    cur.execute("UPDATE approval_tasks SET task_token=%s, updated_at=%s WHERE task_id=%s",
+                                (token,_now(),task_id))
 
             approve = f"{APP_BASE_URL}/requests/{task_id}/decision?decision=APPROVE"
             reject  = f"{APP_BASE_URL}/requests/{task_id}/decision?decision=REJECT"
             subject = f"Approval required: {title}"
             bodytxt = f"You have a pending approval task.\n\nTask ID: {task_id}\nTitle: {title}\n\nApprove: {approve}\nReject: {reject}\n"
-            print(f"Callback_Consumer:: Sending Email: {bodytxt}")
+            log.info("notification prepared", taskId=task_id, subject=subject)
             #send_email(subject, bodytxt, assessor_email)
         except Exception as e:
+            log.error("message failed", messageId=rec.get("messageId"), exc=e)
             failures.append({"itemIdentifier": rec.get("messageId","unknown")})
     if failures: return {"batchItemFailures": failures}
     return {"status":"ok"}
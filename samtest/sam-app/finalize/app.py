@@ -1,3 +1,8 @@
+import jsonlog
+
+log = jsonlog.get_logger("finalize")
+
 def lambda_handler(event, context):
-    print(event)
+    jsonlog.start(context)
+    if log.enabled("DEBUG"): log.debug("workflow finished", event=event)
     return {"status":"End of Workflow"}
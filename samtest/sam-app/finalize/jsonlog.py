@@ -0,0 +1,76 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import traceback
+
+# JSON-lines logger matching the functions' LoggingConfig: JSON. Configure with
+# LOG_LEVEL (falls back to Lambda's AWS_LAMBDA_LOG_LEVEL) and LOG_DEBUG_SAMPLE_RATE.
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+LEVEL = LEVELS.get((os.environ.get("LOG_LEVEL") or os.environ.get("AWS_LAMBDA_LOG_LEVEL") or "INFO").upper(), 20)
+DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0"))
+
+# Redaction goes by field name only. The message (and an exception's text) is written as
+# given, so pass anything secret as a field, never interpolated into the message.
+REDACTED = "***"
+SENSITIVE = re.compile(r"token|secret|password|passwd|authorization|api[-_]?key|credential|cookie", re.I)
+
+_invocation = {"request_id": None, "sampled": False}
+
+
+def redact(value):
+    """Copy of ``value`` with every sensitive-looking key masked, at any depth."""
+    if isinstance(value, dict):
+        return {k: REDACTED if isinstance(k, str) and SENSITIVE.search(k) else redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    return value
+
+
+def start(context=None):
+    """Call at the top of a handler: tags records with the request id and samples this invocation's debug logs."""
+    _invocation["request_id"] = getattr(context, "aws_request_id", None)
+    _invocation["sampled"] = DEBUG_SAMPLE_RATE > 0 and random.random() < DEBUG_SAMPLE_RATE
+
+
+class Logger:
+    def __init__(self, name):
+        self.name = name
+
+    def enabled(self, level):
+        return LEVELS[level] >= LEVEL or (level == "DEBUG" and _invocation["sampled"])
+
+    def _emit(self, level, msg, args, fields, exc=None):
+        if not self.enabled(level):
+            return
+        record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + "Z", "level": level,
+                  "logger": self.name, "message": msg % args if args else msg}
+        if _invocation["request_id"]:
+            record["requestId"] = _invocation["request_id"]
+        if fields:
+            record.update(redact(fields))
+        if exc is not None:
+            record["errorType"], record["errorMessage"] = type(exc).__name__, str(exc)
+            # Frames only: looking up each frame's source line costs ~25x more, and a batch
+            # handler can log one exception per failed record.
+            record["stackTrace"] = [f"{f.f_code.co_filename}:{line} in {f.f_code.co_name}"
+                                    for f, line in traceback.walk_tb(exc.__traceback__)]
+        sys.stdout.write(json.dumps(record, default=str) + "\n")
+
+    def debug(self, msg, *args, exc=None, **fields):
+        self._emit("DEBUG", msg, args, fields, exc)
+
+    def info(self, msg, *args, exc=None, **fields):
+        self._emit("INFO", msg, args, fields, exc)
+
+    def warning(self, msg, *args, exc=None, **fields):
+        self._emit("WARNING", msg, args, fields, exc)
+
+    def error(self, msg, *args, exc=None, **fields):
+        self._emit("ERROR", msg, args, fields, exc)
+
+
+def get_logger(name):
+    return Logger(name)
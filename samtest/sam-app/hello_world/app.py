@@ -1,13 +1,26 @@
 import json, uuid, datetime as dt
-from db_helper import get_db_connection
+from db_helper import db_connection
+import jsonlog
+
+log = jsonlog.get_logger("create_request")
 
 # import requests
 
 def _now(): return dt.datetime.utcnow()
 
+# Question and task in one round trip.
+INSERT_SQL = """
+    WITH q AS (
+        INSERT INTO questions (question_id,title,content,created_at) VALUES (%s,%s,%s,%s) RETURNING question_id
+    )
+    INSERT INTO approval_tasks (task_id,question_id,assessor_email,status,created_at,updated_at)
+    SELECT %s, q.question_id, %s, 'PENDING', %s, %s FROM q
+"""
+
 def lambda_handler(event, context):
+    jsonlog.start(context)
     payload = event["body"]
-    print(f"CreateRequest:: incoming payload: {payload}")
+    log.debug("incoming payload", bytes=len(payload or ""))
     """Sample pure Lambda function
 
     Parameters
@@ -40,7 +53,7 @@ def lambda_handler(event, context):
     try:
         return save_to_db(payload)
     except Exception as e:
-        print(e)
+        log.error("saving request failed", exc=e)
 
     return {
         "statusCode": 200,
@@ -62,18 +75,10 @@ def save_to_db(body):
     if not title or not assessor_email:
         return {"statusCode": 400, "body": json.dumps({"error": "title and assessorEmail are required"})}
 
-    qid, tid = str(uuid.uuid4()), str(uuid.uuid4())
-    conn = get_db_connection()
-    try:
+    qid, tid, now = str(uuid.uuid4()), str(uuid.uuid4()), _now()
+    with db_connection() as conn:
         with conn, conn.cursor() as cur:
-            cur.execute("INSERT INTO questions (question_id,title,content,created_at) VALUES (%s,%s,%s,%s)",
-                        (qid, title, content, _now()))
-            cur.execute("""
-                    INSERT INTO approval_tasks (task_id,question_id,assessor_email,status,created_at,updated_at)
-                    VALUES (%s,%s,%s,%s,%s,%s)
-                """, (tid, qid, assessor_email, "PENDING", _now(), _now()))
-    finally:
-        conn.close()
+            cur.execute(INSERT_SQL, (qid, title, content, now, tid, assessor_email, now, now))
 
     return {"statusCode": 200,
             "body": json.dumps({"taskId": tid, "questionId": qid, "assessorEmail": assessor_email, "title": title})}
@@ -1,12 +1,49 @@
-import json, boto3, os
-from db_helper import get_db_connection
+import json, os, datetime as dt
+from aws_clients import get_client
+from db_helper import db_connection
+import jsonlog
+
+log = jsonlog.get_logger("resume_workflow")
 
 # Ensure we're using the same region as the state machine
 region = os.environ.get("AWS_REGION", "us-east-1")
-sfn = boto3.client("stepfunctions", region_name=region)
+
+STATUS_FOR = {"APPROVE": "APPROVED", "REJECT": "REJECTED"}
+DEAD_TOKEN_ERRORS = {"TaskDoesNotExist", "TaskTimedOut", "InvalidToken"}
+
+def _now(): return dt.datetime.utcnow()
+
+def _claim(task_id, status):
+    """Take the task token, clear it and record the decision in one statement; a concurrent claim gets nothing."""
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE approval_tasks AS t SET task_token=NULL, status=%s, updated_at=%s
+                FROM (SELECT task_id, task_token FROM approval_tasks
+                      WHERE task_id=%s AND status='PENDING' AND task_token IS NOT NULL FOR UPDATE) AS old
+                WHERE t.task_id=old.task_id
+                RETURNING old.task_token
+            """, (status, _now(), task_id))
+            row = cur.fetchone()
+    return row[0] if row else None
+
+def _restore(task_id, token):
+    """Undo a claim after a retryable Step Functions failure."""
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute("UPDATE approval_tasks SET task_token=%s, status='PENDING', updated_at=%s "
+                        "WHERE task_id=%s AND task_token IS NULL", (token, _now(), task_id))
+
+def _mark_failed(task_id):
+    """The claimed token can never be used; record that instead of putting it back."""
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute("UPDATE approval_tasks SET status='FAILED', updated_at=%s WHERE task_id=%s",
+                        (_now(), task_id))
 
 def lambda_handler(event, context):
-    print(f"Function invoked with event: {json.dumps(event)}")
+    jsonlog.start(context)
+    if log.enabled("DEBUG"): log.debug("invoked", event=event)
 
     task_id = (event.get("pathParameters") or {}).get("taskId")
     if not task_id:
@@ -25,28 +62,18 @@ def lambda_handler(event, context):
     if decision not in {"APPROVE","REJECT"}:
         return {"statusCode":400,"body":json.dumps({"error":"decision must be APPROVE or REJECT"})}
 
-    print(f"Processing task {task_id} with decision {decision}")
-
-    # Fetch task token from DB
-    conn = get_db_connection()
-    token = None
-    with conn, conn.cursor() as cur:
-        cur.execute("SELECT task_token FROM approval_tasks WHERE task_id=%s",(task_id,))
-        row = cur.fetchone()
-        if row: token = row[0]
-    conn.close()
+    log.info("processing task", taskId=task_id, decision=decision)
 
+    token = _claim(task_id, STATUS_FOR[decision])
     if not token:
         return {"statusCode":404,"body":json.dumps({"error":"No task token found (already actioned or invalid)."})}
 
-    print(f"Token length: {len(token)}")
-    print(f"Token starts with: {token[:50]}...")
-    print(f"Token ends with: ...{token[-50:]}")
-    print(f"Full token (first 200 chars): {token[:200]}")
-    
+    log.debug("task token claimed", taskId=task_id, tokenLength=len(token))
+
     # Validate token format
-    if not token or len(token) < 100:  # Task tokens are typically much longer
-        print(f"WARNING: Token seems too short: {len(token)} characters")
+    if len(token) < 100:  # Task tokens are typically much longer
+        log.warning("task token too short", taskId=task_id, tokenLength=len(token))
+        _mark_failed(task_id)
         return {"statusCode":400,"body":json.dumps({"error":"Invalid task token format"})}
     
     # Check if token contains expected base64 characters
@@ -54,47 +81,26 @@ def lambda_handler(event, context):
     try:
         # Task tokens should be valid base64
         base64.b64decode(token, validate=True)
-        print("Token appears to be valid base64")
     except Exception as e:
-        print(f"Token validation failed: {e}")
+        log.warning("task token is not valid base64", taskId=task_id, exc=e)
+        _mark_failed(task_id)
         return {"statusCode":400,"body":json.dumps({"error":"Invalid task token encoding"})}
     
     payload = {"taskId":task_id,"decision":decision,"comments":comments}
-    print(f"Sending task result to Step Functions: {json.dumps(payload)}")
+    sfn = get_client("stepfunctions", region)
     try:
         if decision=="APPROVE":
-            print("Calling send_task_success...")
-            response = sfn.send_task_success(taskToken=token, output=json.dumps(payload))
-            print(f"send_task_success response: {response}")
+            sfn.send_task_success(taskToken=token, output=json.dumps(payload))
         else:
-            print("Calling send_task_failure...")
-            response = sfn.send_task_failure(taskToken=token, error="Rejected", cause=json.dumps(payload))
-            print(f"send_task_failure response: {response}")
-        print("Step Functions call completed successfully")
-        
-        # Clean up the task from database
-        conn = get_db_connection()
-        with conn, conn.cursor() as cur:
-            cur.execute("DELETE FROM approval_tasks WHERE task_id=%s", (task_id,))
-        conn.close()
-        print(f"Task {task_id} removed from database")
-        
+            sfn.send_task_failure(taskToken=token, error="Rejected", cause=json.dumps(payload))
     except Exception as e:
-        print(f"Error calling Step Functions: {str(e)}")
-        print(f"Error type: {type(e).__name__}")
-        if hasattr(e, 'response'):
-            print(f"AWS Error Response: {e.response}")
-            error_code = e.response.get('Error', {}).get('Code', 'Unknown')
-            error_msg = e.response.get('Error', {}).get('Message', str(e))
-            print(f"AWS Error Code: {error_code}")
-            print(f"AWS Error Message: {error_msg}")
-            
-            # Common Step Functions errors
-            if error_code == 'TaskDoesNotExist':
-                print("ERROR: Task token is invalid or already used")
-            elif error_code == 'TaskTimedOut':
-                print("ERROR: Task has timed out")
-            elif error_code == 'InvalidToken':
-                print("ERROR: Task token format is invalid")
-                
+        # TaskDoesNotExist: token already used; TaskTimedOut: task expired; InvalidToken: malformed token.
+        error_code = getattr(e, "response", {}).get("Error", {}).get("Code")
+        log.error("Step Functions call failed", taskId=task_id, errorCode=error_code, exc=e)
+        if error_code in DEAD_TOKEN_ERRORS:
+            _mark_failed(task_id)
+        else:
+            _restore(task_id, token)
         return {"statusCode":500,"body":json.dumps({"error":f"Step Functions error: {str(e)}"})}
+    log.info("task result sent", taskId=task_id, decision=decision)
+    return {"statusCode":200,"body":json.dumps({"status":"ok","taskId":task_id,"decision":decision})}
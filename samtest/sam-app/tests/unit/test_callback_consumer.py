@@ -10,12 +10,12 @@ sys.path.insert(0, callback_consumer_path)
 def test_callback_consumer():
     # Mock the db_helper module before importing app
     with mock.patch.dict('sys.modules', {'db_helper': mock.MagicMock()}):
-        # Mock the get_db_connection function
+        # Mock the pooled db_connection context manager
         mock_conn = mock.MagicMock()
         mock_cursor = mock.MagicMock()
         mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
         
-        sys.modules['db_helper'].get_db_connection.return_value = mock_conn
+        sys.modules['db_helper'].db_connection.return_value.__enter__.return_value = mock_conn
         
         # Now import and test the app
         from app import lambda_handler
@@ -37,7 +37,7 @@ def test_callback_consumer():
         result = lambda_handler(event, {})
         
         # Verify mocks were called
-        sys.modules['db_helper'].get_db_connection.assert_called_once()
+        sys.modules['db_helper'].db_connection.assert_called_once()
         mock_cursor.execute.assert_called_once()
         
         print("✅ Test passed - DB operations were mocked successfully")
@@ -1,4 +1,5 @@
 import json
+import unittest.mock as mock
 
 import pytest
 
@@ -70,3 +71,32 @@ def test_lambda_handler(apigw_event):
     assert ret["statusCode"] == 200
     assert "message" in ret["body"]
     assert data["message"] == "hello world"
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+
+def test_save_to_db_binds_one_param_per_placeholder(monkeypatch):
+    cursor = RecordingCursor()
+    conn = mock.MagicMock()
+    conn.cursor.return_value = cursor
+    db_connection = mock.MagicMock()
+    db_connection.return_value.__enter__.return_value = conn
+    monkeypatch.setattr(app, "db_connection", db_connection)
+
+    ret = app.save_to_db({"title": "Title", "assessorEmail": "a@example.com"})
+
+    assert ret["statusCode"] == 200
+    (sql, params), = cursor.executed
+    assert sql.count("%s") == len(params)
@@ -0,0 +1,55 @@
+import base64
+import importlib.util
+import os
+import unittest.mock as mock
+
+resume_workflow_path = os.path.join(os.path.dirname(__file__), '..', '..', 'resume_workflow')
+
+TOKEN = base64.b64encode(b"t" * 120).decode()
+
+
+class ThrottlingError(Exception):
+    response = {"Error": {"Code": "ThrottlingException"}}
+
+
+def _load_app():
+    # Every function directory has an app.py; load this one under its own name.
+    spec = importlib.util.spec_from_file_location("resume_workflow_app", os.path.join(resume_workflow_path, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run(sfn_error=None):
+    fakes = {'db_helper': mock.MagicMock(), 'aws_clients': mock.MagicMock()}
+    with mock.patch.dict('sys.modules', fakes):
+        cursor = mock.MagicMock()
+        cursor.fetchone.return_value = (TOKEN,)
+        conn = mock.MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+        fakes['db_helper'].db_connection.return_value.__enter__.return_value = conn
+        sfn = fakes['aws_clients'].get_client.return_value
+        sfn.send_task_success.side_effect = sfn_error
+
+        app = _load_app()
+        event = {"pathParameters": {"taskId": "task-1"}, "queryStringParameters": {"decision": "approve"}}
+        return app.lambda_handler(event, None), cursor, sfn
+
+
+def test_decision_claims_token_in_one_statement():
+    result, cursor, sfn = _run()
+
+    assert result["statusCode"] == 200
+    cursor.execute.assert_called_once()
+    assert "RETURNING old.task_token" in cursor.execute.call_args[0][0]
+    sfn.send_task_success.assert_called_once()
+    assert sfn.send_task_success.call_args.kwargs["taskToken"] == TOKEN
+
+
+def test_retryable_failure_puts_token_back():
+    result, cursor, _ = _run(sfn_error=ThrottlingError())
+
+    assert result["statusCode"] == 500
+    assert cursor.execute.call_count == 2
+    restore_sql, restore_args = cursor.execute.call_args[0]
+    assert restore_sql.startswith("UPDATE approval_tasks SET task_token=%s") and restore_args[0] == TOKEN
@@ -0,0 +1,19 @@
+-- Replace the token index with indexes that match how approval_tasks is read.
+--
+-- Uses CREATE/DROP INDEX CONCURRENTLY so writers are not blocked; psql runs
+-- each statement in its own transaction, do not wrap this file in BEGIN/COMMIT.
+--   psql -h 127.0.0.1 -p 5432 -U appuser -d appdb -f db/migrations/001_query_shaped_indexes.sql
+--
+-- Every token read and write goes through task_id (the primary key), so the
+-- btree on task_token (~1 KB per entry) only cost write amplification.
+-- idx_approval_tasks_qid stays: it backs the ON DELETE CASCADE from questions.
+
+-- Assessor inbox: WHERE assessor_email = ? AND status = ? ORDER BY created_at.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_approval_tasks_assessor_status_created
+  ON approval_tasks (assessor_email, status, created_at);
+
+-- Sweeps over open work (oldest pending first); only the small PENDING slice is indexed.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_approval_tasks_pending_created
+  ON approval_tasks (created_at, task_id) WHERE status = 'PENDING';
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_approval_tasks_token;
@@ -0,0 +1,8 @@
+-- The inbox pages by (created_at, task_id); with task_id in the index a page
+-- is a single range scan and ties on created_at need no extra sort.
+-- Same rules as 001: CONCURRENTLY, no surrounding transaction.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_approval_tasks_inbox
+  ON approval_tasks (assessor_email, status, created_at, task_id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_approval_tasks_assessor_status_created;
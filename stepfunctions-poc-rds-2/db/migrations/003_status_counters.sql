@@ -0,0 +1,55 @@
+-- Per-assessor, per-day task counts by status, kept current by a trigger on
+-- approval_tasks, so every writer (create_request, finalize, bulk decisions)
+-- updates them in its own transaction. "day" is the task's created_at date;
+-- a task moves between status rows as it is decided.
+-- Drift is corrected by the reconcile_counts job.
+
+CREATE TABLE IF NOT EXISTS approval_task_counts (
+  assessor_email TEXT NOT NULL,
+  day DATE NOT NULL,
+  status TEXT NOT NULL,
+  task_count BIGINT NOT NULL,
+  PRIMARY KEY (assessor_email, day, status)
+);
+CREATE INDEX IF NOT EXISTS idx_approval_task_counts_day ON approval_task_counts(day);
+
+CREATE OR REPLACE FUNCTION approval_task_counts_apply() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE approval_task_counts SET task_count = task_count - 1
+    WHERE assessor_email = OLD.assessor_email AND day = OLD.created_at::date AND status = OLD.status;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO approval_task_counts (assessor_email, day, status, task_count)
+    VALUES (NEW.assessor_email, NEW.created_at::date, NEW.status, 1)
+    ON CONFLICT (assessor_email, day, status) DO UPDATE SET task_count = approval_task_counts.task_count + 1;
+  END IF;
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_approval_task_counts ON approval_tasks;
+CREATE TRIGGER trg_approval_task_counts
+  AFTER INSERT OR DELETE ON approval_tasks
+  FOR EACH ROW EXECUTE FUNCTION approval_task_counts_apply();
+
+-- Token writes, and updates that leave the counted columns as they were, never fire it.
+DROP TRIGGER IF EXISTS trg_approval_task_counts_update ON approval_tasks;
+CREATE TRIGGER trg_approval_task_counts_update
+  AFTER UPDATE OF status, assessor_email, created_at ON approval_tasks
+  FOR EACH ROW
+  WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.assessor_email IS DISTINCT FROM NEW.assessor_email
+        OR OLD.created_at::date IS DISTINCT FROM NEW.created_at::date)
+  EXECUTE FUNCTION approval_task_counts_apply();
+
+-- Lets the reconciliation job read one day range without a full scan (cheap on an append-mostly column).
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_created_brin ON approval_tasks USING brin (created_at);
+
+-- Backfill. Writers are blocked while this runs; on very large tables skip it
+-- and let reconcile_counts fill the history in batches instead.
+BEGIN;
+LOCK TABLE approval_tasks IN SHARE ROW EXCLUSIVE MODE;
+DELETE FROM approval_task_counts;
+INSERT INTO approval_task_counts (assessor_email, day, status, task_count)
+SELECT assessor_email, created_at::date, status, count(*) FROM approval_tasks GROUP BY 1, 2, 3;
+COMMIT;
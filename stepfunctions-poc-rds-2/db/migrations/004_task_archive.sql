@@ -0,0 +1,51 @@
+-- Archive tables for finalized tasks and their questions, filled by the
+-- archive_tasks job. Rows keep their original columns plus archived_at, and
+-- have no foreign keys, so archived history never blocks writes to the hot
+-- tables.
+
+CREATE TABLE IF NOT EXISTS questions_archive (
+  question_id VARCHAR(36) PRIMARY KEY,
+  title TEXT NOT NULL,
+  content TEXT,
+  created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+  archived_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS approval_tasks_archive (
+  task_id VARCHAR(36) PRIMARY KEY,
+  question_id VARCHAR(36) NOT NULL,
+  assessor_email TEXT NOT NULL,
+  status TEXT NOT NULL,
+  task_token TEXT NULL,
+  comments TEXT NULL,
+  created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+  updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+  archived_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_archive_qid ON approval_tasks_archive(question_id);
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_archive_created_brin ON approval_tasks_archive USING brin (created_at);
+
+-- Archive candidates: finalized rows, oldest decision first. Small, since only
+-- rows waiting for archival are in it.
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_finalized ON approval_tasks(updated_at) WHERE status <> 'PENDING';
+
+-- Deletes made by the archive job (which sets approval.archiving for its
+-- transaction) leave approval_task_counts alone, so per-day stats keep
+-- counting archived tasks. reconcile_counts counts both tables to match.
+CREATE OR REPLACE FUNCTION approval_task_counts_apply() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' AND current_setting('approval.archiving', true) = 'on' THEN
+    RETURN NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE approval_task_counts SET task_count = task_count - 1
+    WHERE assessor_email = OLD.assessor_email AND day = OLD.created_at::date AND status = OLD.status;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO approval_task_counts (assessor_email, day, status, task_count)
+    VALUES (NEW.assessor_email, NEW.created_at::date, NEW.status, 1)
+    ON CONFLICT (assessor_email, day, status) DO UPDATE SET task_count = approval_task_counts.task_count + 1;
+  END IF;
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
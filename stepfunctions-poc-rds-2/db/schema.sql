@@ -1,3 +1,6 @@
+-- questions and approval_tasks can instead be range-partitioned by month on created_at: after
+-- this file, run the partition_manager function's migrate and swap actions (see README). Do not
+-- re-run this file on a database that has been switched over.
 CREATE TABLE IF NOT EXISTS questions (
   question_id VARCHAR(36) PRIMARY KEY,
   title TEXT NOT NULL,
@@ -16,5 +19,76 @@ CREATE TABLE IF NOT EXISTS approval_tasks (
   updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
 );
 
-CREATE INDEX IF NOT EXISTS idx_approval_tasks_token ON approval_tasks(task_token);
+-- Indexes follow the query shapes; see db/migrations/ for upgrading existing databases.
 CREATE INDEX IF NOT EXISTS idx_approval_tasks_qid ON approval_tasks(question_id);
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_inbox ON approval_tasks(assessor_email, status, created_at, task_id);
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_pending_created ON approval_tasks(created_at, task_id) WHERE status = 'PENDING';
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_created_brin ON approval_tasks USING brin (created_at);
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_finalized ON approval_tasks(updated_at) WHERE status <> 'PENDING';
+
+-- Finalized tasks and their questions, moved here by the archive_tasks job (see migrations/004_task_archive.sql).
+CREATE TABLE IF NOT EXISTS questions_archive (
+  question_id VARCHAR(36) PRIMARY KEY,
+  title TEXT NOT NULL,
+  content TEXT,
+  created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+  archived_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS approval_tasks_archive (
+  task_id VARCHAR(36) PRIMARY KEY,
+  question_id VARCHAR(36) NOT NULL,
+  assessor_email TEXT NOT NULL,
+  status TEXT NOT NULL,
+  task_token TEXT NULL,
+  comments TEXT NULL,
+  created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+  updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+  archived_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_archive_qid ON approval_tasks_archive(question_id);
+CREATE INDEX IF NOT EXISTS idx_approval_tasks_archive_created_brin ON approval_tasks_archive USING brin (created_at);
+
+-- Status counters per assessor and day, maintained by trigger (see migrations/003_status_counters.sql).
+-- Archival deletes leave them alone, so archived tasks stay counted.
+CREATE TABLE IF NOT EXISTS approval_task_counts (
+  assessor_email TEXT NOT NULL,
+  day DATE NOT NULL,
+  status TEXT NOT NULL,
+  task_count BIGINT NOT NULL,
+  PRIMARY KEY (assessor_email, day, status)
+);
+CREATE INDEX IF NOT EXISTS idx_approval_task_counts_day ON approval_task_counts(day);
+
+CREATE OR REPLACE FUNCTION approval_task_counts_apply() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' AND current_setting('approval.archiving', true) = 'on' THEN
+    RETURN NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE approval_task_counts SET task_count = task_count - 1
+    WHERE assessor_email = OLD.assessor_email AND day = OLD.created_at::date AND status = OLD.status;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO approval_task_counts (assessor_email, day, status, task_count)
+    VALUES (NEW.assessor_email, NEW.created_at::date, NEW.status, 1)
+    ON CONFLICT (assessor_email, day, status) DO UPDATE SET task_count = approval_task_counts.task_count + 1;
+  END IF;
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_approval_task_counts ON approval_tasks;
+CREATE TRIGGER trg_approval_task_counts
+  AFTER INSERT OR DELETE ON approval_tasks
+  FOR EACH ROW EXECUTE FUNCTION approval_task_counts_apply();
+
+-- Token writes, and updates that leave the counted columns as they were, never fire it.
+DROP TRIGGER IF EXISTS trg_approval_task_counts_update ON approval_tasks;
+CREATE TRIGGER trg_approval_task_counts_update
+  AFTER UPDATE OF status, assessor_email, created_at ON approval_tasks
+  FOR EACH ROW
+  WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.assessor_email IS DISTINCT FROM NEW.assessor_email
+        OR OLD.created_at::date IS DISTINCT FROM NEW.created_at::date)
+  EXECUTE FUNCTION approval_task_counts_apply();
+
@@ -0,0 +1,99 @@
+import os, time, datetime as dt
+from common.db_helper import db_connection
+from common import jsonlog
+
+log = jsonlog.get_logger("archive_tasks")
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+TIME_BUDGET_SECONDS = float(os.getenv("ARCHIVE_TIME_BUDGET_SECONDS", "240"))
+SAFETY_MARGIN_MS = 15000    # left for the last batch to commit before Lambda's timeout
+
+def _now(): return dt.datetime.utcnow()
+
+# Moves one batch of finalized tasks, oldest decision first. Rows locked by a finalize or
+# decision in flight are skipped rather than waited for; a later batch or run picks them up.
+# A task is never updated before it is created, so the created_at bounds change no result;
+# they let a partitioned approval_tasks skip the recent partitions. The ids go to the DELETE
+# as an array so every partition is probed by primary key instead of hash-joined in full.
+# The cutoff is a UTC timestamp like the columns, so it does not depend on the session TimeZone.
+MOVE_TASKS_SQL = """
+    WITH picked AS (
+        SELECT task_id FROM approval_tasks
+        WHERE status <> 'PENDING' AND updated_at < %(cutoff)s
+          AND created_at < %(cutoff)s
+        ORDER BY updated_at LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    ), moved AS (
+        DELETE FROM approval_tasks t
+        WHERE t.task_id = ANY(ARRAY(SELECT task_id FROM picked))
+          AND t.created_at < %(cutoff)s
+        RETURNING t.*
+    ), archived AS (
+        INSERT INTO approval_tasks_archive
+            (task_id, question_id, assessor_email, status, task_token, comments, created_at, updated_at)
+        SELECT task_id, question_id, assessor_email, status, task_token, comments, created_at, updated_at FROM moved
+        ON CONFLICT (task_id) DO NOTHING
+    )
+    SELECT count(*), array_agg(DISTINCT question_id) FROM moved
+"""
+
+# A separate statement, so its snapshot no longer has the tasks deleted above: a question
+# moves once no task left in approval_tasks refers to it.
+MOVE_QUESTIONS_SQL = """
+    WITH moved AS (
+        DELETE FROM questions q
+        WHERE q.question_id = ANY(%(ids)s)
+          AND NOT EXISTS (SELECT 1 FROM approval_tasks t WHERE t.question_id = q.question_id)
+        RETURNING q.*
+    ), archived AS (
+        INSERT INTO questions_archive (question_id, title, content, created_at)
+        SELECT question_id, title, content, created_at FROM moved
+        ON CONFLICT (question_id) DO NOTHING
+    )
+    SELECT count(*) FROM moved
+"""
+
+def archive_batch(cur, cutoff, limit):
+    """Move one batch in the caller's transaction; returns (tasks moved, questions moved).
+
+    Only tasks decided before ``cutoff``, a naive UTC timestamp, are moved. approval.archiving
+    tells the counter trigger to leave approval_task_counts alone, so the per-day stats keep
+    counting archived tasks and the batch takes no counter locks.
+    """
+    cur.execute("SET LOCAL approval.archiving = 'on'")
+    cur.execute(MOVE_TASKS_SQL, {"cutoff": cutoff, "limit": limit})
+    tasks, question_ids = cur.fetchone()
+    if not tasks: return 0, 0
+    cur.execute(MOVE_QUESTIONS_SQL, {"ids": question_ids})
+    return tasks, cur.fetchone()[0]
+
+def lambda_handler(event, context):
+    """Scheduled: archive tasks finalized more than ARCHIVE_AFTER_DAYS ago in BATCH_SIZE batches.
+
+    Each batch commits on its own. The run stops when a batch comes back short, when the
+    time budget is spent, or when Lambda's remaining time drops under the safety margin.
+    """
+    jsonlog.start(context)
+    event = event if isinstance(event, dict) else {}
+    days = int(event.get("archiveAfterDays") or ARCHIVE_AFTER_DAYS)
+    limit = max(1, int(event.get("batchSize") or BATCH_SIZE))
+    budget = float(event.get("timeBudgetSeconds") or TIME_BUDGET_SECONDS)
+    deadline = time.monotonic() + budget
+    cutoff = _now() - dt.timedelta(days=days)
+    tasks, questions, batches, done = 0, 0, 0, False
+    with db_connection() as conn:
+        while time.monotonic() < deadline and (context is None or context.get_remaining_time_in_millis() > SAFETY_MARGIN_MS):
+            started = time.monotonic()
+            with conn, conn.cursor() as cur:
+                t, q = archive_batch(cur, cutoff, limit)
+            tasks, questions, batches = tasks + t, questions + q, batches + 1
+            log.debug("archive batch", tasks=t, questions=q, ms=round((time.monotonic() - started) * 1000, 1))
+            if t < limit:
+                done = True
+                break
+    if done:
+        log.info("archival finished", batches=batches, tasks=tasks, questions=questions, archiveAfterDays=days)
+    else:
+        log.warning("archival stopped at time budget", batches=batches, tasks=tasks, questions=questions, archiveAfterDays=days)
+    return {"batches":batches,"tasks":tasks,"questions":questions,"done":done}
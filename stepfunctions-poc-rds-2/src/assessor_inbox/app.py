@@ -0,0 +1,71 @@
+import os, json, base64, datetime as dt
+from urllib.parse import unquote
+from common.db_helper import db_connection
+from common import jsonlog
+
+log = jsonlog.get_logger("assessor_inbox")
+
+DEFAULT_LIMIT = int(os.getenv("INBOX_PAGE_SIZE", "25"))
+MAX_LIMIT = int(os.getenv("INBOX_MAX_PAGE_SIZE", "100"))
+STATUSES = {"PENDING","APPROVED","REJECTED","TIMED_OUT","FAILED"}
+_EPOCH = dt.datetime(1970, 1, 1)
+
+# Keyset page: rows strictly after the cursor's (created_at, task_id), in index order. The plain
+# created_at bound repeats the row comparison so partitioned tables can skip older partitions.
+PAGE_SQL = """
+    SELECT t.task_id, t.question_id, q.title, t.status, t.comments, t.created_at, t.updated_at
+    FROM approval_tasks t JOIN questions q ON q.question_id = t.question_id
+    WHERE t.assessor_email=%s AND t.status=%s AND (t.created_at, t.task_id) > (%s, %s) AND t.created_at >= %s
+    ORDER BY t.created_at, t.task_id
+    LIMIT %s
+"""
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at, task_id):
+    """(created_at, task_id) -> short URL-safe token: hex microseconds since epoch + '.' + task_id."""
+    micros = (created_at - _EPOCH) // dt.timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros:x}.{task_id}".encode()).rstrip(b"=").decode()
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        micros, task_id = raw.split(".", 1)
+        return _EPOCH + dt.timedelta(microseconds=int(micros, 16)), task_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor("invalid cursor") from e
+
+def fetch_page(cur, email, status, limit, cursor=None):
+    """One page of tasks; returns (tasks, next cursor or None). Fetches limit+1 rows to know if more exist."""
+    after = decode_cursor(cursor) if cursor else (_EPOCH - dt.timedelta(days=1), "")
+    cur.execute(PAGE_SQL, (email, status, after[0], after[1], after[0], limit + 1))
+    rows = cur.fetchall()
+    tasks = [{"taskId":r[0],"questionId":r[1],"title":r[2],"status":r[3],"comments":r[4],
+              "createdAt":r[5].isoformat(),"updatedAt":r[6].isoformat()} for r in rows[:limit]]
+    last = rows[limit - 1] if len(rows) > limit else None
+    return tasks, (encode_cursor(last[5], last[0]) if last else None)
+
+def lambda_handler(event, context):
+    jsonlog.start(context)
+    email = unquote((event.get("pathParameters") or {}).get("email") or "").strip()
+    qs = event.get("queryStringParameters") or {}
+    status = (qs.get("status") or "PENDING").upper()
+    if not email:
+        return {"statusCode":400,"body":json.dumps({"error":"email is required"})}
+    if status not in STATUSES:
+        return {"statusCode":400,"body":json.dumps({"error":f"status must be one of {sorted(STATUSES)}"})}
+    try:
+        limit = max(1, min(int(qs.get("limit") or DEFAULT_LIMIT), MAX_LIMIT))
+    except ValueError:
+        return {"statusCode":400,"body":json.dumps({"error":"limit must be an integer"})}
+
+    try:
+        with db_connection() as conn:
+            with conn, conn.cursor() as cur:
+                tasks, next_cursor = fetch_page(cur, email, status, limit, qs.get("cursor"))
+    except InvalidCursor as e:
+        return {"statusCode":400,"body":json.dumps({"error":str(e)})}
+    log.debug("inbox page", status=status, returned=len(tasks), more=next_cursor is not None)
+    return {"statusCode":200,"headers":{"Content-Type":"application/json"},
+            "body":json.dumps({"tasks":tasks,"nextCursor":next_cursor})}
@@ -0,0 +1,110 @@
+import os, json, uuid, datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from psycopg2.extras import execute_values
+from common.aws_clients import get_client
+from common.db_helper import db_connection
+from common.throttle import AdaptiveLimit, THROTTLE_ERRORS, backoff
+from common import jsonlog
+
+log = jsonlog.get_logger("bulk_create")
+
+SM_ARN = os.environ["STATE_MACHINE_ARN"]
+MAX_BULK_CREATE = int(os.getenv("MAX_BULK_CREATE", "1000"))
+START_CONCURRENCY = int(os.getenv("START_CONCURRENCY", "16"))
+START_MAX_ATTEMPTS = int(os.getenv("START_MAX_ATTEMPTS", "6"))
+
+def _now(): return dt.datetime.utcnow()
+
+def _parse(body):
+    items = body.get("requests") if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        raise ValueError("body must be a non-empty list of requests or {\"requests\": [...]}")
+    if len(items) > MAX_BULK_CREATE:
+        raise ValueError(f"at most {MAX_BULK_CREATE} requests per call")
+    parsed = []
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        title = str(item.get("title") or "").strip()
+        assessor_email = str(item.get("assessorEmail") or "").strip()
+        parsed.append({"title":title,"content":str(item.get("content") or "").strip(),"assessorEmail":assessor_email,
+                       "error":None if title and assessor_email else "title and assessorEmail are required"})
+    return parsed
+
+def _insert(items):
+    """Insert every question and task in one transaction, two multi-row statements in all."""
+    now = _now()
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            execute_values(cur, "INSERT INTO questions (question_id,title,content,created_at) VALUES %s",
+                           [(it["questionId"], it["title"], it["content"], now) for it in items],
+                           page_size=len(items))
+            execute_values(cur, """
+                INSERT INTO approval_tasks (task_id,question_id,assessor_email,status,created_at,updated_at) VALUES %s
+            """, [(it["taskId"], it["questionId"], it["assessorEmail"], "PENDING", now, now) for it in items],
+                page_size=len(items))
+
+def _fail(task_ids):
+    """Tasks whose execution never started would wait forever; close them so they stop counting as pending."""
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute("UPDATE approval_tasks SET status='FAILED', updated_at=%s WHERE task_id = ANY(%s) AND status='PENDING'",
+                        (_now(), list(task_ids)))
+
+def lambda_handler(event, context):
+    jsonlog.start(context)
+    body = event.get("body") or "{}"
+    try:
+        items = _parse(json.loads(body) if isinstance(body, str) else body)
+    except ValueError as e:
+        return {"statusCode":400,"body":json.dumps({"error":str(e)})}
+
+    results = {i: {"status":"invalid","error":it["error"]} for i, it in enumerate(items) if it["error"]}
+    valid = {i: it for i, it in enumerate(items) if not it["error"]}
+    for it in valid.values():
+        it["questionId"], it["taskId"] = str(uuid.uuid4()), str(uuid.uuid4())
+    if valid:
+        _insert(list(valid.values()))
+
+    sfn, limit = get_client("stepfunctions"), AdaptiveLimit(START_CONCURRENCY)
+    def start(i):
+        it = valid[i]
+        ids = {"taskId":it["taskId"],"questionId":it["questionId"]}
+        # Named after the task so a retried call maps onto the same execution instead of starting another.
+        payload = {"taskId":it["taskId"],"title":it["title"],"content":it["content"],"assessorEmail":it["assessorEmail"]}
+        for attempt in range(START_MAX_ATTEMPTS):
+            try:
+                with limit:
+                    resp = sfn.start_execution(stateMachineArn=SM_ARN, name=f"approval-{it['taskId']}",
+                                               input=json.dumps(payload))
+                limit.succeeded()
+                return i, dict(ids, status="started", executionArn=resp["executionArn"])
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code in THROTTLE_ERRORS and attempt < START_MAX_ATTEMPTS - 1:
+                    limit.throttled()
+                    backoff(attempt)
+                    continue
+                return i, dict(ids, status="failed", error=code)
+            except Exception as e:
+                # A timeout may come after the service started the execution, so this is not a failure:
+                # retrying under the same name and input returns that execution instead of a second one.
+                if attempt < START_MAX_ATTEMPTS - 1:
+                    backoff(attempt)
+                    continue
+                # Still PENDING: if the execution did start it will claim the task as usual.
+                return i, dict(ids, status="unknown", error=type(e).__name__)
+
+    if valid:
+        with ThreadPoolExecutor(max_workers=min(START_CONCURRENCY, len(valid))) as pool:
+            results.update(pool.map(start, valid))
+    unstarted = [r["taskId"] for r in results.values() if r["status"]=="failed"]
+    if unstarted:
+        _fail(unstarted)
+    ordered = [results[i] for i in range(len(items))]
+    unknown = sum(r["status"]=="unknown" for r in ordered)
+    started = len(valid) - len(unstarted) - unknown
+    log.info("bulk create", requested=len(items), created=len(valid), started=started, unknown=unknown)
+    return {"statusCode":200 if started==len(items) else 207,
+            "body":json.dumps({"started":started,"failed":len(items)-started-unknown,"unknown":unknown,
+                               "results":ordered})}
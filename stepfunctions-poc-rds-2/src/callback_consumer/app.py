@@ -1,35 +1,76 @@
 import json, os, datetime as dt
-from common.db_helper import get_db_connection
-from common.emailer import send_email
+from psycopg2.extras import execute_values
+from common.db_helper import db_connection
+from common.emailer import send_email_batch
+from common import jsonlog
+
+log = jsonlog.get_logger("callback_consumer")
 
 APP_BASE_URL = os.getenv("APP_BASE_URL", "https://example.com")
 def _now(): return dt.datetime.utcnow()
 
+def _decode(rec):
+    body = rec["body"]
+    try: payload = json.loads(body)
+    except json.JSONDecodeError: payload = json.loads(json.loads(body))
+    if isinstance(payload, str): payload = json.loads(payload)   # States.JsonToString double-encodes
+    return {"taskId": payload["taskId"], "assessorEmail": payload["assessorEmail"],
+            "title": payload.get("title",""), "taskToken": payload["taskToken"]}
+
+def _store_tokens(tasks):
+    """Write every task token in one statement; returns the task ids that matched a row."""
+    now = _now()
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            rows = execute_values(cur, """
+                UPDATE approval_tasks AS t SET task_token=v.token, updated_at=v.ts
+                FROM (VALUES %s) AS v(task_id, token, ts)
+                WHERE t.task_id=v.task_id
+                RETURNING t.task_id
+            """, [(t["taskId"], t["taskToken"], now) for t in tasks],
+                template="(%s,%s,%s::timestamp)", page_size=len(tasks), fetch=True)
+    return {r[0] for r in rows}
+
+def _message(task):
+    task_id, title = task["taskId"], task["title"]
+    approve = f"{APP_BASE_URL}/requests/{task_id}/decision?decision=APPROVE"
+    reject  = f"{APP_BASE_URL}/requests/{task_id}/decision?decision=REJECT"
+    subject = f"Approval required: {title}"
+    bodytxt = f"You have a pending approval task.\n\nTask ID: {task_id}\nTitle: {title}\n\nApprove: {approve}\nReject: {reject}\n"
+    return subject, bodytxt, task["assessorEmail"]
+
 def lambda_handler(event, context):
-    failures = []
+    jsonlog.start(context)
+    failed = []                      # messageIds to hand back to SQS
+    by_task = {}                     # taskId -> (messageIds, latest decoded payload)
     for rec in event.get("Records", []):
+        msg_id = rec.get("messageId","unknown")
         try:
-            body = rec["body"]
-            try: payload = json.loads(body)
-            except json.JSONDecodeError: payload = json.loads(json.loads(body))
-
-            task_id = payload["taskId"]
-            assessor_email = payload["assessorEmail"]
-            title = payload.get("title","")
-            token = payload["taskToken"]
-
-            conn = get_db_connection()
-            with conn, conn.cursor() as cur:
-                cur.execute("UPDATE approval_tasks SET task_token=%s, updated_at=%s WHERE task_id=%s",
-                            (token,_now(),task_id))
-            conn.close()
-
-            approve = f"{APP_BASE_URL}/requests/{task_id}/decision?decision=APPROVE"
-            reject  = f"{APP_BASE_URL}/requests/{task_id}/decision?decision=REJECT"
-            subject = f"Approval required: {title}"
-            bodytxt = f"You have a pending approval task.\n\nTask ID: {task_id}\nTitle: {title}\n\nApprove: {approve}\nReject: {reject}\n"
-            send_email(subject, bodytxt, assessor_email)
+            task = _decode(rec)
         except Exception as e:
-            failures.append({"itemIdentifier": rec.get("messageId","unknown")})
-    if failures: return {"batchItemFailures": failures}
+            log.warning("undecodable message", messageId=msg_id, exc=e); failed.append(msg_id); continue
+        ids, _ = by_task.get(task["taskId"], ([], None))
+        by_task[task["taskId"]] = (ids + [msg_id], task)
+
+    if by_task:
+        tasks = [task for _, task in by_task.values()]
+        try:
+            updated = _store_tokens(tasks)
+        except Exception as e:
+            log.error("storing task tokens failed", exc=e, tasks=len(tasks)); updated = set()
+        pending = []
+        for task_id, (ids, task) in by_task.items():
+            if task_id in updated: pending.append((ids, task))
+            else: failed.extend(ids)
+
+        try:
+            results = send_email_batch([_message(task) for _, task in pending])
+        except Exception as e:
+            log.error("sending notifications failed", exc=e, messages=len(pending))
+            results = [{"status": "failed"}] * len(pending)
+        for (ids, _), res in zip(pending, results):
+            if res.get("status") == "failed": failed.extend(ids)
+
+    log.info("batch processed", records=len(event.get("Records", [])), failed=len(failed))
+    if failed: return {"batchItemFailures": [{"itemIdentifier": m} for m in failed]}
     return {"status":"ok"}
@@ -1,30 +1,63 @@
 import json, uuid, datetime as dt
-from db_helper import get_db_connection
+from common.db_helper import db_connection
+from common import jsonlog
+
+log = jsonlog.get_logger("create_request")
 
 def _now(): return dt.datetime.utcnow()
 
+# Question and task in one round trip.
+INSERT_SQL = """
+    WITH q AS (
+        INSERT INTO questions (question_id,title,content,created_at) VALUES (%s,%s,%s,%s) RETURNING question_id
+    )
+    INSERT INTO approval_tasks (task_id,question_id,assessor_email,status,created_at,updated_at)
+    SELECT %s, q.question_id, %s, 'PENDING', %s, %s FROM q
+"""
+
+# Only a task bulk_create inserted and no execution has claimed yet; the stored row, not the
+# execution input, decides where the approval email goes.
+PRECREATED_SQL = """
+    SELECT t.question_id, t.assessor_email, q.title
+    FROM approval_tasks t JOIN questions q ON q.question_id = t.question_id
+    WHERE t.task_id=%s AND t.status='PENDING' AND t.task_token IS NULL
+"""
+
+def _precreated(tid):
+    """Executions started by bulk_create carry rows that already exist; pass the stored values through."""
+    if not isinstance(tid, str):
+        raise ValueError("taskId must be a string")
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute(PRECREATED_SQL, (tid,))
+            row = cur.fetchone()
+    if not row:
+        raise ValueError(f"task {tid} does not exist or is already claimed")
+    qid, assessor_email, title = row
+    return {"statusCode":200,"taskId":tid,"questionId":qid,"assessorEmail":assessor_email,"title":title}
+
 def lambda_handler(event, context):
-    body = event.get("body") or "{}"
+    jsonlog.start(context)
+    # The state machine passes its execution input straight through; API events wrap it in "body".
+    body = event.get("body") or ("{}" if "body" in event else event)
     if isinstance(body, str):
         try: body = json.loads(body)
         except json.JSONDecodeError: body = {}
+    if body.get("taskId"):
+        return _precreated(body["taskId"])
+
     title = (body.get("title") or "").strip()
     content = (body.get("content") or "").strip()
     assessor_email = (body.get("assessorEmail") or "").strip()
     if not title or not assessor_email:
-        return {"statusCode": 400, "body": json.dumps({"error":"title and assessorEmail are required"})}
+        # Raised rather than returned so the state machine's Catch routes it to FinalizeFailedCreate.
+        raise ValueError("title and assessorEmail are required")
 
-    qid, tid = str(uuid.uuid4()), str(uuid.uuid4())
-    conn = get_db_connection()
-    try:
+    qid, tid, now = str(uuid.uuid4()), str(uuid.uuid4()), _now()
+    with db_connection() as conn:
         with conn, conn.cursor() as cur:
-            cur.execute("INSERT INTO questions (question_id,title,content,created_at) VALUES (%s,%s,%s,%s)",
-                        (qid,title,content,_now()))
-            cur.execute("""
-                INSERT INTO approval_tasks (task_id,question_id,assessor_email,status,created_at,updated_at)
-                VALUES (%s,%s,%s,%s,%s,%s)
-            """,(tid,qid,assessor_email,"PENDING",_now(),_now()))
-    finally:
-        conn.close()
-
-    return {"statusCode":200,"body":json.dumps({"taskId":tid,"questionId":qid,"assessorEmail":assessor_email,"title":title})}
+            cur.execute(INSERT_SQL, (qid,title,content,now,tid,assessor_email,now,now))
+
+    log.info("request created", taskId=tid, questionId=qid)
+    # SendApprovalToQueue reads $.taskId, $.assessorEmail and $.title from this payload.
+    return {"statusCode":200,"taskId":tid,"questionId":qid,"assessorEmail":assessor_email,"title":title}
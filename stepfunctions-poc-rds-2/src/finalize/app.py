@@ -1,9 +1,13 @@
 import datetime as dt
-from common.db_helper import get_db_connection
+from common.db_helper import db_connection
+from common import jsonlog
+
+log = jsonlog.get_logger("finalize")
 
 def _now(): return dt.datetime.utcnow()
 
 def lambda_handler(event, context):
+    jsonlog.start(context)
     payload = event if isinstance(event, dict) else {}
     task_id = payload.get("taskId")
     decision = payload.get("decision","UNKNOWN")
@@ -13,12 +17,12 @@ def lambda_handler(event, context):
     status_map = {"APPROVE":"APPROVED","REJECT":"REJECTED","TIMED_OUT":"TIMED_OUT","FAILED":"FAILED"}
     new_status = status_map.get(decision, decision)
 
-    conn = get_db_connection()
-    with conn, conn.cursor() as cur:
-        cur.execute("""
-            UPDATE approval_tasks
-            SET status=%s, comments=%s, updated_at=%s, task_token=NULL
-            WHERE task_id=%s
-        """,(new_status, comments, _now(), task_id))
-    conn.close()
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE approval_tasks
+                SET status=%s, comments=%s, updated_at=%s, task_token=NULL
+                WHERE task_id=%s
+            """,(new_status, comments, _now(), task_id))
+    log.info("task finalized", taskId=task_id, status=new_status)
     return {"status":"updated","taskId":task_id,"statusSet":new_status}
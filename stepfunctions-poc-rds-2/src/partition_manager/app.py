@@ -0,0 +1,309 @@
+import os, re, time, datetime as dt
+from common.db_helper import db_connection
+from common import jsonlog
+
+log = jsonlog.get_logger("partition_manager")
+
+MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+RETAIN_MONTHS = int(os.getenv("PARTITION_RETAIN_MONTHS", "6"))
+CHUNK_SIZE = int(os.getenv("PARTITION_COPY_CHUNK", "5000"))
+TIME_BUDGET_SECONDS = float(os.getenv("PARTITION_TIME_BUDGET_SECONDS", "600"))
+LOCK_TIMEOUT = os.getenv("PARTITION_LOCK_TIMEOUT", "5s")
+SAFETY_MARGIN_MS = 30000
+
+# Both tables are range-partitioned by month on created_at. questions goes first when copying
+# and last when archiving. Each entry: table, key, archive table.
+TABLES = (("questions", "question_id", "questions_archive"),
+          ("approval_tasks", "task_id", "approval_tasks_archive"))
+_PARTITION = re.compile(r"^(?P<base>[a-z_]+)_y(?P<y>\d{4})m(?P<m>\d{2})$")
+
+# The partitioned layout, created next to the live tables as *_new and swapped in by swap().
+# LIKE keeps the columns, defaults and CHECK constraints in step with schema.sql. The primary
+# keys must include created_at, and there is no foreign key from tasks to questions: a
+# partitioned target would need created_at in it too. create_request and bulk_create write both
+# rows in one transaction, and archive_tasks and maintain() remove them together.
+SHADOW_DDL = (
+    "CREATE TABLE questions_new (LIKE questions INCLUDING DEFAULTS INCLUDING CONSTRAINTS,"
+    " PRIMARY KEY (question_id, created_at)) PARTITION BY RANGE (created_at)",
+    "CREATE TABLE approval_tasks_new (LIKE approval_tasks INCLUDING DEFAULTS INCLUDING CONSTRAINTS,"
+    " PRIMARY KEY (task_id, created_at)) PARTITION BY RANGE (created_at)",
+    "CREATE INDEX idx_approval_tasks_part_qid ON approval_tasks_new(question_id)",
+    "CREATE INDEX idx_approval_tasks_part_inbox ON approval_tasks_new(assessor_email, status, created_at, task_id)",
+    "CREATE INDEX idx_approval_tasks_part_pending_created ON approval_tasks_new(created_at, task_id) WHERE status = 'PENDING'",
+    "CREATE INDEX idx_approval_tasks_part_finalized ON approval_tasks_new(updated_at) WHERE status <> 'PENDING'",
+    "CREATE TABLE IF NOT EXISTS partition_migration ("
+    " table_name TEXT PRIMARY KEY, last_key TEXT NOT NULL DEFAULT '', done BOOLEAN NOT NULL DEFAULT false)",
+)
+
+# Same triggers as db/schema.sql, recreated on the partitioned approval_tasks by swap().
+COUNTER_TRIGGERS = (
+    "CREATE TRIGGER trg_approval_task_counts AFTER INSERT OR DELETE ON approval_tasks"
+    " FOR EACH ROW EXECUTE FUNCTION approval_task_counts_apply()",
+    "CREATE TRIGGER trg_approval_task_counts_update AFTER UPDATE OF status, assessor_email, created_at ON approval_tasks"
+    " FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.assessor_email IS DISTINCT FROM NEW.assessor_email"
+    " OR OLD.created_at::date IS DISTINCT FROM NEW.created_at::date) EXECUTE FUNCTION approval_task_counts_apply()",
+)
+
+class MigrationError(Exception):
+    """The online migration cannot run in the current state of the database."""
+
+def month_start(day):
+    return dt.date(day.year, day.month, 1)
+
+def add_months(month, n):
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return dt.date(y, m + 1, 1)
+
+def partition_name(base, month):
+    return f"{base}_y{month.year:04d}m{month.month:02d}"
+
+def is_partitioned(cur, table):
+    cur.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", (table,))
+    return cur.fetchone()[0]
+
+def list_partitions(cur, parent):
+    """[(name, month, detach pending)] for the monthly partitions of parent, oldest first."""
+    cur.execute("""
+        SELECT c.relname, i.inhdetachpending FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+    """, (parent,))
+    found = []
+    for name, pending in cur.fetchall():
+        m = _PARTITION.match(name)
+        if m:
+            found.append((name, dt.date(int(m["y"]), int(m["m"]), 1), pending))
+    return sorted(found, key=lambda p: p[1])
+
+def ensure_partitions(cur, parent, base, first, last):
+    """Create the missing monthly partitions of parent from month first to month last inclusive.
+
+    Each is created as a plain table and then attached, which takes a SHARE UPDATE EXCLUSIVE
+    lock on parent instead of the ACCESS EXCLUSIVE one of CREATE TABLE ... PARTITION OF; an
+    empty table attaches without a long validation scan.
+    """
+    existing = {month for _, month, _ in list_partitions(cur, parent)}
+    created, month = [], first
+    while month <= last:
+        if month not in existing:
+            name = partition_name(base, month)
+            cur.execute(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            cur.execute(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+                        (month, add_months(month, 1)))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+def _still_needed(cur, table, name):
+    """Why partition name of table must stay attached, or None."""
+    if table == "approval_tasks":
+        cur.execute(f"SELECT 1 FROM {name} WHERE status = 'PENDING' LIMIT 1")
+        return "pending tasks" if cur.fetchone() else None
+    cur.execute(f"SELECT 1 FROM {name} q WHERE EXISTS "
+                "(SELECT 1 FROM approval_tasks t WHERE t.question_id = q.question_id) LIMIT 1")
+    return "questions with live tasks" if cur.fetchone() else None
+
+def archive_partition(conn, table, archive, name, pending):
+    """Detach partition name of table, copy its rows into archive and drop it; returns rows archived.
+
+    DETACH ... CONCURRENTLY cannot run inside a transaction, so that step uses autocommit; a
+    detach interrupted earlier (pending) is completed with FINALIZE instead. Dropping the table
+    fires no row triggers, so approval_task_counts keeps counting the archived tasks.
+    """
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT set_config('lock_timeout', %s, false)", (LOCK_TIMEOUT,))
+            try:
+                cur.execute(f"ALTER TABLE {table} DETACH PARTITION {name} " + ("FINALIZE" if pending else "CONCURRENTLY"))
+            finally:
+                cur.execute("RESET lock_timeout")
+    finally:
+        conn.autocommit = False
+    with conn, conn.cursor() as cur:
+        cur.execute(f"SELECT * FROM {archive} LIMIT 0")
+        cols = ", ".join(d[0] for d in cur.description if d[0] != "archived_at")
+        cur.execute(f"INSERT INTO {archive} ({cols}) SELECT {cols} FROM {name} ON CONFLICT DO NOTHING")
+        rows = cur.rowcount
+        cur.execute(f"DROP TABLE {name}")
+    return rows
+
+def maintain(conn, today, ahead=MONTHS_AHEAD, retain=RETAIN_MONTHS):
+    """Pre-create partitions up to ahead months out and archive those older than retain months.
+
+    A partition is only archived once nothing in it is still in use (see _still_needed); it is
+    retried on the next run. Partitions of a migration in progress (*_new) are kept covered too.
+    """
+    this_month, cutoff = month_start(today), add_months(month_start(today), -retain)
+    result = {"created": [], "archived": {}, "skipped": {}}
+    for table, _, _ in TABLES:
+        for parent in (table, table + "_new"):
+            with conn, conn.cursor() as cur:
+                if not is_partitioned(cur, parent):
+                    continue
+                cur.execute("SELECT set_config('lock_timeout', %s, true)", (LOCK_TIMEOUT,))
+                result["created"] += ensure_partitions(cur, parent, table, this_month, add_months(this_month, ahead))
+    for table, _, archive in reversed(TABLES):
+        with conn, conn.cursor() as cur:
+            old = [p for p in list_partitions(cur, table) if add_months(p[1], 1) <= cutoff] if is_partitioned(cur, table) else []
+        for name, _, pending in old:
+            with conn, conn.cursor() as cur:
+                reason = None if pending else _still_needed(cur, table, name)
+            if reason:
+                result["skipped"][name] = reason
+                continue
+            result["archived"][name] = archive_partition(conn, table, archive, name, pending)
+    return result
+
+def _columns(cur, table):
+    cur.execute("SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attnum > 0 "
+                "AND NOT attisdropped ORDER BY attnum", (table,))
+    return [r[0] for r in cur.fetchall()]
+
+def _sync_trigger(cur, table, key):
+    """Mirror every write on table into table_new while the copy runs.
+
+    An upsert rather than a plain insert: a row the copy has inserted but not yet committed
+    makes the mirrored write wait and then overwrite it, never fail or be overwritten.
+    """
+    cols = _columns(cur, table)
+    conflict = f"{key}, created_at"
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION {table}_partition_sync() RETURNS trigger AS $$
+        BEGIN
+          IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.created_at IS DISTINCT FROM NEW.created_at) THEN
+            DELETE FROM {table}_new WHERE {key} = OLD.{key} AND created_at = OLD.created_at;
+          END IF;
+          IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO {table}_new SELECT NEW.*
+            ON CONFLICT ({conflict}) DO UPDATE SET {", ".join(f"{c} = EXCLUDED.{c}" for c in cols)};
+          END IF;
+          RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""")
+    cur.execute(f"CREATE TRIGGER trg_{table}_partition_sync AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION {table}_partition_sync()")
+
+def prepare(conn, today, ahead=MONTHS_AHEAD):
+    """Create the *_new tables with partitions for every existing row, and the sync triggers.
+
+    All in one transaction: the triggers wait for in-flight writes to the live tables, so each
+    row is either visible to the copy or mirrored by a trigger. Does nothing if already prepared.
+    """
+    with conn, conn.cursor() as cur:
+        if is_partitioned(cur, "approval_tasks"):
+            raise MigrationError("approval_tasks is already partitioned")
+        cur.execute("SELECT to_regclass('approval_tasks_new') IS NOT NULL")
+        if cur.fetchone()[0]:
+            return False
+        cur.execute("SELECT set_config('lock_timeout', %s, true)", (LOCK_TIMEOUT,))
+        for stmt in SHADOW_DDL:
+            cur.execute(stmt)
+        cur.execute("SELECT least((SELECT min(created_at) FROM questions), (SELECT min(created_at) FROM approval_tasks))")
+        oldest = cur.fetchone()[0] or today
+        for table, key, _ in TABLES:
+            ensure_partitions(cur, table + "_new", table, month_start(oldest), add_months(month_start(today), ahead))
+            _sync_trigger(cur, table, key)
+            cur.execute("INSERT INTO partition_migration (table_name) VALUES (%s) ON CONFLICT DO NOTHING", (table,))
+    return True
+
+def copy_chunk(cur, table, key, after, limit):
+    """Copy the next limit rows of table by primary key; returns (rows copied, last key).
+
+    FOR KEY SHARE keeps a row from being deleted until its copy commits (the delete's mirrored
+    write then removes it) without blocking updates, which the sync trigger mirrors anyway.
+    """
+    cur.execute(f"""
+        WITH chunk AS (
+            SELECT * FROM {table} WHERE {key} > %s ORDER BY {key} LIMIT %s FOR KEY SHARE
+        ), copied AS (
+            INSERT INTO {table}_new SELECT * FROM chunk ON CONFLICT DO NOTHING
+        )
+        SELECT count(*), max({key}) FROM chunk
+    """, (after, limit))
+    return cur.fetchone()
+
+def migrate(conn, today, limit, has_time):
+    """Prepare if needed, then copy chunks while has_time() until both tables are copied.
+
+    Progress is kept in partition_migration, so each invocation continues where the last stopped.
+    """
+    prepare(conn, today)
+    copied = {}
+    for table, key, _ in TABLES:
+        with conn, conn.cursor() as cur:
+            cur.execute("SELECT last_key, done FROM partition_migration WHERE table_name = %s", (table,))
+            after, done = cur.fetchone()
+        copied[table] = 0
+        while not done and has_time():
+            with conn, conn.cursor() as cur:
+                n, last = copy_chunk(cur, table, key, after, limit)
+                done, after = n < limit, last or after
+                cur.execute("UPDATE partition_migration SET last_key = %s, done = %s WHERE table_name = %s",
+                            (after, done, table))
+            copied[table] += n
+        if not done:
+            return copied, False
+    return copied, True
+
+def swap(conn):
+    """Put the partitioned tables in place of the copied ones in one short transaction.
+
+    The old tables stay as *_unpartitioned (with their foreign key and the history up to now)
+    until they are dropped by hand. Fails, changing nothing, if the copy has not finished.
+    """
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('partition_migration') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            raise MigrationError("nothing to swap; run the migrate action first")
+        cur.execute("SELECT count(*) FILTER (WHERE done), count(*) FROM partition_migration")
+        done, total = cur.fetchone()
+        if total != len(TABLES) or done != total:
+            raise MigrationError("the copy has not finished; run the migrate action until it reports done")
+        cur.execute("SELECT set_config('lock_timeout', %s, true)", (LOCK_TIMEOUT,))
+        cur.execute("LOCK TABLE questions, approval_tasks IN ACCESS EXCLUSIVE MODE")
+        cur.execute("DROP TRIGGER IF EXISTS trg_approval_task_counts ON approval_tasks")
+        cur.execute("DROP TRIGGER IF EXISTS trg_approval_task_counts_update ON approval_tasks")
+        for table, _, _ in TABLES:
+            cur.execute(f"DROP TRIGGER trg_{table}_partition_sync ON {table}")
+            cur.execute(f"DROP FUNCTION {table}_partition_sync()")
+            cur.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+            cur.execute(f"ALTER TABLE {table}_unpartitioned RENAME CONSTRAINT {table}_pkey TO {table}_unpartitioned_pkey")
+            cur.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+            cur.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {table}_new_pkey TO {table}_pkey")
+        for stmt in COUNTER_TRIGGERS:
+            cur.execute(stmt)
+        cur.execute("DROP TABLE partition_migration")
+
+def lambda_handler(event, context):
+    """Scheduled with no action: maintain(). {"action":"migrate"} copies for up to the time
+    budget and reports done once both tables are copied; {"action":"swap"} then switches over.
+    """
+    jsonlog.start(context)
+    event = event if isinstance(event, dict) else {}
+    action = event.get("action") or "maintain"
+    today = dt.datetime.utcnow().date()
+    with db_connection() as conn:
+        if action == "maintain":
+            with conn, conn.cursor() as cur:
+                partitioned = any(is_partitioned(cur, t) for t in ("approval_tasks", "approval_tasks_new"))
+            if not partitioned:
+                log.info("tables are not partitioned; nothing to maintain")
+                return {"action":action,"partitioned":False}
+            result = maintain(conn, today, int(event.get("monthsAhead") or MONTHS_AHEAD),
+                              int(event.get("retainMonths") or RETAIN_MONTHS))
+            if result["skipped"]:
+                log.warning("partitions kept past retention", skipped=result["skipped"])
+            log.info("partitions maintained", created=result["created"], archived=result["archived"])
+            return dict(result, action=action)
+        if action == "migrate":
+            budget_end = time.monotonic() + float(event.get("timeBudgetSeconds") or TIME_BUDGET_SECONDS)
+            has_time = lambda: time.monotonic() < budget_end and (
+                context is None or context.get_remaining_time_in_millis() > SAFETY_MARGIN_MS)
+            copied, done = migrate(conn, today, max(1, int(event.get("chunkSize") or CHUNK_SIZE)), has_time)
+            log.info("partition migration progress", copied=copied, done=done)
+            return {"action":action,"copied":copied,"done":done}
+        if action == "swap":
+            swap(conn)
+            log.info("partitioned tables swapped in")
+            return {"action":action,"swapped":True}
+    raise ValueError(f"unknown action {action!r}; expected maintain, migrate or swap")
@@ -1,24 +1,302 @@
 import os
 import json
+import time
+import threading
+from contextlib import contextmanager
+
 import psycopg2
-import boto3
+import psycopg2.extensions
+
+from common.aws_clients import get_client
+from common.jsonlog import get_logger
+
+log = get_logger("db_helper")
+
+# Pool tuning. Connections live at module level so they survive warm invocations.
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "4"))
+POOL_MAX_AGE = float(os.environ.get("DB_POOL_MAX_AGE_SECONDS", "1800"))
+POOL_VALIDATE_AFTER = float(os.environ.get("DB_POOL_VALIDATE_AFTER_SECONDS", "30"))
+POOL_ACQUIRE_TIMEOUT = float(os.environ.get("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", "10"))
+SECRET_TTL = float(os.environ.get("DB_SECRET_TTL_SECONDS", "300"))
+# Pool and secret-cache counters are logged on the first release and then at most this often; 0 turns it off.
+STATS_LOG_INTERVAL = float(os.environ.get("DB_STATS_LOG_INTERVAL_SECONDS", "60"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the acquire timeout."""
+
 
 def _get_secret(secret_arn: str, region: str) -> dict:
-    sm = boto3.client("secretsmanager", region_name=region)
+    sm = get_client("secretsmanager", region)
     resp = sm.get_secret_value(SecretId=secret_arn)
     if "SecretString" in resp:
         return json.loads(resp["SecretString"])
     return json.loads(resp["SecretBinary"].decode())
 
-def get_db_connection():
-    secret_arn = os.environ["DB_SECRET_ARN"]
-    region = os.environ["AWS_REGION"]
-    secret = _get_secret(secret_arn, region)
 
-    host = os.environ["DB_HOST"]
-    port = int(os.environ.get("DB_PORT", "5432"))
-    dbname = os.environ["DB_NAME"]
+class SecretCache:
+    """In-process TTL cache in front of ``GetSecretValue``.
+
+    Refreshes are single-flight: while one thread fetches, others asking for
+    the same secret wait for its result instead of issuing their own call.
+    ``invalidate`` only drops the value the caller saw, so several threads
+    reacting to the same rotation trigger one refresh between them.
+    """
+
+    def __init__(self, fetch=_get_secret, ttl=SECRET_TTL):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.Lock()         # held across a fetch, so one refresh per secret at a time
+        self._stats_lock = threading.Lock()   # counters only; a cache hit never waits for a fetch
+        self._entries = {}   # (secret_arn, region) -> (secret, expires_at)
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "refresh_seconds": 0.0, "last_refresh_seconds": 0.0}
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry and time.monotonic() < entry[1]:
+            return entry[0]
+        return None
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def get(self, secret_arn: str, region: str) -> dict:
+        key = (secret_arn, region)
+        secret = self._fresh(key)
+        if secret is not None:
+            self._count(hits=1)
+            return secret
+        with self._lock:
+            secret = self._fresh(key)
+            if secret is not None:
+                self._count(hits=1)
+                return secret
+            self._count(misses=1)
+            started = time.monotonic()
+            secret = self._fetch(secret_arn, region)
+            elapsed = time.monotonic() - started
+            self._count(refreshes=1, refresh_seconds=elapsed)
+            with self._stats_lock:
+                self.stats["last_refresh_seconds"] = elapsed
+            self._entries[key] = (secret, time.monotonic() + self.ttl)
+            return secret
+
+    def invalidate(self, secret_arn: str, region: str, stale=None):
+        with self._lock:
+            entry = self._entries.get((secret_arn, region))
+            if entry and (stale is None or entry[0] is stale):
+                del self._entries[(secret_arn, region)]
+
+
+_secrets = SecretCache()
+
+
+def _is_auth_failure(exc) -> bool:
+    msg = str(exc).lower()
+    return "password authentication failed" in msg or "pam authentication failed" in msg
+
+
+def _open(secret: dict):
+    host = os.environ.get("DB_HOST") or secret["host"]
+    port = int(os.environ.get("DB_PORT") or secret.get("port") or 5432)
+    dbname = os.environ.get("DB_NAME") or secret.get("dbname")
     user = secret.get("username") or secret.get("user")
     password = secret["password"]
 
-    return psycopg2.connect(host=host, port=port, dbname=dbname, user=user, password=password, connect_timeout=5)
+    return psycopg2.connect(host=host, port=port, dbname=dbname, user=user, password=password, connect_timeout=5,
+                            keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3)
+
+
+def _connect():
+    secret_arn = os.environ["DB_SECRET_ARN"]
+    region = os.environ["AWS_REGION"]
+    secret = _secrets.get(secret_arn, region)
+    try:
+        return _open(secret)
+    except psycopg2.OperationalError as e:
+        if not _is_auth_failure(e):
+            raise
+    # The password was probably rotated since we cached it: refresh once and retry.
+    _secrets.invalidate(secret_arn, region, stale=secret)
+    return _open(_secrets.get(secret_arn, region))
+
+
+class ConnectionPool:
+    """Small thread-safe pool of PostgreSQL connections.
+
+    Idle connections are handed out most-recently-used first. A connection is
+    checked before reuse: closed ones are dropped, ones older than ``max_age``
+    are rotated, and ones idle longer than ``validate_after`` must answer a
+    ``SELECT 1`` first. Anything that fails the check is replaced by a fresh
+    connection and counted as a reconnect.
+    """
+
+    def __init__(self, connect=_connect, max_size=POOL_MAX_SIZE, max_age=POOL_MAX_AGE,
+                 validate_after=POOL_VALIDATE_AFTER, acquire_timeout=POOL_ACQUIRE_TIMEOUT):
+        self._connect = connect
+        self.max_size = max(1, max_size)
+        self.max_age = max_age
+        self.validate_after = validate_after
+        self.acquire_timeout = acquire_timeout
+        self._cond = threading.Condition()
+        self._idle = []      # [(conn, created_at, last_used)]
+        self._created = {}   # id(conn) -> created_at, for every open connection
+        self.stats = {"hits": 0, "misses": 0, "reconnects": 0, "discarded": 0}
+
+    def _healthy(self, conn, created_at, last_used):
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if self.max_age and now - created_at > self.max_age:
+            return False
+        if now - last_used > self.validate_after:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _close(self, conn):
+        self._created.pop(id(conn), None)
+        self.stats["discarded"] += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        replaced = False
+        while True:
+            with self._cond:
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                elif len(self._created) < self.max_size:
+                    # Reserve the slot before connecting so other threads cannot overshoot max_size.
+                    slot = object()
+                    self._created[id(slot)] = None
+                    break
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        raise PoolTimeout(f"no free connection after {self.acquire_timeout}s (max_size={self.max_size})")
+                    continue
+            # Validate outside the lock; a ping must not stall other borrowers.
+            if self._healthy(conn, created_at, last_used):
+                with self._cond:
+                    self.stats["hits"] += 1
+                return conn
+            with self._cond:
+                self._close(conn)
+            replaced = True
+        try:
+            conn = self._connect()
+        finally:
+            with self._cond:
+                self._created.pop(id(slot), None)
+                self._cond.notify()
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+            self.stats["reconnects" if replaced else "misses"] += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        with self._cond:
+            created_at = self._created.get(id(conn))
+            if created_at is None:
+                return
+            if not discard and not conn.closed:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        discard = True
+            if discard or conn.closed:
+                self._close(conn)
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def closeall(self):
+        with self._cond:
+            while self._idle:
+                self._close(self._idle.pop()[0])
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection for the duration of a ``with`` block."""
+    try:
+        with get_pool().connection() as conn:
+            yield conn
+    finally:
+        log_stats()
+
+
+def get_db_connection():
+    """Borrow a pooled connection; hand it back with ``release_db_connection``."""
+    return get_pool().acquire()
+
+
+def release_db_connection(conn, discard=False):
+    get_pool().release(conn, discard=discard)
+    log_stats()
+
+
+def pool_stats() -> dict:
+    pool = get_pool()
+    with pool._cond:
+        return dict(pool.stats)
+
+
+def secret_cache_stats() -> dict:
+    with _secrets._stats_lock:
+        stats = dict(_secrets.stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+_stats_logged_at = None
+
+
+def log_stats():
+    """Log the pool and secret-cache counters if STATS_LOG_INTERVAL has passed since the last time."""
+    global _stats_logged_at
+    now = time.monotonic()
+    if not STATS_LOG_INTERVAL or (_stats_logged_at is not None and now - _stats_logged_at < STATS_LOG_INTERVAL):
+        return
+    _stats_logged_at = now
+    # Not "secretCache": the logger redacts field names that mention secrets.
+    log.info("connection stats", pool=pool_stats(), loginCache=secret_cache_stats())
@@ -1,20 +1,96 @@
 import os
 import ssl
+import time
+import random
 import smtplib
+from concurrent.futures import ThreadPoolExecutor
 from email.message import EmailMessage
-import boto3
+from botocore.exceptions import ClientError
+
+from common.aws_clients import get_client
+from common.jsonlog import get_logger
+
+log = get_logger("emailer")
+
+PUBLISH_BATCH_SIZE = 10   # SNS PublishBatch hard limit
+BATCH_CONCURRENCY = int(os.getenv("SNS_BATCH_CONCURRENCY", "4"))
+BATCH_MAX_ATTEMPTS = int(os.getenv("SNS_BATCH_MAX_ATTEMPTS", "5"))
+_RETRYABLE = {"Throttling", "ThrottlingException", "ThrottledException", "TooManyRequestsException",
+              "RequestLimitExceeded", "InternalError", "InternalErrorException", "ServiceUnavailable",
+              "KMSThrottlingException"}
+
+def _sns_client():
+    return get_client("sns")
+
+def _entry(subject: str, body: str, to_address: str) -> dict:
+    return {
+        "Subject": subject[:100],
+        "Message": f"To: {to_address}\n\n{body}",
+        "MessageAttributes": {"recipient": {"DataType": "String", "StringValue": to_address}},
+    }
+
+def _backoff(attempt: int):
+    time.sleep(min(2.0, 0.05 * (2 ** attempt)) * random.uniform(0.5, 1.0))
+
+def _publish_chunk(topic_arn: str, chunk: list) -> dict:
+    """Publish up to 10 (index, entry) pairs, retrying only throttled/failed entries. Returns {index: result}."""
+    results = {}
+    pending = {str(i): e for i, e in chunk}
+    for attempt in range(BATCH_MAX_ATTEMPTS):
+        try:
+            resp = _sns_client().publish_batch(
+                TopicArn=topic_arn,
+                PublishBatchRequestEntries=[dict(e, Id=k) for k, e in pending.items()],
+            )
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code", "Unknown")
+            if code not in _RETRYABLE or attempt == BATCH_MAX_ATTEMPTS - 1:
+                for k in pending: results[int(k)] = {"status": "failed", "error": code}
+                return results
+            _backoff(attempt)
+            continue
+        for ok in resp.get("Successful", []):
+            results[int(ok["Id"])] = {"status": "sent_via_sns", "messageId": ok.get("MessageId")}
+            pending.pop(ok["Id"], None)
+        retry = {}
+        for bad in resp.get("Failed", []):
+            if not bad.get("SenderFault") and bad.get("Code") in _RETRYABLE and attempt < BATCH_MAX_ATTEMPTS - 1:
+                retry[bad["Id"]] = pending[bad["Id"]]
+            else:
+                results[int(bad["Id"])] = {"status": "failed", "error": bad.get("Code", "Unknown")}
+        pending = retry
+        if not pending:
+            return results
+        _backoff(attempt)
+    for k in pending: results[int(k)] = {"status": "failed", "error": "RetriesExhausted"}
+    return results
+
+def send_email_batch(messages) -> list:
+    """Send many (subject, body, to_address) notifications via SNS PublishBatch.
+
+    Returns one result dict per input message, in input order, so callers can
+    map failures back to whatever produced each message.
+    """
+    messages = list(messages)
+    topic_arn = os.getenv("SNS_TOPIC_ARN")
+    if not topic_arn:
+        return [{"status": "not_configured"} for _ in messages]
+    indexed = [(i, _entry(*m)) for i, m in enumerate(messages)]
+    chunks = [indexed[i:i + PUBLISH_BATCH_SIZE] for i in range(0, len(indexed), PUBLISH_BATCH_SIZE)]
+    results = {}
+    if len(chunks) == 1:
+        results.update(_publish_chunk(topic_arn, chunks[0]))
+    elif chunks:
+        with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(chunks))) as pool:
+            for part in pool.map(lambda c: _publish_chunk(topic_arn, c), chunks):
+                results.update(part)
+    return [results[i] for i in range(len(messages))]
 
 def send_email(subject: str, body: str, to_address: str):
-    print(f"Sending email to {to_address} with subject '{subject}'")
+    log.debug("sending email to %s with subject %r", to_address, subject)
     topic_arn = os.getenv("SNS_TOPIC_ARN")
     if topic_arn:
-        sns = boto3.client("sns")
-        sns.publish(
-            TopicArn=topic_arn,
-            Subject=subject[:100],
-            Message=f"To: {to_address}\n\n{body}",
-            MessageAttributes={"recipient": {"DataType": "String", "StringValue": to_address}}
-        )
+        _sns_client().publish(TopicArn=topic_arn, **_entry(subject, body, to_address))
         return {"status": "sent_via_sns"}
 
 '''
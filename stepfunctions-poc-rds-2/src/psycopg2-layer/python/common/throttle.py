@@ -0,0 +1,35 @@
+import time
+import random
+import threading
+
+THROTTLE_ERRORS = {"ThrottlingException", "TooManyRequestsException", "RequestLimitExceeded"}
+
+
+class AdaptiveLimit:
+    """Concurrency cap that halves on throttling and creeps back up by one per success."""
+    def __init__(self, maximum):
+        self.maximum, self.limit, self.active = maximum, maximum, 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.active >= self.limit: self._cond.wait()
+            self.active += 1
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def throttled(self):
+        with self._cond: self.limit = max(1, self.limit // 2)
+
+    def succeeded(self):
+        with self._cond:
+            if self.limit < self.maximum:
+                self.limit += 1
+                self._cond.notify_all()
+
+
+def backoff(attempt):
+    time.sleep(min(2.0, 0.1 * (2 ** attempt)) * random.uniform(0.5, 1.0))
@@ -0,0 +1,70 @@
+import os, datetime as dt
+from common.db_helper import db_connection
+from common import jsonlog
+
+log = jsonlog.get_logger("reconcile_counts")
+
+LOOKBACK_DAYS = int(os.getenv("RECONCILE_LOOKBACK_DAYS", "30"))
+BATCH_DAYS = int(os.getenv("RECONCILE_BATCH_DAYS", "7"))
+
+# Counts rows of one day range from approval_tasks and its archive (archived tasks stay counted)
+# and makes approval_task_counts match: changed counts are overwritten, missing ones inserted,
+# and ones with no tasks left deleted.
+RECONCILE_SQL = """
+    WITH actual AS (
+        SELECT assessor_email, created_at::date AS day, status, count(*) AS task_count
+        FROM (SELECT assessor_email, created_at, status FROM approval_tasks
+              WHERE created_at >= %(lo)s AND created_at < %(hi)s
+              UNION ALL
+              SELECT assessor_email, created_at, status FROM approval_tasks_archive
+              WHERE created_at >= %(lo)s AND created_at < %(hi)s) t
+        GROUP BY 1, 2, 3
+    ), stored AS (
+        SELECT assessor_email, day, status, task_count FROM approval_task_counts
+        WHERE day >= %(lo)s AND day < %(hi)s
+    ), upserted AS (
+        INSERT INTO approval_task_counts AS c (assessor_email, day, status, task_count)
+        SELECT a.assessor_email, a.day, a.status, a.task_count
+        FROM actual a LEFT JOIN stored s USING (assessor_email, day, status)
+        WHERE s.task_count IS DISTINCT FROM a.task_count
+        ON CONFLICT (assessor_email, day, status) DO UPDATE SET task_count = EXCLUDED.task_count
+        RETURNING 1
+    ), deleted AS (
+        DELETE FROM approval_task_counts c USING stored s
+        WHERE c.assessor_email=s.assessor_email AND c.day=s.day AND c.status=s.status
+          AND NOT EXISTS (SELECT 1 FROM actual a WHERE a.assessor_email=s.assessor_email
+                          AND a.day=s.day AND a.status=s.status)
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM upserted), (SELECT count(*) FROM deleted)
+"""
+
+def reconcile_range(cur, lo, hi):
+    """Correct [lo, hi) in one transaction; returns (rows fixed, rows deleted).
+
+    The day's summary rows are locked first so in-flight trigger updates
+    finish before the recount, and new ones wait until this batch commits.
+    """
+    cur.execute("SELECT 1 FROM approval_task_counts WHERE day >= %s AND day < %s FOR UPDATE", (lo, hi))
+    cur.execute(RECONCILE_SQL, {"lo": lo, "hi": hi})
+    return cur.fetchone()
+
+def lambda_handler(event, context):
+    """Scheduled: walk the last LOOKBACK_DAYS days (up to and including today) in BATCH_DAYS slices."""
+    jsonlog.start(context)
+    event = event if isinstance(event, dict) else {}
+    lookback = int(event.get("lookbackDays") or LOOKBACK_DAYS)
+    batch = max(1, int(event.get("batchDays") or BATCH_DAYS))
+    end = dt.datetime.utcnow().date() + dt.timedelta(days=1)
+    day, fixed, deleted, batches = end - dt.timedelta(days=lookback), 0, 0, 0
+    with db_connection() as conn:
+        while day < end:
+            hi = min(end, day + dt.timedelta(days=batch))
+            with conn, conn.cursor() as cur:
+                f, d = reconcile_range(cur, day, hi)
+            fixed, deleted, batches = fixed + f, deleted + d, batches + 1
+            if f or d:
+                log.warning("counter drift corrected", fromDay=day.isoformat(), toDay=hi.isoformat(), fixed=f, deleted=d)
+            day = hi
+    log.info("reconciliation finished", batches=batches, fixed=fixed, deleted=deleted)
+    return {"batches":batches,"fixed":fixed,"deleted":deleted}
@@ -1,9 +1,153 @@
-import json, boto3
-from common.db_helper import get_db_connection
+import os, json, datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from psycopg2.extras import execute_values
+from common.aws_clients import get_client
+from common.db_helper import db_connection
+from common.throttle import AdaptiveLimit, THROTTLE_ERRORS, backoff
+from common import jsonlog
 
-sfn = boto3.client("stepfunctions")
+log = jsonlog.get_logger("resume_workflow")
+
+DEAD_TOKEN_ERRORS = {"TaskDoesNotExist", "TaskTimedOut", "InvalidToken"}
+MAX_BULK_DECISIONS = int(os.getenv("MAX_BULK_DECISIONS", "200"))
+DECISION_CONCURRENCY = int(os.getenv("DECISION_CONCURRENCY", "8"))
+DECISION_MAX_ATTEMPTS = int(os.getenv("DECISION_MAX_ATTEMPTS", "5"))
+
+def _now(): return dt.datetime.utcnow()
+
+def _claim(task_id):
+    """Take the task token and clear it in one statement; a second concurrent claim gets nothing."""
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE approval_tasks AS t SET task_token=NULL, updated_at=%s
+                FROM (SELECT task_id, task_token FROM approval_tasks
+                      WHERE task_id=%s AND status='PENDING' AND task_token IS NOT NULL FOR UPDATE) AS old
+                WHERE t.task_id=old.task_id
+                RETURNING old.task_token
+            """, (_now(), task_id))
+            row = cur.fetchone()
+    return row[0] if row else None
+
+def _restore(task_id, token):
+    """Put a claimed token back after a failed Step Functions call so the decision can be retried."""
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute("UPDATE approval_tasks SET task_token=%s, updated_at=%s "
+                        "WHERE task_id=%s AND status='PENDING' AND task_token IS NULL", (token, _now(), task_id))
+
+def _mark_failed(task_ids):
+    """The claimed tokens can never be used; record that instead of leaving the tasks PENDING."""
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute("UPDATE approval_tasks SET status='FAILED', updated_at=%s "
+                        "WHERE task_id = ANY(%s) AND status='PENDING' AND task_token IS NULL", (_now(), list(task_ids)))
+
+def _send(sfn, token, item):
+    payload = {"taskId":item["taskId"],"decision":item["decision"],"comments":item["comments"]}
+    if item["decision"]=="APPROVE":
+        sfn.send_task_success(taskToken=token, output=json.dumps(payload))
+    else:
+        sfn.send_task_failure(taskToken=token, error="Rejected", cause=json.dumps(payload))
+
+def _claim_many(task_ids):
+    """Claim every token in one statement, locking rows in task_id order; returns {task_id: token}."""
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                UPDATE approval_tasks AS t SET task_token=NULL, updated_at=%s
+                FROM (SELECT task_id, task_token FROM approval_tasks
+                      WHERE task_id = ANY(%s) AND status='PENDING' AND task_token IS NOT NULL
+                      ORDER BY task_id FOR UPDATE) AS old
+                WHERE t.task_id=old.task_id
+                RETURNING old.task_id, old.task_token
+            """, (_now(), list(task_ids)))
+            return dict(cur.fetchall())
+
+def _restore_many(tokens):
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            execute_values(cur, """
+                UPDATE approval_tasks AS t SET task_token=v.token, updated_at=v.ts
+                FROM (VALUES %s) AS v(task_id, token, ts)
+                WHERE t.task_id=v.task_id AND t.status='PENDING' AND t.task_token IS NULL
+            """, [(tid, tok, _now()) for tid, tok in tokens.items()], template="(%s,%s,%s::timestamp)")
+
+def _parse_decisions(body):
+    items = body.get("decisions") if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        raise ValueError("body must be a non-empty list of decisions or {\"decisions\": [...]}")
+    if len(items) > MAX_BULK_DECISIONS:
+        raise ValueError(f"at most {MAX_BULK_DECISIONS} decisions per request")
+    parsed, seen = [], set()
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        task_id, decision = item.get("taskId"), str(item.get("decision") or "").upper()
+        if task_id is not None and not isinstance(task_id, str):
+            raise ValueError("taskId must be a string")
+        error = ("taskId is required" if not task_id else
+                 "decision must be APPROVE or REJECT" if decision not in {"APPROVE","REJECT"} else
+                 "duplicate taskId in request" if task_id in seen else None)
+        if task_id: seen.add(task_id)
+        parsed.append({"taskId":task_id,"decision":decision,"comments":item.get("comments") or "","error":error})
+    return parsed
+
+def _bulk_decisions(event):
+    body = event.get("body") or "{}"
+    try:
+        items = _parse_decisions(json.loads(body) if isinstance(body, str) else body)
+    except ValueError as e:
+        return {"statusCode":400,"body":json.dumps({"error":str(e)})}
+
+    results = {i: {"taskId":it["taskId"],"status":"invalid","error":it["error"]} for i, it in enumerate(items) if it["error"]}
+    valid = {i: it for i, it in enumerate(items) if not it["error"]}
+    tokens = _claim_many(it["taskId"] for it in valid.values()) if valid else {}
+    for i, it in valid.items():
+        if it["taskId"] not in tokens:
+            results[i] = {"taskId":it["taskId"],"status":"not_found","error":"No task token found (already actioned or invalid)."}
+
+    sfn, limit, restore, dead = get_client("stepfunctions"), AdaptiveLimit(DECISION_CONCURRENCY), {}, []
+    def resume(i):
+        it = valid[i]; token = tokens[it["taskId"]]
+        for attempt in range(DECISION_MAX_ATTEMPTS):
+            try:
+                with limit: _send(sfn, token, it)
+                limit.succeeded()
+                return i, {"taskId":it["taskId"],"status":"ok","decision":it["decision"]}
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code in THROTTLE_ERRORS and attempt < DECISION_MAX_ATTEMPTS - 1:
+                    limit.throttled()
+                    backoff(attempt)
+                    continue
+                if code in DEAD_TOKEN_ERRORS:
+                    dead.append(it["taskId"])
+                    return i, {"taskId":it["taskId"],"status":"gone","error":code}
+                restore[it["taskId"]] = token
+                return i, {"taskId":it["taskId"],"status":"failed","error":code}
+            except Exception as e:
+                restore[it["taskId"]] = token
+                return i, {"taskId":it["taskId"],"status":"failed","error":type(e).__name__}
+
+    claimed = [i for i, it in valid.items() if it["taskId"] in tokens]
+    if claimed:
+        with ThreadPoolExecutor(max_workers=min(DECISION_CONCURRENCY, len(claimed))) as pool:
+            results.update(pool.map(resume, claimed))
+    if restore:
+        _restore_many(restore)
+    if dead:
+        _mark_failed(dead)
+    ordered = [results[i] for i in range(len(items))]
+    ok = sum(1 for r in ordered if r["status"]=="ok")
+    log.info("bulk decisions", requested=len(items), resumed=ok, restored=len(restore), failed=len(dead))
+    return {"statusCode":200 if ok==len(items) else 207,
+            "body":json.dumps({"resumed":ok,"failed":len(items)-ok,"results":ordered})}
 
 def lambda_handler(event, context):
+    jsonlog.start(context)
+    if event.get("routeKey") == "POST /requests/decisions":
+        return _bulk_decisions(event)
     task_id = (event.get("pathParameters") or {}).get("taskId")
     if not task_id:
         qs = event.get("queryStringParameters") or {}
@@ -21,21 +165,29 @@ def lambda_handler(event, context):
     if decision not in {"APPROVE","REJECT"}:
         return {"statusCode":400,"body":json.dumps({"error":"decision must be APPROVE or REJECT"})}
 
-# Fetch task token from DB
-    conn = get_db_connection()
-    token = None
-    with conn, conn.cursor() as cur:
-        cur.execute("SELECT task_token FROM approval_tasks WHERE task_id=%s",(task_id,))
-        row = cur.fetchone()
-        if row: token = row[0]
-    conn.close()
-
+    token = _claim(task_id)
     if not token:
         return {"statusCode":404,"body":json.dumps({"error":"No task token found (already actioned or invalid)."})}
 
     payload = {"taskId":task_id,"decision":decision,"comments":comments}
-    if decision=="APPROVE":
-        sfn.send_task_success(taskToken=token, output=json.dumps(payload))
-    else:
-        sfn.send_task_failure(taskToken=token, error="Rejected", cause=json.dumps(payload))
+    sfn = get_client("stepfunctions")
+    try:
+        if decision=="APPROVE":
+            sfn.send_task_success(taskToken=token, output=json.dumps(payload))
+        else:
+            sfn.send_task_failure(taskToken=token, error="Rejected", cause=json.dumps(payload))
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code")
+        if code in DEAD_TOKEN_ERRORS:
+            # The execution can no longer take this token; keep it cleared and mark the task failed.
+            _mark_failed([task_id])
+            log.warning("task token rejected by Step Functions", taskId=task_id, errorCode=code)
+            return {"statusCode":410,"body":json.dumps({"error":"Task is no longer waiting for a decision."})}
+        _restore(task_id, token)
+        log.error("sending task result failed", taskId=task_id, errorCode=code, exc=e)
+        return {"statusCode":502,"body":json.dumps({"error":"Could not reach Step Functions, please retry."})}
+    except Exception:
+        _restore(task_id, token)
+        raise
+    log.info("workflow resumed", taskId=task_id, decision=decision)
     return {"statusCode":200,"body":json.dumps({"status":"ok","taskId":task_id,"decision":decision})}
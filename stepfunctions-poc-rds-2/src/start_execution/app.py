@@ -1,6 +1,9 @@
-import os, json, uuid, boto3, datetime as dt
+import os, json, uuid, datetime as dt
+from common.aws_clients import get_client
+from common import jsonlog
+
+log = jsonlog.get_logger("start_execution")
 
-sfn = boto3.client("stepfunctions")
 SM_ARN = os.environ["STATE_MACHINE_ARN"]
 
 def _json(event):
@@ -13,13 +16,17 @@ def _json(event):
     return body
 
 def handler(event, _ctx):
+    jsonlog.start(_ctx)
     payload = _json(event)
+    if isinstance(payload, dict):
+        payload.pop("taskId", None)   # only bulk_create may point an execution at an existing task
     name = f"approval-{uuid.uuid4()}"
-    resp = sfn.start_execution(
+    resp = get_client("stepfunctions").start_execution(
         stateMachineArn=SM_ARN,
         name=name,
         input=json.dumps(payload)
     )
+    log.info("execution started", executionArn=resp["executionArn"])
     # 202 Accepted: execution started
     return {
         "statusCode": 202,
@@ -0,0 +1,43 @@
+import os, json, datetime as dt
+from common.db_helper import db_connection
+from common import jsonlog
+
+log = jsonlog.get_logger("task_stats")
+
+STATUSES = ("PENDING","APPROVED","REJECTED","TIMED_OUT","FAILED")
+MAX_DAYS = int(os.getenv("STATS_MAX_DAYS", "366"))
+
+def _day(value, default):
+    return dt.date.fromisoformat(value) if value else default
+
+def lambda_handler(event, context):
+    """Task counts by status per day, read from approval_task_counts (never from approval_tasks)."""
+    jsonlog.start(context)
+    qs = event.get("queryStringParameters") or {}
+    today = dt.datetime.utcnow().date()
+    try:
+        to_day = _day(qs.get("to"), today)
+        from_day = _day(qs.get("from"), to_day - dt.timedelta(days=29))
+    except ValueError:
+        return {"statusCode":400,"body":json.dumps({"error":"from/to must be YYYY-MM-DD"})}
+    if from_day > to_day or (to_day - from_day).days >= MAX_DAYS:
+        return {"statusCode":400,"body":json.dumps({"error":f"from must be on or before to, at most {MAX_DAYS} days"})}
+    assessor = (qs.get("assessor") or "").strip()
+
+    # With an assessor this is a primary-key range read; without, the day index bounds it.
+    sql = ("SELECT day, status, sum(task_count) FROM approval_task_counts WHERE day BETWEEN %s AND %s"
+           + (" AND assessor_email=%s" if assessor else "") + " GROUP BY day, status ORDER BY day")
+    params = (from_day, to_day, assessor) if assessor else (from_day, to_day)
+    with db_connection() as conn:
+        with conn, conn.cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+
+    days, totals = {}, dict.fromkeys(STATUSES, 0)
+    for day, status, count in rows:
+        days.setdefault(day.isoformat(), dict.fromkeys(STATUSES, 0))[status] = int(count)
+        totals[status] = totals.get(status, 0) + int(count)
+    log.debug("stats served", days=len(days), assessor=bool(assessor))
+    return {"statusCode":200,"headers":{"Content-Type":"application/json"},
+            "body":json.dumps({"from":from_day.isoformat(),"to":to_day.isoformat(),"assessor":assessor or None,
+                               "totals":totals,"days":[{"day":d, **c} for d, c in sorted(days.items())]})}
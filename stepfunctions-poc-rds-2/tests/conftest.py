@@ -0,0 +1,142 @@
+import contextlib
+import importlib.util
+import os
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(__file__), '..', 'src')
+# Lambda puts the layer's python/ directory on the path; handlers import it as ``common``.
+LAYER = os.path.join(SRC, 'psycopg2-layer', 'python')
+SCHEMA_SQL = os.path.join(os.path.dirname(__file__), '..', 'db', 'schema.sql')
+
+
+class RecordingCursor:
+    """Records every execute; fetchone/fetchall hand out the queued results in order.
+
+    ``mogrify`` records the rows psycopg2's ``execute_values`` renders, so tests can
+    read them back from ``values``.
+    """
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.executed = []
+        self.values = []
+        self.connection = self
+        self.encoding = 'UTF8'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql.decode() if isinstance(sql, bytes) else sql, params))
+
+    def mogrify(self, template, args):
+        self.values.append(args)
+        return b"(" + b",".join(b"%r" % (a,) for a in args) + b")"
+
+    def fetchone(self):
+        return self.results.pop(0)
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+        self.rollbacks = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commits += 1
+        else:
+            self.rollbacks += 1
+        return False
+
+    def cursor(self):
+        return self._cursor
+
+
+@pytest.fixture
+def layer(monkeypatch):
+    """Makes the layer's ``common`` package importable, as it is on Lambda."""
+    monkeypatch.syspath_prepend(LAYER)
+
+
+@pytest.fixture
+def load_handler(layer):
+    """Loads src/<function>/app.py under its own module name."""
+    def load(function):
+        spec = importlib.util.spec_from_file_location(f"{function}_app", os.path.join(SRC, function, 'app.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    return load
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Points a handler's db_connection at a RecordingCursor queued with ``results``."""
+    def install(module, results=()):
+        cursor = RecordingCursor(results)
+        conn = FakeConnection(cursor)
+
+        @contextlib.contextmanager
+        def db_connection():
+            yield conn
+        monkeypatch.setattr(module, 'db_connection', db_connection)
+        return cursor, conn
+    return install
+
+
+@pytest.fixture
+def pg():
+    """Connections into a scratch schema with db/schema.sql applied, on the server in TEST_PG_DSN.
+
+    Skipped when TEST_PG_DSN is not set. The returned function takes the session TimeZone.
+    """
+    dsn = os.environ.get('TEST_PG_DSN')
+    if not dsn:
+        pytest.skip('set TEST_PG_DSN to run the PostgreSQL tests')
+    import psycopg2
+    schema = f'rds2_test_{os.getpid()}'
+    admin = psycopg2.connect(dsn)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP SCHEMA IF EXISTS {schema} CASCADE')
+        cur.execute(f'CREATE SCHEMA {schema}')
+        cur.execute(f'SET search_path TO {schema}')
+        with open(SCHEMA_SQL) as f:
+            cur.execute(f.read())
+
+    def connect(timezone='UTC'):
+        return psycopg2.connect(dsn, options=f'-c search_path={schema} -c TimeZone={timezone}')
+    yield connect
+    with admin.cursor() as cur:
+        cur.execute(f'DROP SCHEMA {schema} CASCADE')
+    admin.close()
+
+
+@pytest.fixture
+def pg_handler(pg, load_handler, monkeypatch):
+    """Loads a handler whose db_connection opens a fresh connection to the ``pg`` schema."""
+    def load(function, timezone='UTC'):
+        module = load_handler(function)
+
+        @contextlib.contextmanager
+        def db_connection():
+            conn = pg(timezone)
+            try:
+                yield conn
+            finally:
+                conn.close()
+        monkeypatch.setattr(module, 'db_connection', db_connection)
+        return module
+    return load
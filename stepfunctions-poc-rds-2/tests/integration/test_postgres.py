@@ -0,0 +1,85 @@
+"""Handler SQL against a real PostgreSQL; run with TEST_PG_DSN="host=... dbname=... user=..."."""
+import datetime as dt
+import uuid
+
+import pytest
+
+
+def _task(cur, email, status, created_at, updated_at=None):
+    question_id, task_id = str(uuid.uuid4()), str(uuid.uuid4())
+    cur.execute("INSERT INTO questions (question_id, title, content, created_at) VALUES (%s, 't', 'c', %s)",
+                (question_id, created_at))
+    cur.execute("INSERT INTO approval_tasks (task_id, question_id, assessor_email, status, created_at, updated_at) "
+                "VALUES (%s, %s, %s, %s, %s, %s)", (task_id, question_id, email, status, created_at, updated_at or created_at))
+    return task_id
+
+
+def _counts(cur):
+    cur.execute("SELECT assessor_email, day, status, task_count FROM approval_task_counts ORDER BY 1, 2, 3")
+    return cur.fetchall()
+
+
+def test_reconcile_corrects_drifted_counters(pg, pg_handler):
+    app = pg_handler("reconcile_counts")
+    today = dt.datetime.utcnow().date()
+    noon = dt.datetime.combine(today, dt.time(12))
+    conn = pg()
+    with conn, conn.cursor() as cur:
+        for _ in range(3):
+            _task(cur, "a@example.com", "PENDING", noon)
+        _task(cur, "b@example.com", "APPROVED", noon - dt.timedelta(days=2))
+        cur.execute("INSERT INTO approval_tasks_archive (task_id, question_id, assessor_email, status, created_at, updated_at) "
+                    "VALUES ('archived-1', 'archived-q', 'c@example.com', 'REJECTED', %s, %s)",
+                    (noon - dt.timedelta(days=1),) * 2)
+        expected = sorted(_counts(cur) + [("c@example.com", today - dt.timedelta(days=1), "REJECTED", 1)])
+        # Drift: a wrong count, a missing row and a row for tasks that do not exist.
+        cur.execute("UPDATE approval_task_counts SET task_count = 99 WHERE assessor_email = 'a@example.com'")
+        cur.execute("DELETE FROM approval_task_counts WHERE assessor_email = 'b@example.com'")
+        cur.execute("INSERT INTO approval_task_counts VALUES ('ghost@example.com', %s, 'PENDING', 4)", (today,))
+
+    result = app.lambda_handler({"lookbackDays": 7, "batchDays": 3}, None)
+
+    assert result == {"batches": 3, "fixed": 3, "deleted": 1}
+    with conn, conn.cursor() as cur:
+        assert _counts(cur) == expected
+    assert app.lambda_handler({"lookbackDays": 7, "batchDays": 3}, None)["fixed"] == 0
+    conn.close()
+
+
+def test_archive_cutoff_does_not_depend_on_the_session_timezone(pg, pg_handler):
+    # UTC+14: read as local time, a naive UTC timestamp would look 14 hours older than it is.
+    app = pg_handler("archive_tasks", timezone="Pacific/Kiritimati")
+    now = dt.datetime.utcnow()
+    conn = pg()
+    with conn, conn.cursor() as cur:
+        old = _task(cur, "a@example.com", "APPROVED", now - dt.timedelta(days=40), now - dt.timedelta(days=31))
+        recent = _task(cur, "a@example.com", "APPROVED", now - dt.timedelta(days=40), now - dt.timedelta(days=29, hours=20))
+        pending = _task(cur, "a@example.com", "PENDING", now - dt.timedelta(days=40))
+        before = _counts(cur)
+
+    result = app.lambda_handler({"archiveAfterDays": 30, "batchSize": 10}, None)
+
+    assert result == {"batches": 1, "tasks": 1, "questions": 1, "done": True}
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT task_id FROM approval_tasks_archive")
+        assert cur.fetchall() == [(old,)]
+        cur.execute("SELECT task_id FROM approval_tasks ORDER BY task_id")
+        assert cur.fetchall() == sorted([(recent,), (pending,)])
+        assert _counts(cur) == before    # archived tasks stay counted
+    conn.close()
+
+
+def test_precreated_task_can_only_be_claimed_while_pending_without_a_token(pg, pg_handler):
+    app = pg_handler("create_request")
+    conn = pg()
+    with conn, conn.cursor() as cur:
+        task_id = _task(cur, "a@example.com", "PENDING", dt.datetime.utcnow())
+
+    result = app.lambda_handler({"taskId": task_id, "assessorEmail": "attacker@example.com"}, None)
+
+    assert (result["assessorEmail"], result["title"]) == ("a@example.com", "t")
+    with conn, conn.cursor() as cur:
+        cur.execute("UPDATE approval_tasks SET task_token = 'token' WHERE task_id = %s", (task_id,))
+    with pytest.raises(ValueError):
+        app.lambda_handler({"taskId": task_id}, None)
+    conn.close()
@@ -0,0 +1,38 @@
+import datetime as dt
+import unittest.mock as mock
+
+
+def _batch(tasks, questions):
+    return [(tasks, [f"q{i}" for i in range(tasks)] or None), (questions,)]
+
+
+def test_stops_after_the_first_short_batch(load_handler, fake_db):
+    app = load_handler("archive_tasks")
+    cursor, conn = fake_db(app, results=_batch(2, 2) + _batch(2, 1) + _batch(1, 1))
+
+    result = app.lambda_handler({"batchSize": 2, "archiveAfterDays": 30}, None)
+
+    assert result == {"batches": 3, "tasks": 5, "questions": 4, "done": True}
+    assert conn.commits == 3 and cursor.results == []
+    cutoffs = {params["cutoff"] for sql, params in cursor.executed if params and "cutoff" in params}
+    assert len(cutoffs) == 1
+    assert abs(cutoffs.pop() - (dt.datetime.utcnow() - dt.timedelta(days=30))) < dt.timedelta(minutes=1)
+
+
+def test_empty_batch_moves_no_questions(load_handler, fake_db):
+    app = load_handler("archive_tasks")
+    cursor, _ = fake_db(app, results=[(0, None)])
+
+    assert app.lambda_handler({}, None) == {"batches": 1, "tasks": 0, "questions": 0, "done": True}
+    assert not any("DELETE FROM questions" in sql for sql, _ in cursor.executed)
+
+
+def test_stops_before_lambda_runs_out_of_time(load_handler, fake_db):
+    app = load_handler("archive_tasks")
+    fake_db(app, results=_batch(2, 2) * 3)
+    context = mock.Mock(aws_request_id="req-1")
+    context.get_remaining_time_in_millis.side_effect = [60_000, 60_000, app.SAFETY_MARGIN_MS]
+
+    result = app.lambda_handler({"batchSize": 2}, context)
+
+    assert result == {"batches": 2, "tasks": 4, "questions": 4, "done": False}
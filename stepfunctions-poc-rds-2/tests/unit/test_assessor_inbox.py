@@ -0,0 +1,52 @@
+import datetime as dt
+import json
+
+import pytest
+
+T0 = dt.datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+
+def _row(i):
+    created = T0 + dt.timedelta(minutes=i)
+    return (f"task-{i}", f"question-{i}", f"Title {i}", "PENDING", None, created, created)
+
+
+def _get(app, **qs):
+    event = {"pathParameters": {"email": "a%40example.com"}, "queryStringParameters": qs}
+    ret = app.lambda_handler(event, None)
+    return ret["statusCode"], json.loads(ret["body"])
+
+
+def test_cursor_round_trips_to_the_microsecond(load_handler):
+    app = load_handler("assessor_inbox")
+
+    token = app.encode_cursor(T0, "task-with.dots")
+
+    assert "=" not in token and "/" not in token and "+" not in token
+    assert app.decode_cursor(token) == (T0, "task-with.dots")
+
+
+@pytest.mark.parametrize("token", ["!!!", "bm8tZG90", "eno.task-1", "é"])
+def test_bad_cursor_is_a_400(load_handler, fake_db, token):
+    app = load_handler("assessor_inbox")
+    cursor, _ = fake_db(app)
+
+    status, body = _get(app, cursor=token)
+
+    assert status == 400 and body["error"] == "invalid cursor"
+    assert cursor.executed == []
+
+
+def test_next_cursor_points_after_the_last_returned_row(load_handler, fake_db):
+    app = load_handler("assessor_inbox")
+    cursor, _ = fake_db(app, results=[[_row(i) for i in range(3)], [_row(2)]])
+
+    status, first = _get(app, limit="2")
+    _, last = _get(app, limit="2", cursor=first["nextCursor"])
+
+    assert status == 200
+    assert [t["taskId"] for t in first["tasks"]] == ["task-0", "task-1"]
+    assert app.decode_cursor(first["nextCursor"]) == (_row(1)[5], "task-1")
+    sql, params = cursor.executed[1]
+    assert params == ("a@example.com", "PENDING", _row(1)[5], "task-1", _row(1)[5], 3)
+    assert [t["taskId"] for t in last["tasks"]] == ["task-2"] and last["nextCursor"] is None
@@ -0,0 +1,95 @@
+import json
+import unittest.mock as mock
+
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+
+@pytest.fixture
+def app(load_handler, monkeypatch):
+    monkeypatch.setenv("STATE_MACHINE_ARN", "arn:aws:states:eu-west-1:123456789012:stateMachine:approval")
+    module = load_handler("bulk_create")
+    module.sfn = mock.MagicMock()
+    monkeypatch.setattr(module, "get_client", lambda service: module.sfn)
+    monkeypatch.setattr(module, "backoff", lambda attempt: None)
+    return module
+
+
+def _post(app, requests):
+    ret = app.lambda_handler({"body": json.dumps({"requests": requests})}, None)
+    return ret["statusCode"], json.loads(ret["body"])
+
+
+def test_inserts_in_two_statements_and_fails_tasks_that_never_started(app, fake_db):
+    cursor, _ = fake_db(app)
+
+    def start_execution(stateMachineArn, name, input):
+        if json.loads(input)["title"] == "unlucky":
+            raise ClientError({"Error": {"Code": "StateMachineDoesNotExist"}}, "StartExecution")
+        if json.loads(input)["title"] == "throttled" and not start_execution.throttled:
+            start_execution.throttled = True
+            raise ClientError({"Error": {"Code": "ThrottlingException"}}, "StartExecution")
+        return {"executionArn": f"arn:execution:{name}"}
+    start_execution.throttled = False
+    app.sfn.start_execution.side_effect = start_execution
+
+    status, body = _post(app, [
+        {"title": "ok", "assessorEmail": "a@example.com"},
+        {"title": "", "assessorEmail": "a@example.com"},
+        {"title": "unlucky", "assessorEmail": "b@example.com"},
+        {"title": "throttled", "assessorEmail": "c@example.com"},
+    ])
+
+    assert status == 207
+    assert [r["status"] for r in body["results"]] == ["started", "invalid", "failed", "started"]
+    assert body["results"][2]["error"] == "StateMachineDoesNotExist"
+    questions, tasks, fail = cursor.executed
+    assert questions[0].startswith("INSERT INTO questions") and "INSERT INTO approval_tasks" in tasks[0]
+    assert len(cursor.values) == 6    # three questions, three tasks
+    assert fail[0].startswith("UPDATE approval_tasks SET status='FAILED'")
+    assert fail[1][1] == [body["results"][2]["taskId"]]
+    started = {r["taskId"] for r in body["results"] if r["status"] == "started"}
+    names = {c.kwargs["name"] for c in app.sfn.start_execution.call_args_list}
+    assert names >= {f"approval-{t}" for t in started}
+
+
+def test_all_started_is_200_without_a_fail_statement(app, fake_db):
+    cursor, _ = fake_db(app)
+    app.sfn.start_execution.return_value = {"executionArn": "arn:execution"}
+
+    status, body = _post(app, [{"title": "t", "assessorEmail": "a@example.com"}] * 3)
+
+    assert status == 200 and body["started"] == 3
+    assert len(cursor.executed) == 2
+
+
+@pytest.mark.parametrize("body", ["[]", "{}", json.dumps({"requests": "x"})])
+def test_rejects_bodies_without_requests(app, fake_db, body):
+    cursor, _ = fake_db(app)
+
+    assert app.lambda_handler({"body": body}, None)["statusCode"] == 400
+    assert cursor.executed == []
+
+
+def test_transport_errors_retry_under_the_same_name_and_never_fail_the_task(app, fake_db):
+    cursor, _ = fake_db(app)
+    calls = []
+
+    def start_execution(stateMachineArn, name, input):
+        calls.append((name, input))
+        if json.loads(input)["title"] == "lost":
+            raise ReadTimeoutError(endpoint_url="https://states")
+        if [n for n, _ in calls].count(name) == 1:
+            raise ReadTimeoutError(endpoint_url="https://states")    # started, but the response never arrived
+        return {"executionArn": f"arn:execution:{name}"}
+    app.sfn.start_execution.side_effect = start_execution
+
+    status, body = _post(app, [{"title": "slow", "assessorEmail": "a@example.com"},
+                               {"title": "lost", "assessorEmail": "b@example.com"}])
+
+    assert status == 207 and (body["started"], body["failed"], body["unknown"]) == (1, 0, 1)
+    assert [r["status"] for r in body["results"]] == ["started", "unknown"]
+    assert body["results"][1]["error"] == "ReadTimeoutError"
+    slow = [c for c in calls if json.loads(c[1])["title"] == "slow"]
+    assert len(slow) == 2 and slow[0] == slow[1]
+    assert len(cursor.executed) == 2    # no FAILED update
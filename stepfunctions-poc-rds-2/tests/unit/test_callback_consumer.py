@@ -0,0 +1,58 @@
+import json
+
+
+def _record(message_id, body):
+    return {"messageId": message_id, "body": body if isinstance(body, str) else json.dumps(body)}
+
+
+def _task(task_id, email="a@example.com"):
+    return {"taskId": task_id, "assessorEmail": email, "title": "Title", "taskToken": f"token-{task_id}"}
+
+
+def test_only_failed_messages_are_reported(load_handler, fake_db, monkeypatch):
+    app = load_handler("callback_consumer")
+    # The UPDATE ... FROM (VALUES) matches task-1 and task-2; task-9 has no row.
+    cursor, _ = fake_db(app, results=[[("task-1",), ("task-2",)]])
+    sent = []
+
+    def send_email_batch(messages):
+        sent.extend(messages)
+        return [{"status": "failed" if to == "fail@example.com" else "sent_via_sns"} for _, _, to in messages]
+    monkeypatch.setattr(app, "send_email_batch", send_email_batch)
+
+    event = {"Records": [
+        _record("m1", _task("task-1")),
+        _record("m2", "not json"),
+        _record("m3", _task("task-9")),
+        _record("m4", _task("task-2", "fail@example.com")),
+        _record("m5", json.dumps(json.dumps(_task("task-1")))),   # double-encoded redelivery of task-1
+    ]}
+    result = app.lambda_handler(event, None)
+
+    assert sorted(f["itemIdentifier"] for f in result["batchItemFailures"]) == ["m2", "m3", "m4"]
+    (sql, _), = cursor.executed
+    assert "FROM (VALUES" in sql
+    assert sorted(v[0] for v in cursor.values) == ["task-1", "task-2", "task-9"]
+    assert [to for _, _, to in sent] == ["a@example.com", "fail@example.com"]
+
+
+def test_failed_token_write_reports_every_message(load_handler, fake_db, monkeypatch):
+    app = load_handler("callback_consumer")
+    cursor, _ = fake_db(app)
+
+    def execute(sql, params=None):
+        raise RuntimeError("db down")
+    cursor.execute = execute
+    monkeypatch.setattr(app, "send_email_batch", lambda messages: [{"status": "sent_via_sns"} for _ in messages])
+
+    result = app.lambda_handler({"Records": [_record("m1", _task("task-1")), _record("m2", _task("task-2"))]}, None)
+
+    assert [f["itemIdentifier"] for f in result["batchItemFailures"]] == ["m1", "m2"]
+
+
+def test_clean_batch_reports_no_failures(load_handler, fake_db, monkeypatch):
+    app = load_handler("callback_consumer")
+    fake_db(app, results=[[("task-1",)]])
+    monkeypatch.setattr(app, "send_email_batch", lambda messages: [{"status": "sent_via_sns"} for _ in messages])
+
+    assert app.lambda_handler({"Records": [_record("m1", _task("task-1"))]}, None) == {"status": "ok"}
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+
+def test_insert_binds_one_param_per_placeholder(load_handler, fake_db):
+    app = load_handler("create_request")
+    cursor, conn = fake_db(app)
+
+    result = app.lambda_handler({"body": json.dumps({"title": "Title", "assessorEmail": "a@example.com"})}, None)
+
+    assert result["taskId"] and result["questionId"]
+    (sql, params), = cursor.executed
+    assert sql.count("%s") == len(params)
+    assert conn.commits == 1
+
+
+def test_missing_fields_are_raised_before_the_insert(load_handler, fake_db):
+    app = load_handler("create_request")
+    cursor, _ = fake_db(app)
+
+    with pytest.raises(ValueError):
+        app.lambda_handler({"title": "Title"}, None)
+    assert cursor.executed == []
+
+
+def test_precreated_task_uses_the_stored_row_not_the_input(load_handler, fake_db):
+    app = load_handler("create_request")
+    cursor, _ = fake_db(app, [("q-1", "assessor@example.com", "Stored title")])
+
+    result = app.lambda_handler({"taskId": "t-1", "title": "Forged", "assessorEmail": "attacker@example.com"}, None)
+
+    assert result == {"statusCode": 200, "taskId": "t-1", "questionId": "q-1",
+                      "assessorEmail": "assessor@example.com", "title": "Stored title"}
+    (sql, params), = cursor.executed
+    assert "status='PENDING'" in sql and "task_token IS NULL" in sql and params == ("t-1",)
+
+
+def test_claimed_or_unknown_task_is_raised(load_handler, fake_db):
+    app = load_handler("create_request")
+    fake_db(app, [None])
+
+    with pytest.raises(ValueError, match="already claimed"):
+        app.lambda_handler({"taskId": "t-1"}, None)
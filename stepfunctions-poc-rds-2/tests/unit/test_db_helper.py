@@ -0,0 +1,236 @@
+import json
+import threading
+import time
+
+import psycopg2
+import pytest
+
+
+@pytest.fixture
+def db_helper(layer):
+    from common import db_helper
+    return db_helper
+
+
+class FakeConn:
+    def __init__(self, n, ping_error=None):
+        self.n = n
+        self.closed = 0
+        self.pings = 0
+        self.ping_error = ping_error
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                conn.pings += 1
+                if conn.ping_error:
+                    raise conn.ping_error
+        return Cursor()
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class Connector:
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        conn = FakeConn(len(self.made))
+        self.made.append(conn)
+        return conn
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(db_helper, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(db_helper.time, "monotonic", clock)
+    return clock
+
+
+def test_pool_reuses_the_most_recently_released_connection(db_helper):
+    pool = db_helper.ConnectionPool(connect=Connector(), max_size=3, validate_after=60)
+    a, b = pool.acquire(), pool.acquire()
+    pool.release(a)
+    pool.release(b)
+
+    assert pool.acquire() is b
+    assert pool.stats == {"hits": 1, "misses": 2, "reconnects": 0, "discarded": 0}
+    assert b.pings == 0    # used recently, so no ping
+
+
+def test_pool_rotates_connections_past_max_age(db_helper, clock):
+    pool = db_helper.ConnectionPool(connect=Connector(), max_age=300, validate_after=600)
+    old = pool.acquire()
+    pool.release(old)
+    clock.now += 301
+
+    new = pool.acquire()
+
+    assert new is not old and old.closed
+    assert pool.stats == {"hits": 0, "misses": 1, "reconnects": 1, "discarded": 1}
+
+
+def test_pool_pings_idle_connections_and_replaces_dead_ones(db_helper, clock):
+    pool = db_helper.ConnectionPool(connect=Connector(), max_age=0, validate_after=30)
+    conn = pool.acquire()
+    pool.release(conn)
+    clock.now += 31
+    assert pool.acquire() is conn and conn.pings == 1
+    conn.ping_error = psycopg2.OperationalError("server closed the connection unexpectedly")
+    pool.release(conn)
+    clock.now += 31
+
+    replacement = pool.acquire()
+
+    assert replacement is not conn and conn.closed and conn.pings == 2
+    assert pool.stats == {"hits": 1, "misses": 1, "reconnects": 1, "discarded": 1}
+
+
+def test_pool_times_out_at_max_size(db_helper):
+    pool = db_helper.ConnectionPool(connect=Connector(), max_size=1, acquire_timeout=0.05)
+    held = pool.acquire()
+
+    with pytest.raises(db_helper.PoolTimeout):
+        pool.acquire()
+    pool.release(held)
+    assert pool.acquire() is held
+
+
+def test_pool_discards_a_connection_that_raised_operational_error(db_helper):
+    connector = Connector()
+    pool = db_helper.ConnectionPool(connect=connector)
+
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection():
+            raise psycopg2.OperationalError("terminating connection due to administrator command")
+    with pool.connection() as conn:
+        pass
+
+    assert connector.made[0].closed and conn is connector.made[1]
+    assert pool.stats["discarded"] == 1 and pool.stats["misses"] == 2
+
+
+def test_secret_fetch_is_single_flight(db_helper):
+    calls, started = [], threading.Barrier(8)
+
+    def fetch(arn, region):
+        calls.append(arn)
+        time.sleep(0.05)
+        return {"password": "p"}
+    cache = db_helper.SecretCache(fetch=fetch, ttl=60)
+
+    def get():
+        started.wait()
+        return cache.get("arn", "eu-west-1")
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["arn"]
+    assert cache.stats["misses"] == 1 and cache.stats["hits"] == 7
+
+
+def test_invalidate_only_drops_the_stale_value(db_helper):
+    versions = iter([{"password": "p1"}, {"password": "p2"}, {"password": "p3"}])
+    cache = db_helper.SecretCache(fetch=lambda arn, region: next(versions), ttl=60)
+    first = cache.get("arn", "r")
+    cache.invalidate("arn", "r", stale=first)
+    second = cache.get("arn", "r")
+
+    cache.invalidate("arn", "r", stale=first)    # a slower thread reacting to the same rotation
+
+    assert cache.get("arn", "r") is second and second["password"] == "p2"
+    assert cache.stats["refreshes"] == 2
+
+
+def test_auth_failure_refreshes_the_secret_once_and_retries(db_helper, monkeypatch):
+    monkeypatch.setenv("DB_SECRET_ARN", "arn")
+    monkeypatch.setenv("AWS_REGION", "eu-west-1")
+    fetched = []
+
+    def fetch(arn, region):
+        fetched.append(arn)
+        return {"password": f"p{len(fetched)}"}
+    monkeypatch.setattr(db_helper, "_secrets", db_helper.SecretCache(fetch=fetch, ttl=60))
+    db_helper._secrets.get("arn", "eu-west-1")    # cached before the password was rotated
+    opened = []
+
+    def _open(secret):
+        opened.append(secret["password"])
+        if secret["password"] == "p1":
+            time.sleep(0.05)    # every thread tries the old password before any of them refreshes
+            raise psycopg2.OperationalError('FATAL:  password authentication failed for user "app"')
+        return FakeConn(len(opened))
+    monkeypatch.setattr(db_helper, "_open", _open)
+    barrier = threading.Barrier(6)
+
+    def connect():
+        barrier.wait()
+        db_helper._connect()
+    threads = [threading.Thread(target=connect) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(fetched) == 2
+    assert opened.count("p1") == 6 and opened.count("p2") == 6
+
+
+def test_other_connect_errors_do_not_refresh_the_secret(db_helper, monkeypatch):
+    monkeypatch.setenv("DB_SECRET_ARN", "arn")
+    monkeypatch.setenv("AWS_REGION", "eu-west-1")
+    cache = db_helper.SecretCache(fetch=lambda arn, region: {"password": "p"}, ttl=60)
+    monkeypatch.setattr(db_helper, "_secrets", cache)
+
+    def _open(secret):
+        raise psycopg2.OperationalError("could not connect to server: Connection refused")
+    monkeypatch.setattr(db_helper, "_open", _open)
+
+    with pytest.raises(psycopg2.OperationalError):
+        db_helper._connect()
+    assert cache.stats["refreshes"] == 1
+
+
+def test_stats_are_logged_at_most_once_per_interval(db_helper, monkeypatch, capsys, clock):
+    monkeypatch.setattr(db_helper, "_pool", db_helper.ConnectionPool(connect=Connector()))
+    monkeypatch.setattr(db_helper, "_stats_logged_at", None)
+    monkeypatch.setattr(db_helper, "STATS_LOG_INTERVAL", 60)
+
+    for _ in range(3):
+        with db_helper.db_connection():
+            pass
+    clock.now += 61
+    conn = db_helper.get_db_connection()
+    db_helper.release_db_connection(conn)
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["message"] for r in records] == ["connection stats", "connection stats"]
+    assert records[0]["pool"] == {"hits": 0, "misses": 1, "reconnects": 0, "discarded": 0}
+    assert records[1]["pool"]["hits"] == 3
+    assert records[1]["loginCache"]["hit_rate"] == 0.0
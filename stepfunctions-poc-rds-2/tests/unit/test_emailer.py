@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+
+class FakeSNS:
+    """PublishBatch stand-in. ``failures`` maps a message index to the codes its entry fails with, one per call."""
+
+    def __init__(self, failures=None, error=None):
+        self.failures = {i: list(codes) for i, codes in (failures or {}).items()}
+        self.error = error
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def publish_batch(self, TopicArn, PublishBatchRequestEntries):
+        with self._lock:
+            self.calls.append(sorted(int(e["Id"]) for e in PublishBatchRequestEntries))
+            if self.error:
+                raise ClientError({"Error": {"Code": self.error}}, "PublishBatch")
+            ok, failed = [], []
+            for e in PublishBatchRequestEntries:
+                codes = self.failures.get(int(e["Id"]))
+                if codes:
+                    code = codes.pop(0)
+                    failed.append({"Id": e["Id"], "Code": code, "SenderFault": code == "InvalidParameter"})
+                else:
+                    ok.append({"Id": e["Id"], "MessageId": f"msg-{e['Id']}"})
+            return {"Successful": ok, "Failed": failed}
+
+
+@pytest.fixture
+def emailer(layer, monkeypatch):
+    from common import emailer
+    monkeypatch.setenv("SNS_TOPIC_ARN", "arn:aws:sns:eu-west-1:123456789012:approvals")
+    monkeypatch.setattr(emailer, "_backoff", lambda attempt: None)
+    return emailer
+
+
+def _messages(n):
+    return [(f"subject {i}", "body", f"user{i}@example.com") for i in range(n)]
+
+
+def test_chunks_by_ten_and_keeps_input_order(emailer, monkeypatch):
+    sns = FakeSNS()
+    monkeypatch.setattr(emailer, "_sns_client", lambda: sns)
+
+    results = emailer.send_email_batch(_messages(23))
+
+    assert sorted(len(c) for c in sns.calls) == [3, 10, 10]
+    assert [r["messageId"] for r in results] == [f"msg-{i}" for i in range(23)]
+
+
+def test_retries_only_retryable_failed_entries(emailer, monkeypatch):
+    sns = FakeSNS(failures={3: ["Throttling"], 5: ["InvalidParameter"], 12: ["InternalError", "InternalError"]})
+    monkeypatch.setattr(emailer, "_sns_client", lambda: sns)
+
+    results = emailer.send_email_batch(_messages(15))
+
+    assert [r["status"] for r in results] == ["sent_via_sns"] * 5 + ["failed"] + ["sent_via_sns"] * 9
+    assert results[5]["error"] == "InvalidParameter"
+    assert sorted(sns.calls) == [list(range(10)), [3], [10, 11, 12, 13, 14], [12], [12]]
+
+
+def test_gives_up_after_max_attempts(emailer, monkeypatch):
+    sns = FakeSNS(failures={1: ["Throttling"] * emailer.BATCH_MAX_ATTEMPTS})
+    monkeypatch.setattr(emailer, "_sns_client", lambda: sns)
+
+    results = emailer.send_email_batch(_messages(2))
+
+    assert results[0]["status"] == "sent_via_sns"
+    assert results[1] == {"status": "failed", "error": "Throttling"}
+    assert len(sns.calls) == emailer.BATCH_MAX_ATTEMPTS
+
+
+def test_whole_batch_error_fails_its_chunk_only_after_retries(emailer, monkeypatch):
+    sns = FakeSNS(error="ThrottlingException")
+    monkeypatch.setattr(emailer, "_sns_client", lambda: sns)
+
+    results = emailer.send_email_batch(_messages(3))
+
+    assert results == [{"status": "failed", "error": "ThrottlingException"}] * 3
+    assert len(sns.calls) == emailer.BATCH_MAX_ATTEMPTS
+
+    sns.error, sns.calls = "AuthorizationError", []
+    assert emailer.send_email_batch(_messages(1)) == [{"status": "failed", "error": "AuthorizationError"}]
+    assert len(sns.calls) == 1
@@ -0,0 +1,92 @@
+import json
+import unittest.mock as mock
+
+import pytest
+from botocore.exceptions import ClientError
+
+
+def _client_error(code, operation="SendTaskSuccess"):
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+@pytest.fixture
+def app(load_handler, monkeypatch):
+    module = load_handler("resume_workflow")
+    sfn = mock.MagicMock()
+    monkeypatch.setattr(module, "get_client", lambda service: sfn)
+    monkeypatch.setattr(module, "backoff", lambda attempt: None)
+    module.sfn = sfn
+    return module
+
+
+def _decide(app, task_id="task-1", decision="approve"):
+    event = {"pathParameters": {"taskId": task_id}, "queryStringParameters": {"decision": decision}}
+    return app.lambda_handler(event, None)
+
+
+@pytest.mark.parametrize("code", ["TaskTimedOut", "InvalidToken", "TaskDoesNotExist"])
+def test_dead_token_marks_the_task_failed(app, fake_db, code):
+    cursor, _ = fake_db(app, results=[("token-1",)])
+    app.sfn.send_task_success.side_effect = _client_error(code)
+
+    result = _decide(app)
+
+    assert result["statusCode"] == 410
+    claim, mark = cursor.executed
+    assert "RETURNING old.task_token" in claim[0]
+    assert mark[0].startswith("UPDATE approval_tasks SET status='FAILED'")
+    assert mark[1][1] == ["task-1"]
+
+
+def test_retryable_error_puts_the_token_back(app, fake_db):
+    cursor, _ = fake_db(app, results=[("token-1",)])
+    app.sfn.send_task_success.side_effect = _client_error("ServiceUnavailable")
+
+    result = _decide(app)
+
+    assert result["statusCode"] == 502
+    restore_sql, restore_args = cursor.executed[-1]
+    assert restore_sql.startswith("UPDATE approval_tasks SET task_token=%s") and restore_args[0] == "token-1"
+
+
+def _bulk(app, decisions):
+    ret = app.lambda_handler({"routeKey": "POST /requests/decisions", "body": json.dumps({"decisions": decisions})}, None)
+    return ret["statusCode"], json.loads(ret["body"])
+
+
+def test_bulk_decisions_claim_once_and_report_per_item(app, fake_db):
+    # task-2 has no claimable token; the rest come back from the one claim statement.
+    cursor, _ = fake_db(app, results=[[("task-1", "token-1"), ("task-3", "token-3"), ("task-4", "token-4")]])
+
+    def send_task_success(taskToken, output):
+        if taskToken == "token-3":
+            raise _client_error("ServiceUnavailable")
+        if taskToken == "token-4":
+            raise _client_error("TaskTimedOut")
+    app.sfn.send_task_success.side_effect = send_task_success
+
+    status, body = _bulk(app, [
+        {"taskId": "task-1", "decision": "approve"},
+        {"taskId": "task-2", "decision": "approve"},
+        {"taskId": "task-3", "decision": "approve"},
+        {"taskId": "task-4", "decision": "approve"},
+        {"taskId": "task-1", "decision": "reject"},
+        {"decision": "approve"},
+    ])
+
+    assert status == 207
+    assert [r["status"] for r in body["results"]] == ["ok", "not_found", "failed", "gone", "invalid", "invalid"]
+    claim, restore, mark = cursor.executed
+    assert claim[1][1] == ["task-1", "task-2", "task-3", "task-4"]
+    assert "FROM (VALUES" in restore[0] and cursor.values == [("task-3", "token-3", mock.ANY)]
+    assert mark[0].startswith("UPDATE approval_tasks SET status='FAILED'") and mark[1][1] == ["task-4"]
+
+
+@pytest.mark.parametrize("task_id", [["task-1"], {"id": "task-1"}, 7])
+def test_bulk_decisions_reject_non_string_task_ids(app, fake_db, task_id):
+    cursor, _ = fake_db(app)
+
+    status, body = _bulk(app, [{"taskId": task_id, "decision": "approve"}])
+
+    assert status == 400 and body["error"] == "taskId must be a string"
+    assert cursor.executed == []
@@ -0,0 +1,57 @@
+import os
+import threading
+
+# Shared botocore settings for every client the handlers create.
+MAX_POOL_CONNECTIONS = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "16"))
+CONNECT_TIMEOUT = float(os.environ.get("AWS_CONNECT_TIMEOUT_SECONDS", "2"))
+READ_TIMEOUT = float(os.environ.get("AWS_READ_TIMEOUT_SECONDS", "10"))
+RETRY_MODE = os.environ.get("AWS_RETRY_MODE", "standard")
+MAX_ATTEMPTS = int(os.environ.get("AWS_MAX_ATTEMPTS", "3"))
+
+_lock = threading.Lock()
+_session = None
+_config = None
+_clients = {}     # (service, region) -> client
+_resources = {}   # (service, region) -> resource
+
+
+def _setup():
+    # boto3 is imported here, not at module load, so a cold start only pays for it when a client is first needed.
+    global _session, _config
+    if _session is None:
+        import boto3
+        from botocore.config import Config
+        _config = Config(
+            max_pool_connections=MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+            connect_timeout=CONNECT_TIMEOUT,
+            read_timeout=READ_TIMEOUT,
+            retries={"mode": RETRY_MODE, "max_attempts": MAX_ATTEMPTS},
+        )
+        _session = boto3.session.Session()
+
+
+def get_client(service: str, region: str = None):
+    """Return the cached low-level client for ``service`` in ``region`` (default: AWS_REGION)."""
+    key = (service, region or os.environ.get("AWS_REGION"))
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                _setup()
+                client = _clients[key] = _session.client(service, region_name=key[1], config=_config)
+    return client
+
+
+def get_resource(service: str, region: str = None):
+    """Return the cached boto3 resource for ``service`` in ``region`` (default: AWS_REGION)."""
+    key = (service, region or os.environ.get("AWS_REGION"))
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                _setup()
+                resource = _resources[key] = _session.resource(service, region_name=key[1], config=_config)
+    return resource